@@ -44,6 +44,26 @@ def toISO8601Date(ts:Union[float, datetime], isUTCtimestamp:bool = True) -> str:
 	return ts.strftime('%Y%m%dT%H%M%S,%f')
 
 
+def fromISO8601Date(timestamp:str, default:float = None) -> float:
+	"""	Parse an absolute ISO 8601 timestamp and return it as a float. In contrast to
+		`fromAbsRelTimestamp()` relative timestamps are not supported.
+
+		Args:
+			timestamp: ISO 8601 timestamp.
+			default: Value to return if `timestamp` is not a valid absolute timestamp.
+		Return:
+			Float timestamp, or `default`.
+	"""
+	try:
+		# Fast path for the format of the generated timestamps
+		return datetime.strptime(timestamp, '%Y%m%dT%H%M%S,%f').timestamp()
+	except Exception:
+		try:
+			return isodate.parse_datetime(timestamp).timestamp()
+		except Exception:
+			return default
+
+
 def fromAbsRelTimestamp(absRelTimestamp:str, default:float = 0.0, withMicroseconds:bool = True) -> float:
 	"""	Parse a ISO 8601 string and return a UTC-relative timestamp as a float.
 		If  `absRelTimestamp` in the string is a period (relatice) timestamp (e.g. PT2S), then this function
@@ -102,10 +102,12 @@ def determineSerialization(url:str, csz:list[str], defaultSerialization:CST) ->
 	return defaultSerialization
 
 
-def requestFromResult(inResult:Result, originator:str = None, ty:T = None, op:Operation = None, isResponse:bool = False) -> Result:
+def requestFromResult(inResult:Result, originator:str = None, ty:T = None, op:Operation = None, isResponse:bool = False, withContent:bool = True) -> Result:
 	"""	Convert a response request to a new *Result* object and create a new dictionary in *Result.data*
 		with the full Response structure. Recursively do this if the *embeddedRequest* is also
 		a full Request or Response.
+
+		If `withContent` is False then no *pc* is added, e.g. when the content is serialized separately.
 	"""
 	from ..services import CSE
 
@@ -162,6 +164,10 @@ def requestFromResult(inResult:Result, originator:str = None, ty:T = None, op:Op
 	if inResult.request.parameters:
 		if (ec := inResult.request.parameters.get(C.hfEC)):			# Event Category, copy from the original request
 			req['ec'] = ec
+		if (cnst := inResult.request.parameters.get(C.hfCTS)):		# Content Status and Offset of a limited discovery result
+			req['cnst'] = cnst
+		if (cnot := inResult.request.parameters.get(C.hfCTO)):
+			req['cnot'] = cnot
 	
 	# If the response contains a request (ie. for polling), then add that request to the pc
 	pc = None
@@ -174,7 +180,7 @@ def requestFromResult(inResult:Result, originator:str = None, ty:T = None, op:Op
 			pc = cast(JSON, requestFromResult(Result(request = inResult.embeddedRequest)).data)
 		# L.isDebug and L.logDebug(pc)
 
-	else:
+	elif withContent:
 		# construct and serialize the data as JSON/dictionary. Encoding to JSON or CBOR is done later
 		pc = inResult.toData(CST.PLAIN)	#  type:ignore[assignment]
 	if pc:
@@ -674,6 +674,12 @@ class FilterUsage(ACMEIntEnum):
 	discoveryBasedOperation	= 4
 
 
+class ContentStatus(ACMEIntEnum):
+	"""	Content Status """
+	PARTIAL_CONTENT	= 1
+	FULL_CONTENT	= 2
+
+
 class DesiredIdentifierResultType(ACMEIntEnum):
 	""" Desired Identifier Result Type """
 	structured		= 1 # default
@@ -9,14 +9,15 @@
 #
 
 from __future__ import annotations
-import random, string, sys, re, threading
+import random, string, sys, re, threading, time, zlib
 import traceback
-from typing import Any, Callable, Tuple, cast
+from typing import Any, Callable, Iterable, Tuple, cast
 
 from .Constants import Constants as C
 from .Types import ResourceTypes as T, ResponseStatusCode
 from .Types import Result, JSON
 from ..services.Logging import Logging as L
+from ..helpers.XPath import compileXPath
 from ..resources.Resource import Resource
 from ..resources.PCH_PCU import PCH_PCU
 from ..services import CSE as CSE
@@ -28,15 +29,15 @@ from ..services import CSE as CSE
 #
 
 def uniqueRI(prefix:str = '') -> str:
-	"""	Generate a unique resource ID. Beside a random number it
-		can have a prefix.
+	"""	Generate a unique resource ID. Beside an identifier from the
+		configured identifier generator it can have a prefix.
 		
 		Args:
 			prefix: Prefix for the ID
 		Return:
 			String with the new ID
 	"""
-	return f'{noNamespace(prefix)}{uniqueID()}'
+	return f'{noNamespace(prefix)}{_idGenerator()}'
 
 
 def uniqueID() -> str:
@@ -49,6 +50,116 @@ def uniqueID() -> str:
 	return str(random.randint(1,sys.maxsize))
 
 
+class TimeOrderedIDGenerator(object):
+	"""	Generator for time-ordered identifiers.
+		An identifier consists of 19 digits: the current time in milliseconds (13 digits), 
+		a node number that is derived from the CSE-ID (3 digits), and a sequence number 
+		for the identifiers that are generated in the same millisecond (3 digits). 
+		
+		Identifiers that are generated later are therefore sorted after earlier ones, 
+		and they have the same alphabet and maximum length as random identifiers.
+
+		The generator never goes back in time while the CSE is running. To not repeat identifiers
+		of an earlier run when the system clock was set back, it must be seeded with the
+		stored identifiers at startup (see `seed()`). Identifiers of different CSEs may collide
+		when their node numbers are the same.
+	"""
+
+	identifierPattern = re.compile(r'(\d{13})(\d{3})(\d{3})$')
+	"""	Timestamp, node number and sequence number at the end of an identifier. """
+
+	maxClockDrift = 24 * 60 * 60 * 1000
+	"""	Identifiers with a timestamp more than this number of milliseconds in the future are ignored by `seed()`. """
+
+	def __init__(self, node:str) -> None:
+		"""	Initialize the generator.
+
+			Args:
+				node: String to derive the node number from, e.g. the CSE-ID.
+		"""
+		self.node = zlib.crc32(node.encode('utf-8')) % 1000
+		self.lock = threading.Lock()
+		self.lastTimestamp = 0
+		self.sequence = 0
+
+
+	def __call__(self) -> str:
+		"""	Generate a new identifier.
+
+			Return:
+				String with the identifier.
+		"""
+		with self.lock:
+			# Never go back in time, even if the system clock does
+			if (timestamp := max(int(time.time() * 1000), self.lastTimestamp)) == self.lastTimestamp:
+				self.sequence += 1
+				if self.sequence > 999:	# All sequence numbers are used for this millisecond, so continue with the next one
+					timestamp += 1
+					self.sequence = 0
+			else:
+				self.sequence = 0
+			self.lastTimestamp = timestamp
+			return f'{timestamp:013d}{self.node:03d}{self.sequence:03d}'
+
+
+	def seed(self, identifiers:Iterable[str]) -> None:
+		"""	Continue after the newest of the given identifiers that was generated by this generator.
+
+			Identifiers of other nodes and other generators are ignored. Random identifiers may look 
+			like time-ordered ones, so identifiers with a timestamp more than `maxClockDrift` in the 
+			future are ignored as well.
+
+			Args:
+				identifiers: Identifiers, e.g. the stored resource IDs. They may have a prefix.
+		"""
+		maxTimestamp = int(time.time() * 1000) + self.maxClockDrift
+		with self.lock:
+			for each in identifiers:
+				if not (match := self.identifierPattern.search(each)) or int(match.group(2)) != self.node:
+					continue
+				timestamp, sequence = int(match.group(1)), int(match.group(3))
+				if timestamp <= maxTimestamp and (timestamp, sequence) > (self.lastTimestamp, self.sequence):
+					self.lastTimestamp, self.sequence = timestamp, sequence
+
+
+idGenerators:dict[str, Callable[[str], Callable[[], str]]] = {
+	'random'		: lambda node: uniqueID,
+	'timeOrdered'	: TimeOrderedIDGenerator,
+}
+"""	Factories for the identifier generators, by name. Each factory is called with the CSE-ID 
+	and returns a function that generates a new identifier. Further generators can be added here. """
+
+_idGenerator:Callable[[], str] = uniqueID
+"""	The identifier generator that is used for resource and request IDs. """
+
+
+def setIDGenerator(name:str, node:str) -> bool:
+	"""	Select the generator for resource and request IDs.
+
+		Args:
+			name: Name of the generator in `idGenerators`.
+			node: String to derive a node number from, e.g. the CSE-ID.
+		Return:
+			Boolean indicating whether the generator exists.
+	"""
+	global _idGenerator
+	if not (factory := idGenerators.get(name)):
+		return False
+	_idGenerator = factory(node)
+	return True
+
+
+def seedIDGenerator(identifiers:Iterable[str]) -> None:
+	"""	Let the generator for resource and request IDs continue after existing identifiers,
+		if the generator supports this.
+
+		Args:
+			identifiers: Identifiers, e.g. the stored resource IDs.
+	"""
+	if (seed := getattr(_idGenerator, 'seed', None)):
+		seed(identifiers)
+
+
 def isUniqueRI(ri:str) -> bool:
 	"""	Test whether a resource ID does not yet exists.
 	
@@ -290,6 +401,21 @@ def riFromStructuredPath(srn: str) -> str:
 		return None
 
 
+def identifierForID(id:str) -> JSON:
+	""" Get the identifier document of a resource by its resource ID or its structured path. 
+		This doesn't retrieve the resource itself.
+
+		Args:
+			id: Resource ID or structured path
+		Return:
+			Identifier document with *ri*, *rn*, *srn* and *ty*, or None
+	"""
+	if id.startswith(CSE.cseCsiSlash) and len(id) > len(CSE.cseCsiSlash):	# local SP-relative ID
+		id = id[len(CSE.cseCsiSlash):]
+	identifiers = CSE.storage.structuredIdentifier(id) if isStructured(id) else CSE.storage.identifier(id)
+	return identifiers[0] if identifiers else None
+
+
 def srnFromHybrid(srn:str, id:str) -> Tuple[str, str]:
 	""" Handle Hybrid ID. """
 	if id:
@@ -579,7 +705,6 @@ def deleteNoneValuesFromDict(dct:JSON, allowedNull:list[str]=[]) -> JSON:
 	return { key:value for key,value in ((key, deleteNoneValuesFromDict(value)) for key,value in dct.items()) if value is not None or key in allowedNull }
 
 
-decimalMatch = re.compile(r'{(\d+)}')
 def findXPath(dct:JSON, key:str, default:Any=None) -> Any:
 	""" Find a structured `key` in the dictionary `dct`. If `key` does not exists then
 		`default` is returned.
@@ -599,51 +724,13 @@ def findXPath(dct:JSON, key:str, default:Any=None) -> Any:
 
 		Example: findXPath(resource, '{_}/rn') 
 
+		The path is compiled only once and then taken from an LRU cache, see `helpers.XPath`.
 	"""
-
 	if not key or not dct:
 		return default
 	if key in dct:
 		return dct[key]
-
-	paths = key.split("/")
-	data:Any = dct
-	for i in range(0,len(paths)):
-		if not data:
-			return default
-		pathElement = paths[i]
-		if len(pathElement) == 0:	# return if there is an empty path element
-			return default
-		elif (m := decimalMatch.search(pathElement)) is not None:	# Match array index {i}
-			idx = int(m.group(1))
-			if not isinstance(data, (list,dict)) or idx >= len(data):	# Check idx within range of list
-				return default
-			if isinstance(data, dict):
-				data = data[list(data)[i]]
-			else:
-				data = data[idx]
-
-		elif pathElement == '{}':	# Match an array in general
-			if not isinstance(data, (list,dict)):	# not a list, return the default
-				return default
-			if i == len(paths)-1:	# if this is the last element and it is a list then return the data
-				return data
-			return [ findXPath(d, '/'.join(paths[i+1:]), default) for d in data  ]	# recursively build an array with remnainder of the selector
-
-		elif pathElement == '{_}':
-			if isinstance(data, dict):
-				if keys := list(data.keys()):
-					data = data[keys[0]]
-				else:
-					return default
-			else:
-				return default
-
-		elif pathElement not in data:	# if key not in dict
-			return default
-		else:
-			data = data[pathElement]	# found data for the next level down
-	return data
+	return compileXPath(key).find(dct, default)
 
 
 def setXPath(dct:JSON, key:str, value:Any, overwrite:bool=True) -> bool:
@@ -651,20 +738,7 @@ def setXPath(dct:JSON, key:str, value:Any, overwrite:bool=True) -> bool:
 		Create if necessary, and observe the `overwrite` option (True overwrites an
 		existing key/value).
 	"""
-	paths = key.split("/")
-	ln1 = len(paths)-1
-	data = dct
-	if ln1 > 0:	# Small optimization. don't check if there is no extended path
-		for i in range(0, ln1):
-			if (_p := paths[i]) not in data:
-				data[_p] = {}
-			data = data[_p]
-	# if not isinstance(data, dict):
-	# 	return False
-	if not overwrite and paths[ln1] in data: # test overwrite first, it's faster
-		return True # don't overwrite
-	data[paths[ln1]] = value
-	return True
+	return compileXPath(key).set(dct, value, overwrite)
 
 
 def removeKeyFromDict(dct:dict, keys:list[str]) -> Any:
@@ -763,7 +837,8 @@ def fanoutPointResource(id:str) -> Resource:
 	# 	(head, sep, tail) = id.partition('/fopt/')
 	# 	nid = head + '/fopt'
 
-	if nid and (result := CSE.dispatcher.retrieveResource(nid)).resource:
+	# Check the type in the identifiers first, without retrieving the resource
+	if nid and (identifier := identifierForID(nid)) and identifier['ty'] == T.GRP_FOPT and (result := CSE.dispatcher.retrieveResource(identifier['ri'])).resource:
 		return cast(Resource, result.resource)
 	return None
 
@@ -779,11 +854,8 @@ def pollingChannelURIResource(id:str) -> PCH_PCU:
 	if not id:
 		return None
 	if id.endswith('pcu'):
-		# Convert to srn
-		if not isStructured(id):
-			if not (id := structuredPathFromRI(id)):
-				return None
-		if (result := CSE.dispatcher.retrieveResource(id)).resource and result.resource.ty == T.PCH_PCU:
+		# Check the type in the identifiers first, without retrieving the resource
+		if (identifier := identifierForID(id)) and identifier['ty'] == T.PCH_PCU and (result := CSE.dispatcher.retrieveResource(identifier['ri'])).resource:
 			return cast(PCH_PCU, result.resource)
 		# Fallthrough
 	return None
@@ -800,15 +872,14 @@ def latestOldestResource(id:str) -> Resource:
 	if not id:
 		return None
 	if id.endswith(('la', 'ol')):
-		# Convert to srn
-		if not isStructured(id):
-			if not (id := structuredPathFromRI(id)):
-				return None
-		if (result := CSE.dispatcher.retrieveResource(id)).resource and result.resource.ty in [ T.CNT_LA, T.CNT_OL, T.FCNT_LA, T.FCNT_OL, T.TS_LA, T.TS_OL ]:
+		# Check the type in the identifiers first, without retrieving the resource
+		if (identifier := identifierForID(id)) and identifier['ty'] in _latestOldestTypes and (result := CSE.dispatcher.retrieveResource(identifier['ri'])).resource:
 			return result.resource
 		# Fallthrough
 	return None
 
+_latestOldestTypes = frozenset([ T.CNT_LA, T.CNT_OL, T.FCNT_LA, T.FCNT_OL, T.TS_LA, T.TS_OL ])
+
 def getAttributeSize(attribute:Any) -> int:
 	"""	Return a realistic size for the content of an attribute.
 		Python does not really return good sizes for some of the data types.
@@ -39,7 +39,7 @@ class ReadWriteLock(object):
         try:
             self._readers -= 1
             if not self._readers:
-                self._read_ready.notifyAll()
+                self._read_ready.notify_all()
         finally:
             self._readerList.remove(threading.get_ident())
             self._read_ready.release()
@@ -65,7 +65,7 @@ class ReadWriteLock(object):
         #logging.debug("RWL : release_write()")
         self._writers -= 1
         self._writerList.remove(threading.get_ident())
-        self._read_ready.notifyAll()
+        self._read_ready.notify_all()
         self._read_ready.release()
 
 ##############################################################################
@@ -0,0 +1,991 @@
+#
+#	StorageIndexes.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	In-memory indexes and the column store that are maintained alongside the storage
+#
+
+from __future__ import annotations
+import bisect, heapq, itertools, math, operator
+from threading import Lock
+from typing import Any, Iterator, Tuple, Union
+from tinydb.table import Table
+
+from ..etc.Types import ResourceTypes as T, JSON, Conditions, FilterOperation
+from ..etc import DateUtils as DateUtils
+
+try:
+	import numpy
+except ImportError:
+	numpy = None	# NumPy is optional. Without it discovery doesn't use the column store
+
+
+#########################################################################
+#
+#	In-memory indexes for all storage bindings
+#
+
+class LabelIndex(object):
+	"""	In-memory inverted index of the resource labels (*lbl*). It maps each label to the resource IDs
+		of the resources with that label, so that discovery by labels doesn't need to instantiate
+		every resource. The index must be updated *after* a resource was changed or removed in the database.
+	"""
+
+	def __init__(self) -> None:
+		self.labels:dict[str, set[str]] = {}			# label -> ris
+		self.resources:dict[str, frozenset[str]] = {}	# ri -> labels
+		self.lock = Lock()
+
+
+	def rebuild(self, resources:list[JSON]) -> None:
+		"""	Clear the index and rebuild it from resource documents.
+
+			Args:
+				resources: List of resource documents.
+		"""
+		with self.lock:
+			self.labels.clear()
+			self.resources.clear()
+			for each in resources:
+				self._add(each['ri'], each.get('lbl'))
+
+
+	def add(self, ri:str, lbl:list[str]) -> None:
+		"""	Add or replace the labels of a resource.
+
+			Args:
+				ri: Resource ID.
+				lbl: List of labels, or None.
+		"""
+		with self.lock:
+			self._remove(ri)
+			self._add(ri, lbl)
+
+
+	def remove(self, ri:str) -> None:
+		"""	Remove the labels of a resource.
+
+			Args:
+				ri: Resource ID.
+		"""
+		with self.lock:
+			self._remove(ri)
+
+
+	def search(self, labels:list[str]) -> set[str]:
+		"""	Return the resource IDs of the resources that have at least one of the labels.
+
+			Args:
+				labels: List of labels.
+			Return:
+				Set of resource IDs.
+		"""
+		with self.lock:
+			return set().union(*[ ris for label in labels if (ris := self.labels.get(label)) ])
+
+
+	def count(self, labels:list[str]) -> int:
+		"""	Return the maximum number of resources that have at least one of the labels.
+
+			Args:
+				labels: List of labels.
+			Return:
+				Sum of the number of resources for each label.
+		"""
+		return sum([ len(self.labels.get(label, ())) for label in labels ])
+
+
+	def clear(self) -> None:
+		"""	Remove all labels from the index.
+		"""
+		with self.lock:
+			self.labels.clear()
+			self.resources.clear()
+
+
+	def _add(self, ri:str, lbl:list[str]) -> None:
+		if not lbl or not isinstance(lbl, list):
+			return
+		self.resources[ri] = (labels := frozenset(lbl))
+		for label in labels:
+			self.labels.setdefault(label, set()).add(ri)
+
+
+	def _remove(self, ri:str) -> None:
+		for label in self.resources.pop(ri, ()):
+			if (ris := self.labels.get(label)):
+				ris.discard(ri)
+				if not ris:
+					del self.labels[label]
+
+
+class AnnouncementIndex(object):
+	"""	In-memory index of the announcement targets of the resources. It maps the CSE-IDs in the 
+		*at* attribute to the resource IDs of the announceable resources, and keeps the CSE-IDs from
+		the internal *__announcedTo__* attribute, so that the announced and not announced resources 
+		of a remote CSE can be found without matching every resource.
+		The index must be updated *after* a resource was changed or removed in the database.
+	"""
+
+	def __init__(self, announcedTo:str) -> None:
+		"""	Create a new announcement index.
+
+			Args:
+				announcedTo: Name of the internal attribute with the list of (CSE-ID, remote resource ID) of the announcements.
+		"""
+		self.announcedTo = announcedTo
+		self.targets:dict[str, dict[str, None]] = {}					# csi -> ris, in creation order
+		self.resources:dict[str, Tuple[frozenset[str], frozenset[str]]] = {}	# ri -> (target csis, announced csis)
+		self.lock = Lock()
+
+
+	def rebuild(self, resources:list[JSON]) -> None:
+		"""	Clear the index and rebuild it from resource documents.
+
+			Args:
+				resources: List of resource documents.
+		"""
+		with self.lock:
+			self.targets.clear()
+			self.resources.clear()
+			for each in resources:
+				self._add(each['ri'], self._entryFor(each))
+
+
+	def add(self, resource:JSON) -> None:
+		"""	Add or replace the announcement targets of a resource.
+
+			Args:
+				resource: Resource document.
+		"""
+		ri = resource['ri']
+		entry = self._entryFor(resource)
+		with self.lock:
+			if (oldEntry := self.resources.get(ri)) == entry:
+				return
+			if oldEntry:
+				# Keep the position of the resource for targets that didn't change
+				for csi in oldEntry[0] - entry[0]:
+					self._removeTarget(csi, ri)
+				self.resources.pop(ri)
+			self._add(ri, entry)
+
+
+	def remove(self, ri:str) -> None:
+		"""	Remove a resource from the index.
+
+			Args:
+				ri: Resource ID.
+		"""
+		with self.lock:
+			if (entry := self.resources.pop(ri, None)):
+				for csi in entry[0]:
+					self._removeTarget(csi, ri)
+
+
+	def clear(self) -> None:
+		"""	Remove all resources from the index.
+		"""
+		with self.lock:
+			self.targets.clear()
+			self.resources.clear()
+
+
+	def search(self, csi:str, isAnnounced:bool) -> list[str]:
+		"""	Return the resource IDs of the resources that have an *at* entry that starts with `csi/`.
+			Only the resources that are announced to at least one CSE are considered, and they are
+			selected by whether `csi` is one of them.
+
+			Args:
+				csi: CSE-ID of the remote CSE.
+				isAnnounced: Return the announced resources if True, and the not announced resources otherwise.
+			Return:
+				List of resource IDs, in the order in which the resources were created.
+		"""
+		with self.lock:
+			return [ ri for ri in self.targets.get(csi, ())
+						if (announced := self.resources[ri][1]) and (csi in announced) == isAnnounced ]
+
+
+	def _entryFor(self, resource:JSON) -> Tuple[frozenset[str], frozenset[str]]:
+		"""	Return the target CSE-IDs and the announced CSE-IDs of a resource document. Every
+			prefix of an *at* entry that ends before a "/" is a target CSE-ID.
+		"""
+		targets = set()
+		if (at := resource.get('at')) and isinstance(at, list):
+			for each in at:
+				if not isinstance(each, str):
+					continue
+				i = each.find('/', 1)
+				while i > 0:
+					targets.add(each[:i])
+					i = each.find('/', i + 1)
+		announced = frozenset([ each[0] for each in resource.get(self.announcedTo) or [] ])
+		return frozenset(targets), announced
+
+
+	def _add(self, ri:str, entry:Tuple[frozenset[str], frozenset[str]]) -> None:
+		if not entry[0]:
+			return
+		self.resources[ri] = entry
+		for csi in entry[0]:
+			self.targets.setdefault(csi, {})[ri] = None
+
+
+	def _removeTarget(self, csi:str, ri:str) -> None:
+		if (ris := self.targets.get(csi)) is not None:
+			ris.pop(ri, None)
+			if not ris:
+				del self.targets[csi]
+
+
+class ColumnStore(object):
+	"""	In-memory columnar store of the resource attributes that are used by the *ty*, *crb*, *cra*, 
+		*ms*, *us*, *sts*, *stb*, *exb*, *exa*, *sza* and *szb* filter criteria.
+
+		The attributes are stored in NumPy arrays with one row per resource, together with the resource
+		ID and a code for the resource's and the parent's resource IDs. Discovery evaluates those
+		filter criteria for all resources in a single vectorized pass, and only the matching resources 
+		need to be instantiated. Timestamps are stored as float timestamps and compared chronologically.
+		The store must be updated *after* a resource was changed or removed in the database.
+	"""
+
+	conditions = frozenset([ 'ty', 'crb', 'cra', 'ms', 'us', 'sts', 'stb', 'exb', 'exa', 'sza', 'szb' ])
+	"""	Filter criteria that can be evaluated by the column store. """
+
+	_timeConditions = [ ('crb', 'ct', operator.lt), ('cra', 'ct', operator.gt), 
+						('ms', 'lt', operator.gt),  ('us', 'lt', operator.lt),
+						('exb', 'et', operator.lt), ('exa', 'et', operator.gt) ]
+	_stateConditions = [ ('sts', operator.gt), ('stb', operator.lt) ]
+	_sizeConditions = [ ('sza', operator.ge), ('szb', operator.lt) ]
+	_sizeTypes = [ int(T.CIN), int(T.FCNT) ]
+
+	# column -> (dtype, fill value)
+	_columns = {	'valid'	: ('bool', False),
+					'code'	: ('int64', -1),	# code of the resource ID
+					'pi'	: ('int64', -1),	# code of the parent resource ID
+					'ty'	: ('int32', -1),
+					'ct'	: ('float64', math.nan),
+					'lt'	: ('float64', math.nan),
+					'et'	: ('float64', math.nan),
+					'st'	: ('float64', math.nan),
+					'cs'	: ('float64', math.nan),
+			   }
+	
+
+	def __init__(self, capacity:int = 1024) -> None:
+		self.initialCapacity = capacity
+		self.virtualTypes = [ int(each) for each in T if T.isVirtualResource(each) ]
+		self.lock = Lock()
+		self._reset()
+
+
+	def _reset(self, capacity:int = None) -> None:
+		capacity = max(capacity or 0, self.initialCapacity)
+		self.size = 0								# number of used rows, including removed rows
+		self.removed = 0							# number of removed rows
+		self.rows:dict[str, int] = {}				# ri -> row
+		self.ris:list[str] = []						# row -> ri
+		self.codes:dict[str, int] = {}				# ri -> code
+		self.columns:dict[str, Any] = { name: numpy.full(capacity, fill, dtype = dtype) for name, (dtype, fill) in self._columns.items() }
+
+
+	def rebuild(self, resources:list[JSON]) -> None:
+		"""	Clear the store and rebuild it from resource documents.
+
+			Args:
+				resources: List of resource documents.
+		"""
+		with self.lock:
+			self._reset(2 * len(resources))
+			for each in resources:
+				self._add(each)
+
+
+	def add(self, resource:JSON) -> None:
+		"""	Add or replace the attributes of a resource.
+
+			Args:
+				resource: Resource document.
+		"""
+		with self.lock:
+			self._add(resource)
+
+
+	def remove(self, ri:str) -> None:
+		"""	Remove a resource from the store.
+
+			Args:
+				ri: Resource ID.
+		"""
+		with self.lock:
+			if (row := self.rows.pop(ri, None)) is None:
+				return
+			self.columns['valid'][row] = False
+			self.ris[row] = None
+			self.removed += 1
+			if self.removed > self.initialCapacity and self.removed > self.size // 2:
+				self._compact()
+
+
+	def clear(self) -> None:
+		"""	Remove all resources from the store.
+		"""
+		with self.lock:
+			self._reset()
+
+
+	def discover(self, pi:str, level:int, conditions:Conditions, fo:int, allLen:int) -> Tuple[list[str], bool]:
+		"""	Discover the resources in the resource tree below a resource that match the supported 
+			filter criteria.
+
+			Args:
+				pi: Resource ID of the root resource of the discovery.
+				level: Number of levels of the resource tree to discover.
+				conditions: Filter criteria.
+				fo: Filter operation.
+				allLen: Number of all filter criteria and attributes that must match for *fo* = AND.
+			Return:
+				Tuple of the list of resource IDs of the matching non-virtual resources in the order
+				of the resource tree, and a flag that indicates whether the filter criteria were 
+				completely evaluated. If this flag is False then the resources must be matched again against
+				all filter criteria. None is returned if the filter criteria cannot be evaluated by the store.
+		"""
+		with self.lock:
+			if (matched := self._match(conditions, fo, allLen)) is None:
+				return None
+			mask, count = matched
+			exact = count == allLen
+			if (rootCode := self.codes.get(pi)) is None:
+				return [], exact
+			
+			# Collect the resource tree level by level, grouped by the parent codes
+			columns = self.columns
+			piColumn = columns['pi'][:self.size]
+			validColumn = columns['valid'][:self.size]
+			children:dict[int, list[int]] = {}
+			frontier = numpy.array([ rootCode ], dtype = 'int64')
+			depth = 0
+			while depth < level and len(frontier):
+				if not len(rows := numpy.flatnonzero(validColumn & numpy.isin(piColumn, frontier))):
+					break
+				for row, parentCode in zip(rows.tolist(), piColumn[rows].tolist()):
+					children.setdefault(parentCode, []).append(row)
+				frontier = columns['code'][rows]
+				depth += 1
+
+			# Walk the tree depth-first. Siblings are ordered by their creation time, like the direct child resources
+			ctColumn = columns['ct']
+			tyColumn = columns['ty']
+			codeColumn = columns['code']
+			sortKey = lambda row: (ctColumn[row], tyColumn[row], self.ris[row])
+			result:list[str] = []
+			stack = sorted(children.get(rootCode, []), key = sortKey, reverse = True)
+			while stack:
+				row = stack.pop()
+				if mask[row]:
+					result.append(self.ris[row])
+				if (childRows := children.get(int(codeColumn[row]))):
+					stack.extend(sorted(childRows, key = sortKey, reverse = True))
+			return result, exact
+
+
+	def _match(self, conditions:Conditions, fo:int, allLen:int) -> Tuple[Any, int]:
+		"""	Evaluate the supported filter criteria for all rows.
+
+			For *fo* = AND the mask selects the rows that match all supported filter criteria.
+			For *fo* = OR the filter criteria can only be evaluated if all of them are supported.
+
+			Return:
+				Tuple of the row mask and the number of the evaluated filter criteria, or None if the
+				filter criteria cannot be evaluated.
+		"""
+		n = self.size
+		columns = self.columns
+		tyColumn = columns['ty'][:n]
+		found = numpy.zeros(n, dtype = 'int64')
+		count = 0	# number of evaluated criteria, counted like in the Dispatcher
+
+		try:
+			if 'ty' in conditions:
+				count += len(tys := conditions['ty'])
+				if tys:
+					found += len(tys) * numpy.isin(tyColumn, [ int(each) for each in tys ])
+			
+			for name, attribute, op in self._timeConditions:
+				if name in conditions:
+					count += 1
+					if (value := conditions[name]):
+						if (ts := DateUtils.fromISO8601Date(value)) is None:
+							return None
+						found += op(columns[attribute][:n], ts)
+			
+			for name, op in self._stateConditions:
+				if name in conditions:
+					count += 1
+					if (value := conditions[name]) is not None:
+						found += op(columns['st'][:n], float(value))
+			
+			sizeTypes = None
+			for name, op in self._sizeConditions:
+				if name in conditions:
+					count += 1
+					if (value := conditions[name]) is not None:
+						if sizeTypes is None:
+							sizeTypes = numpy.isin(tyColumn, self._sizeTypes)
+						found += sizeTypes & op(columns['cs'][:n], int(value))
+		except (ValueError, TypeError):
+			return None	# let the Dispatcher handle invalid values
+
+		if not count:
+			return None
+		if fo == FilterOperation.AND:
+			mask = found == count
+		elif count == allLen:	# OR
+			mask = found > 0
+		else:
+			return None
+		return mask & columns['valid'][:n] & ~numpy.isin(tyColumn, self.virtualTypes), count
+
+
+	def _add(self, resource:JSON) -> None:
+		ri = resource['ri']
+		if (row := self.rows.get(ri)) is None:
+			if self.size == len(self.columns['valid']):
+				self._resize(2 * self.size)
+			row = self.size
+			self.size += 1
+			self.rows[ri] = row
+			self.ris.append(ri)
+
+		columns = self.columns
+		columns['valid'][row] = True
+		columns['code'][row] = self._code(ri)
+		columns['pi'][row] = self._code(pi) if (pi := resource.get('pi')) else -1
+		columns['ty'][row] = resource.get('ty', -1)
+		for attribute in [ 'ct', 'lt', 'et' ]:
+			columns[attribute][row] = DateUtils.fromISO8601Date(value, math.nan) if (value := resource.get(attribute)) else math.nan
+		for attribute in [ 'st', 'cs' ]:
+			columns[attribute][row] = value if isinstance(value := resource.get(attribute), (int, float)) else math.nan
+
+
+	def _code(self, ri:str) -> int:
+		if (code := self.codes.get(ri)) is None:
+			code = self.codes[ri] = len(self.codes)
+		return code
+
+
+	def _resize(self, capacity:int) -> None:
+		for name, (dtype, fill) in self._columns.items():
+			column = numpy.full(capacity, fill, dtype = dtype)
+			column[:self.size] = self.columns[name][:self.size]
+			self.columns[name] = column
+		
+
+	def _compact(self) -> None:
+		"""	Remove the removed rows and the codes of the removed resources.
+		"""
+		rows = numpy.flatnonzero(self.columns['valid'][:self.size])
+		columns = { name: self.columns[name][rows] for name in self._columns }
+
+		# Map the old codes to the new codes, which are the new rows
+		mapping = numpy.full(len(self.codes) + 1, -1, dtype = 'int64')	# the last entry maps -1 to -1
+		mapping[columns['code']] = numpy.arange(len(rows))
+		columns['pi'] = mapping[columns['pi']]
+		columns['code'] = numpy.arange(len(rows), dtype = 'int64')
+
+		self.ris = [ self.ris[row] for row in rows.tolist() ]
+		self.rows = { ri: row for row, ri in enumerate(self.ris) }
+		self.codes = dict(self.rows)
+		self.size = len(rows)
+		self.removed = 0
+		self.columns = columns
+		self._resize(max(2 * self.size, self.initialCapacity))
+
+
+#########################################################################
+#
+#	In-memory indexes for the TinyDB tables
+#
+
+IndexKey = Union[str, Tuple[str, ...]]
+"""	An index key is either a single document field, or a tuple of fields for a combined index. """
+
+
+class DocumentIndex(object):
+	"""	In-memory secondary index for a TinyDB table.
+
+		For each configured key the index maps the value(s) of that field (or tuple of fields)
+		to the IDs of the documents that have this value. The document IDs are kept in insertion
+		order, so that search results are returned in the same order as a full table scan would return them.
+
+		The index must be kept in sync by the caller, ie. `add()` and `remove()` must be called
+		under the same lock as the respective table operation.
+	"""
+
+	def __init__(self, table:Table, keys:list[IndexKey]) -> None:
+		"""	Create and build a new index for a table.
+
+			Args:
+				table: The TinyDB table to index.
+				keys: List of fields or tuples of fields to index.
+		"""
+		self.table = table
+		self.indexes:dict[IndexKey, dict[Any, dict[int, None]]] = { key: {} for key in keys }
+		self.rebuild()
+
+
+	def rebuild(self) -> None:
+		"""	Clear the index and rebuild it from the current table content.
+		"""
+		for idx in self.indexes.values():
+			idx.clear()
+		for doc in self.table:
+			self.add(doc.doc_id, doc)
+
+
+	def _valueFor(self, key:IndexKey, doc:JSON) -> Any:
+		"""	Return the indexed value of a document for a key, or None if the document doesn't have it.
+		"""
+		if isinstance(key, tuple):
+			values = tuple(doc.get(k) for k in key)
+			value = None if None in values else values
+		else:
+			value = doc.get(key)
+		try:
+			hash(value)		# Lists and dictionaries are not indexed
+		except TypeError:
+			return None
+		return value
+
+
+	def addKey(self, key:IndexKey) -> None:
+		"""	Add another field (or tuple of fields) to the index and build its index from the 
+			current table content. Nothing happens if the key is already indexed.
+
+			Args:
+				key: Field or tuple of fields to index.
+		"""
+		if key in self.indexes:
+			return
+		idx:dict[Any, dict[int, None]] = {}
+		self.indexes[key] = idx
+		for doc in self.table:
+			if (value := self._valueFor(key, doc)) is not None:
+				idx.setdefault(value, {})[doc.doc_id] = None
+
+
+	def keyFor(self, dct:JSON) -> Tuple[IndexKey, Any]:
+		"""	Return the index key with the most fields that are all contained in a dictionary
+			with hashable values, and the dictionary's value for that key.
+
+			Args:
+				dct: Dictionary, e.g. a fragment to search for.
+			Return:
+				Tuple of index key and value, or (None, None) if no key can be used.
+		"""
+		result:Tuple[IndexKey, Any] = (None, None)
+		length = 0
+		for key in self.indexes:
+			fields = key if isinstance(key, tuple) else (key, )
+			if len(fields) > length and all(field in dct for field in fields) and (value := self._valueFor(key, dct)) is not None:
+				result = (key, value)
+				length = len(fields)
+		return result
+
+
+	def add(self, docID:int, doc:JSON) -> None:
+		"""	Add a document to all indexes.
+		
+			Args:
+				docID: The document's ID in the table.
+				doc: The document.
+		"""
+		for key, idx in self.indexes.items():
+			if (value := self._valueFor(key, doc)) is not None:
+				idx.setdefault(value, {})[docID] = None
+
+
+	def remove(self, docID:int, doc:JSON) -> None:
+		"""	Remove a document from all indexes.
+		
+			Args:
+				docID: The document's ID in the table.
+				doc: The document as it is currently indexed.
+		"""
+		for key, idx in self.indexes.items():
+			if (value := self._valueFor(key, doc)) is not None and (docIDs := idx.get(value)) is not None:
+				docIDs.pop(docID, None)
+				if not docIDs:
+					del idx[value]
+
+
+	def update(self, docID:int, oldDoc:JSON, newDoc:JSON) -> None:
+		"""	Update the indexes for a changed document. Only indexes whose values have
+			actually changed are touched, so that the order of the documents is kept.
+
+			Args:
+				docID: The document's ID in the table.
+				oldDoc: The document as it is currently indexed.
+				newDoc: The changed document.
+		"""
+		for key, idx in self.indexes.items():
+			if (oldValue := self._valueFor(key, oldDoc)) == (newValue := self._valueFor(key, newDoc)):
+				continue
+			if oldValue is not None and (docIDs := idx.get(oldValue)) is not None:
+				docIDs.pop(docID, None)
+				if not docIDs:
+					del idx[oldValue]
+			if newValue is not None:
+				idx.setdefault(newValue, {})[docID] = None
+
+
+	def docIDs(self, key:IndexKey, value:Any) -> list[int]:
+		"""	Return the IDs of all documents that have *value* for the index *key*.
+		"""
+		return list(self.indexes[key].get(value, ()))
+
+
+	def search(self, key:IndexKey, value:Any) -> list[Document]:
+		"""	Return all documents that have *value* for the index *key*.
+
+			Args:
+				key: The index key.
+				value: The value to look for. For combined indexes this must be a tuple.
+			Return:
+				List of documents, or an empty list.
+		"""
+		return [ doc	for docID in self.docIDs(key, value) 
+						if (doc := self.table.get(doc_id = docID)) is not None ]
+	
+
+	def contains(self, key:IndexKey, value:Any) -> bool:
+		"""	Test whether any document has *value* for the index *key*.
+		"""
+		return value in self.indexes[key]
+
+
+	def count(self, key:IndexKey, value:Any) -> int:
+		"""	Return the number of documents that have *value* for the index *key*.
+		"""
+		return len(self.indexes[key].get(value, ()))
+
+
+	def clear(self) -> None:
+		"""	Remove all entries from the index.
+		"""
+		for idx in self.indexes.values():
+			idx.clear()
+
+
+class ChildList(object):
+	"""	List of the (ct, ty, ri, cs) entries of child resources, ordered by their creation time.
+
+		Removing the oldest entry, e.g. when the *mni* of a &lt;container> is exceeded, only 
+		advances the offset of the first entry. The removed entries are dropped from the list
+		when they are at least half of it, so removing the oldest entry is amortized O(1).
+	"""
+
+	__slots__ = ( 'entries', 'head' )
+
+	def __init__(self) -> None:
+		self.entries:list[Tuple[str, int, str, int]] = []
+		self.head = 0	# offset of the first entry. The entries before it are removed
+
+
+	def __len__(self) -> int:
+		return len(self.entries) - self.head
+
+
+	def __iter__(self) -> Iterator[Tuple[str, int, str, int]]:
+		return itertools.islice(self.entries, self.head, None)
+
+
+	def first(self) -> Tuple[str, int, str, int]:
+		"""	Return the oldest entry. The list must not be empty.
+		"""
+		return self.entries[self.head]
+
+
+	def last(self) -> Tuple[str, int, str, int]:
+		"""	Return the latest entry. The list must not be empty.
+		"""
+		return self.entries[-1]
+
+
+	def add(self, entry:Tuple[str, int, str, int]) -> None:
+		"""	Insert an entry by its creation time.
+		"""
+		bisect.insort(self.entries, entry, lo = self.head)
+
+
+	def remove(self, entry:Tuple[str, int, str, int]) -> bool:
+		"""	Remove an entry.
+
+			Return:
+				Boolean indicating whether the entry was in the list.
+		"""
+		if (idx := bisect.bisect_left(self.entries, entry, lo = self.head)) >= len(self.entries) or self.entries[idx] != entry:
+			return False
+		if idx == self.head:
+			self.head += 1
+			if self.head * 2 >= len(self.entries):
+				del self.entries[:self.head]
+				self.head = 0
+		else:
+			del self.entries[idx]
+		return True
+
+
+class ChildIndex(object):
+	"""	In-memory index of the direct child resources of each resource.
+
+		For each parent resource ID and resource type the index holds a `ChildList` of 
+		(ct, ty, ri, cs) tuples of the child resources, ordered by their creation time. 
+		This allows to get the oldest and latest child resource of a type directly. 
+		The index also holds the sum of the content sizes of the child resources 
+		of each type, e.g. for the *cbs* attribute of a &lt;container>.
+		The index has the same maintenance interface as `DocumentIndex`.
+	"""
+
+	def __init__(self, table:Table) -> None:
+		"""	Create and build a new child index for a resource table.
+
+			Args:
+				table: The TinyDB table with the resources.
+		"""
+		self.table = table
+		self.children:dict[str, dict[int, ChildList]] = {}
+		self.sizes:dict[str, dict[int, int]] = {}
+		self.rebuild()
+
+
+	def rebuild(self) -> None:
+		"""	Clear the index and rebuild it from the current table content.
+		"""
+		self.clear()
+		for doc in self.table:
+			self.add(doc.doc_id, doc)
+
+
+	def _entry(self, doc:JSON) -> Tuple[str, Tuple[str, int, str, int]]:
+		"""	Return the parent resource ID and the index entry for a resource document,
+			or None if the document cannot be indexed.
+		"""
+		if (pi := doc.get('pi')) is None or (ty := doc.get('ty')) is None or (ri := doc.get('ri')) is None:
+			return None
+		return (pi, (doc.get('ct', ''), ty, ri, doc.get('cs') or 0))
+
+
+	def add(self, docID:int, doc:JSON) -> None:
+		"""	Add a resource document to the index of its parent.
+		"""
+		if not (entry := self._entry(doc)):
+			return
+		pi, child = entry
+		self.children.setdefault(pi, {}).setdefault(child[1], ChildList()).add(child)
+		if child[3]:
+			sizes = self.sizes.setdefault(pi, {})
+			sizes[child[1]] = sizes.get(child[1], 0) + child[3]
+
+
+	def remove(self, docID:int, doc:JSON) -> None:
+		"""	Remove a resource document from the index of its parent.
+		"""
+		if not (entry := self._entry(doc)) or (types := self.children.get(entry[0])) is None:
+			return
+		pi, child = entry
+		if (children := types.get(child[1])) is None:
+			return
+		if children.remove(child):
+			if child[3]:
+				sizes = self.sizes[pi]
+				if (size := sizes[child[1]] - child[3]):
+					sizes[child[1]] = size
+				else:
+					del sizes[child[1]]
+					if not sizes:
+						del self.sizes[pi]
+			if not children:
+				del types[child[1]]
+				if not types:
+					del self.children[pi]
+
+
+	def update(self, docID:int, oldDoc:JSON, newDoc:JSON) -> None:
+		"""	Update the index for a changed resource document.
+		"""
+		if self._entry(oldDoc) != self._entry(newDoc):
+			self.remove(docID, oldDoc)
+			self.add(docID, newDoc)
+
+
+	def childRIs(self, pi:str, ty:int = None) -> list[str]:
+		"""	Return the resource IDs of the direct child resources of a resource, ordered by their creation time.
+
+			Args:
+				pi: Resource ID of the parent resource.
+				ty: Optional resource type to filter the child resources.
+			Return:
+				List of resource IDs, or an empty list.
+		"""
+		if not (types := self.children.get(pi)):
+			return []
+		if ty is not None:
+			return [ child[2] for child in types.get(ty, ()) ]
+		if len(types) == 1:
+			return [ child[2] for children in types.values() for child in children ]
+		return [ child[2] for child in heapq.merge(*types.values()) ]
+
+
+	def oldestLatestChildRI(self, pi:str, ty:int, oldest:bool = False) -> str:
+		"""	Return the resource ID of the oldest or latest direct child resource of a type.
+
+			Args:
+				pi: Resource ID of the parent resource.
+				ty: Resource type of the child resource.
+				oldest: If True then return the oldest child resource, otherwise the latest.
+			Return:
+				Resource ID, or None if the resource has no child resources of that type.
+		"""
+		if not (children := self.children.get(pi, {}).get(ty)):
+			return None
+		return children.first()[2] if oldest else children.last()[2]
+
+
+	def count(self, pi:str, ty:int = None) -> int:
+		"""	Return the number of direct child resources of a resource, optionally only of a certain type.
+		"""
+		if ty is None:
+			return sum(len(children) for children in self.children.get(pi, {}).values())
+		return len(self.children.get(pi, {}).get(ty, ()))
+
+
+	def countByType(self, pi:str) -> dict[int, int]:
+		"""	Return the number of direct child resources of a resource for each resource type.
+		"""
+		return { ty: len(children) for ty, children in self.children.get(pi, {}).items() }
+
+
+	def contentSize(self, pi:str, ty:int) -> int:
+		"""	Return the sum of the content sizes (*cs*) of the direct child resources of a type.
+		"""
+		return self.sizes.get(pi, {}).get(ty, 0)
+
+
+	def clear(self) -> None:
+		"""	Remove all entries from the index.
+		"""
+		self.children.clear()
+		self.sizes.clear()
+
+
+class TimestampIndex(object):
+	"""	In-memory index of a timestamp attribute of resources, e.g. the expiration timestamp *et*.
+
+		The index is a list of (timestamp, ri) tuples that is kept sorted, so that the resources with
+		a timestamp before or after a given timestamp are a contiguous range of the list. Timestamps
+		are compared as ISO 8601 strings. The index has the same maintenance interface as `DocumentIndex`.
+	"""
+
+	_maxString = '\U0010ffff'	# greater than every resource ID
+
+	def __init__(self, table:Table, attribute:str) -> None:
+		"""	Create and build a new timestamp index for a resource table.
+
+			Args:
+				table: The TinyDB table with the resources.
+				attribute: Name of the timestamp attribute.
+		"""
+		self.table = table
+		self.attribute = attribute
+		self.entries:list[Tuple[str, str]] = []		# sorted (timestamp, ri)
+		self.timestamps:dict[str, str] = {}			# ri -> timestamp
+		self.rebuild()
+
+
+	def rebuild(self) -> None:
+		"""	Clear the index and rebuild it from the current table content.
+		"""
+		self.clear()
+		for doc in self.table:
+			if (ts := doc.get(self.attribute)) and (ri := doc.get('ri')):
+				self.timestamps[ri] = ts
+		self.entries = sorted([ (ts, ri) for ri, ts in self.timestamps.items() ])
+
+
+	def add(self, docID:int, doc:JSON) -> None:
+		"""	Add the timestamp of a resource document to the index.
+		"""
+		if not (ts := doc.get(self.attribute)) or not (ri := doc.get('ri')):
+			return
+		self._remove(ri)
+		self.timestamps[ri] = ts
+		bisect.insort(self.entries, (ts, ri))
+
+
+	def remove(self, docID:int, doc:JSON) -> None:
+		"""	Remove the timestamp of a resource document from the index.
+		"""
+		if (ri := doc.get('ri')) is not None:
+			self._remove(ri)
+
+
+	def update(self, docID:int, oldDoc:JSON, newDoc:JSON) -> None:
+		"""	Update the index for a changed resource document.
+		"""
+		if oldDoc.get('ri') == newDoc.get('ri') and oldDoc.get(self.attribute) == newDoc.get(self.attribute):
+			return
+		self.remove(docID, oldDoc)
+		self.add(docID, newDoc)
+
+
+	def search(self, before:str = None, after:str = None) -> list[str]:
+		"""	Return the resource IDs of the resources with a timestamp before and/or after a timestamp, 
+			ordered by their timestamps.
+
+			Args:
+				before: Optional ISO 8601 timestamp. Only resources with an earlier timestamp are returned.
+				after: Optional ISO 8601 timestamp. Only resources with a later timestamp are returned.
+			Return:
+				List of resource IDs, or an empty list.
+		"""
+		start, end = self._range(before, after)
+		return [ entry[1] for entry in self.entries[start:end] ]
+
+
+	def count(self, before:str = None, after:str = None) -> int:
+		"""	Return the number of resources with a timestamp before and/or after a timestamp.
+			See `search()` for the arguments.
+		"""
+		start, end = self._range(before, after)
+		return max(end - start, 0)
+
+
+	def first(self) -> str:
+		"""	Return the earliest timestamp in the index, or None if the index is empty.
+		"""
+		return self.entries[0][0] if self.entries else None
+
+
+	def clear(self) -> None:
+		"""	Remove all entries from the index.
+		"""
+		self.entries.clear()
+		self.timestamps.clear()
+
+
+	def _range(self, before:str, after:str) -> Tuple[int, int]:
+		start = bisect.bisect_right(self.entries, (after, self._maxString)) if after else 0
+		end = bisect.bisect_left(self.entries, (before, )) if before else len(self.entries)
+		return start, end
+
+
+	def _remove(self, ri:str) -> None:
+		if (ts := self.timestamps.pop(ri, None)) is None:
+			return
+		i = bisect.bisect_left(self.entries, (ts, ri))
+		if i < len(self.entries) and self.entries[i] == (ts, ri):
+			del self.entries[i]
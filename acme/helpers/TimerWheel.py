@@ -0,0 +1,114 @@
+#
+#	TimerWheel.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	A hashed timer wheel for many timers that are driven by a single periodic caller
+#
+
+from __future__ import annotations
+import math, time
+from threading import Lock
+from typing import Any, Hashable
+
+
+class TimerWheel(object):
+	"""	Hashed timer wheel.
+
+		Timers are identified by a key and are sorted into *slots* that each cover *resolution*
+		seconds. Timers that are further in the future than one revolution of the wheel stay
+		in their slot until their tick is reached. A single periodic caller advances the wheel
+		and gets the keys of all timers that became due, instead of running a timer for each key.
+	"""
+
+	def __init__(self, resolution:float = 0.1, slots:int = 1024) -> None:
+		"""	Create a new timer wheel.
+
+			Args:
+				resolution: Duration of a single tick in seconds.
+				slots: Number of slots of the wheel.
+		"""
+		self.resolution = resolution
+		self.slots = slots
+		self.wheel:list[dict[Hashable, int]] = [ {} for _ in range(slots) ]	# slot -> key -> tick
+		self.timers:dict[Hashable, int] = {}									# key -> tick
+		self.currentTick = self._tick(time.monotonic())							# last processed tick
+		self.lock = Lock()
+
+
+	def _tick(self, timestamp:float) -> int:
+		return int(timestamp / self.resolution)
+
+
+	def add(self, key:Hashable, delay:float) -> bool:
+		"""	Add a timer. An already running timer for the same key is not changed.
+
+			Args:
+				key: Key of the timer.
+				delay: Delay in seconds after which the timer becomes due.
+			Return:
+				True if the timer was added, False if a timer for the key is already running.
+		"""
+		with self.lock:
+			if key in self.timers:
+				return False
+			# A timer is due earliest with the next tick
+			tick = max(math.ceil((time.monotonic() + delay) / self.resolution), self.currentTick + 1)
+			self.timers[key] = tick
+			self.wheel[tick % self.slots][key] = tick
+			return True
+
+
+	def cancel(self, key:Hashable) -> bool:
+		"""	Cancel a timer.
+
+			Args:
+				key: Key of the timer.
+			Return:
+				True if the timer was cancelled, False if there was no timer for the key.
+		"""
+		with self.lock:
+			if (tick := self.timers.pop(key, None)) is None:
+				return False
+			del self.wheel[tick % self.slots][key]
+			return True
+
+
+	def advance(self) -> list[Any]:
+		"""	Advance the wheel to the current time and remove all timers that became due.
+
+			Return:
+				List of the keys of the due timers.
+		"""
+		result:list[Any] = []
+		with self.lock:
+			nowTick = self._tick(time.monotonic())
+			# After a long pause every slot is visited only once
+			for tick in range(self.currentTick + 1, min(nowTick, self.currentTick + self.slots) + 1):
+				if not (slot := self.wheel[tick % self.slots]):
+					continue
+				for key, keyTick in list(slot.items()):
+					if keyTick <= nowTick:
+						del slot[key]
+						del self.timers[key]
+						result.append(key)
+			self.currentTick = max(nowTick, self.currentTick)
+		return result
+
+
+	def clear(self) -> None:
+		"""	Remove all timers.
+		"""
+		with self.lock:
+			for slot in self.wheel:
+				slot.clear()
+			self.timers.clear()
+
+
+	def __len__(self) -> int:
+		return len(self.timers)
+
+
+	def __contains__(self, key:Hashable) -> bool:
+		return key in self.timers
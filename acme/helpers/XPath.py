@@ -0,0 +1,169 @@
+#
+#	XPath.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Compiled paths for structured keys in dictionaries, e.g. "m2m:cin/lbl/{0}"
+#
+
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Tuple
+import re
+
+decimalMatch = re.compile(r'{(\d+)}')
+
+xPathCacheSize = 1024
+"""	Maximum number of compiled paths that are kept in the LRU cache. """
+
+# Kinds of path elements
+_KEY 	= 0		# a key in a dictionary
+_INDEX	= 1		# {n} : n-th element in a list or dictionary
+_ALL	= 2		# {} : all elements in a list or dictionary
+_FIRST	= 3		# {_} : the first element in a dictionary
+_EMPTY	= 4		# an empty path element
+
+PathElement = Tuple[int, Any]
+"""	A compiled path element. (kind, key or index) """
+
+
+class XPath(object):
+	"""	A compiled structured key. The path string is split and parsed only once,
+		so that a lookup is only a walk over a tuple of path elements.
+
+		See `etc.Utils.findXPath()` for the supported path syntax.
+	"""
+
+	__slots__ = ( 'path', 'elements', 'keys', 'isSimple' )
+
+	def __init__(self, path:str) -> None:
+		"""	Compile a path.
+
+			Args:
+				path: The structured key, with path elements separated by "/".
+		"""
+		self.path = path
+		"""	The original path string. """
+		self.keys:Tuple[str, ...] = tuple(path.split('/'))
+		"""	The plain path elements, e.g. for setting a value. """
+		self.elements:Tuple[PathElement, ...] = tuple(self._compileElement(each) for each in self.keys)
+		"""	The compiled path elements. """
+		self.isSimple = all(kind == _KEY for kind, _ in self.elements)
+		"""	True if the path only consists of dictionary keys. """
+
+
+	@staticmethod
+	def _compileElement(pathElement:str) -> PathElement:
+		if len(pathElement) == 0:
+			return (_EMPTY, None)
+		if (m := decimalMatch.search(pathElement)) is not None:
+			return (_INDEX, int(m.group(1)))
+		if pathElement == '{}':
+			return (_ALL, None)
+		if pathElement == '{_}':
+			return (_FIRST, None)
+		return (_KEY, pathElement)
+
+
+	def find(self, dct:Any, default:Any = None, start:int = 0) -> Any:
+		"""	Find the value for this path in a dictionary.
+
+			Args:
+				dct: The dictionary to search.
+				default: Value that is returned when the path cannot be found.
+				start: Index of the first path element to use.
+			Return:
+				The found value, or `default`.
+		"""
+		data:Any = dct
+		if self.isSimple:	# Fast path for paths with only dictionary keys
+			for pathElement in self.keys[start:]:
+				if not data or pathElement not in data:
+					return default
+				data = data[pathElement]
+			return data
+
+		elements = self.elements
+		last = len(elements) - 1
+		for i in range(start, last + 1):
+			if not data:
+				return default
+			kind, pathElement = elements[i]
+			if kind == _KEY:
+				if pathElement not in data:	# if key not in dict
+					return default
+				data = data[pathElement]	# found data for the next level down
+
+			elif kind == _INDEX:	# Match array index {i}
+				if not isinstance(data, (list,dict)) or pathElement >= len(data):	# Check idx within range of list
+					return default
+				if isinstance(data, dict):
+					data = data[list(data)[i - start]]
+				else:
+					data = data[pathElement]
+
+			elif kind == _ALL:	# Match an array in general
+				if not isinstance(data, (list,dict)):	# not a list, return the default
+					return default
+				if i == last:	# if this is the last element and it is a list then return the data
+					return data
+				return [ self._findRemainder(d, default, i + 1) for d in data ]	# recursively build an array with the remainder of the selector
+
+			elif kind == _FIRST:
+				if isinstance(data, dict):
+					if keys := list(data.keys()):
+						data = data[keys[0]]
+					else:
+						return default
+				else:
+					return default
+
+			else:	# return if there is an empty path element
+				return default
+		return data
+
+
+	def _findRemainder(self, dct:Any, default:Any, start:int) -> Any:
+		"""	Find the remainder of the path, starting with the path element `start`, in `dct`.
+			The remainder is treated like a new path, so a direct key match is checked first.
+		"""
+		if not dct:
+			return default
+		if isinstance(dct, dict) and (remainder := '/'.join(self.keys[start:])) and remainder in dct:
+			return dct[remainder]
+		return self.find(dct, default, start)
+
+
+	def set(self, dct:Any, value:Any, overwrite:bool = True) -> bool:
+		"""	Set a value for this path in a dictionary. Create intermediate dictionaries if necessary.
+
+			Args:
+				dct: The dictionary to update.
+				value: The value to set.
+				overwrite: If False then an existing value is not overwritten.
+			Return:
+				Always True.
+		"""
+		keys = self.keys
+		data = dct
+		for i in range(0, len(keys) - 1):
+			if (_p := keys[i]) not in data:
+				data[_p] = {}
+			data = data[_p]
+		if not overwrite and (_p := keys[-1]) in data: # test overwrite first, it's faster
+			return True # don't overwrite
+		data[keys[-1]] = value
+		return True
+
+
+@lru_cache(maxsize = xPathCacheSize)
+def compileXPath(path:str) -> XPath:
+	"""	Return the compiled path for a structured key. Compiled paths are kept in an LRU cache.
+
+		Args:
+			path: The structured key.
+		Return:
+			XPath object.
+	"""
+	return XPath(path)
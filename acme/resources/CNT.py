@@ -8,7 +8,6 @@
 #
 
 from __future__ import annotations
-from typing import List
 from ..etc.Types import AttributePolicyDict, ResourceTypes as T, Result, ResponseStatusCode as RC, JSON
 from ..etc import Utils, DateUtils
 from ..services import CSE as CSE
@@ -141,15 +140,18 @@ class CNT(AnnounceableResource):
 					childResource.setAttribute('et', maxEt)
 					childResource.dbUpdate()
 
-			self.validate(originator)
+			# Update cni and cbs, and remove old <cin> if necessary
+			self._updateInstances()
 
 
 	# Handle the removal of a CIN. 
 	def childRemoved(self, childResource:Resource, originator:str) -> None:
 		if L.isDebug: L.logDebug(f'Child resource removed: {childResource.ri}')
 		super().childRemoved(childResource, originator)
-		if childResource.ty == T.CIN:	# Validate if child was CIN
-			self._validateChildren()
+		# Update cni and cbs if child was CIN.
+		# Only count the CIN when it is actually removed, because childRemoved() may be called before the deletion as well.
+		if childResource.ty == T.CIN and not CSE.storage.hasResource(childResource.ri):
+			self._updateInstances()
 
 
 	# Validating the Container. This means recalculating cni, cbs as well as
@@ -162,56 +164,50 @@ class CNT(AnnounceableResource):
 
 
 	# TODO Align this and FCNT implementations
-	# TODO use raw for TS and TCNT
 	
 	def _validateChildren(self) -> None:
-		""" Internal validation and checks. This called more often then just from
-			the validate() method.
+		""" Recalculate *cni* and *cbs* and remove the oldest <cin> when the limits are met. 
+			This is done when the container is validated, ie. when it is created or updated.
 		"""
 		# Check whether we already are in validation the children (ie prevent unfortunate recursion by the Dispatcher)
 		if self.__validating:
 			return
 		self.__validating = True
-
-		# Only get the CINs in raw format. Instantiate them as resources if needed
-		cinsRaw = cast(List[JSON], sorted(CSE.storage.directChildResources(self.ri, T.CIN, raw = True), key = lambda x: x['ct']))
-		cni = len(cinsRaw)			
-			
-		# Check number of instances
-		if (mni := self.mni) is not None:
-			while cni > mni and cni > 0:
-				# Only instantiate the <cin> when needed here for deletion
-				cin = Factory.resourceFromDict(cinsRaw[0]).resource
-				L.isDebug and L.logDebug(f'cni > mni: Removing <cin>: {cin.ri}')
-				# remove oldest
-				# Deleting a child must not cause a notification for 'deleteDirectChild'.
-				# Don't do a delete check means that CNT.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
-				CSE.dispatcher.deleteResource(cin, parentResource = self, doDeleteCheck = False)
-				del cinsRaw[0]	# Remove from list
-				cni -= 1	# decrement cni when deleting a <cin>
-
-		# Calculate cbs of remaining cins
-		cbs = sum([ each['cs'] for each in cinsRaw])
-
-		# check size
-		if (mbs := self.mbs) is not None:
-			while cbs > mbs and cbs > 0:
-				# Only instantiate the <cin> when needed here for deletion
-				cin = Factory.resourceFromDict(cinsRaw[0]).resource
-				L.isDebug and L.logDebug(f'cbs > mbs: Removing <cin>: {cin.ri}')
-				# remove oldest
-				cbs -= cin.cs
-				# Deleting a child must not cause a notification for 'deleteDirectChild'.
-				# Don't do a delete check means that CNT.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
-				CSE.dispatcher.deleteResource(cin, parentResource = self, doDeleteCheck = False)
-				del cinsRaw[0]	# Remove from list
-				cni -= 1	# decrement cni when deleting a <cin>
-
-		# Some attributes may have been updated, so store the resource 
-		self['cni'] = cni
-		self['cbs'] = cbs
-		self.dbUpdate()
-	
+		self._updateInstances()
 		# End validating
 		self.__validating = False
 
+
+	def _updateInstances(self) -> None:
+		"""	Set *cni* and *cbs* from the storage's child index, remove the oldest <cin> 
+			when *mni* or *mbs* are exceeded, and update the resource in the database.
+
+			This is done under the resource's lock and the values are always taken from
+			the storage, not from this (possibly outdated) copy of the resource. Otherwise
+			<cin> that are added or removed concurrently would not be counted correctly.
+		"""
+		with CSE.storage.resourceLock(self.ri):
+			self._removeOldestInstances()
+			self.dbUpdate()
+
+
+	def _removeOldestInstances(self) -> None:
+		"""	Remove the oldest <cin> as long as *cni* or *cbs* exceed *mni* or *mbs*, 
+			and set *cni* and *cbs* accordingly. The resource is not updated in the database.
+		"""
+		mni = self.mni
+		mbs = self.mbs
+		while True:
+			cni, cbs = CSE.storage.countDirectChildResourcesAndSizes(self.ri, T.CIN)
+			if not ((mni is not None and cni > mni) or (mbs is not None and cbs > mbs)):
+				break
+			# Only the oldest <cin> is instantiated, directly from the storage's child index
+			if not (cin := CSE.storage.latestOldestChildResource(self.ri, T.CIN, oldest = True)):
+				break
+			L.isDebug and L.logDebug(f'cni > mni or cbs > mbs: Removing <cin>: {cin.ri}')
+			# remove oldest
+			# Deleting a child must not cause a notification for 'deleteDirectChild'.
+			# Don't do a delete check means that CNT.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
+			CSE.dispatcher.deleteResource(cin, parentResource = self, doDeleteCheck = False)
+		self.setAttribute('cni', cni)
+		self.setAttribute('cbs', cbs)
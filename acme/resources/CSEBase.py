@@ -22,6 +22,7 @@ class CSEBase(AnnounceableResource):
 
 	# Specify the allowed child-resource types
 	_allowedChildResourceTypes = [ T.ACP, T.ACTR, T.AE, T.CSR, T.CNT, T.FCNT, T.GRP, T.NOD, T.REQ, T.SUB, T.TS, T.TSB, T.CSEBaseAnnc ]
+	_cacheRepresentation = False	# *ctm* is set for every RETRIEVE request
 
 	# Attributes and Attribute policies for this Resource Class
 	# Assigned during startup in the Importer
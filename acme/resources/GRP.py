@@ -82,6 +82,11 @@ class GRP(AnnounceableResource):
 		return Result.successResult()
 
 
+	def deactivate(self, originator:str) -> None:
+		super().deactivate(originator)
+		CSE.group.unindexGroupMembers(self)
+
+
 	def validate(self, originator:str = None, create:bool = False, dct:JSON = None, parentResource:Resource = None) -> Result:
 		if not (res := super().validate(originator, create, dct, parentResource)).status:
 			return res
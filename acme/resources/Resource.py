@@ -27,6 +27,150 @@ from .Resource import *
 
 
 
+class ResourceAttributes(dict):
+	"""	Copy-on-write dictionary for the attributes of a resource.
+
+		The dictionary is a shallow copy of the attributes it is created from. List and dictionary
+		values are shared with the source until they are accessed with the *[]* operator or `get()`, 
+		which is how the resource attributes are accessed and changed in place. Only then the value 
+		is copied. Changed attributes are tracked, so that the changes since the last `checkpoint()`
+		can be determined without comparing all attributes.
+
+		`items()`, `values()` and iterating over the dictionary don't copy the values. Values that are
+		read this way must not be changed in place.
+	"""
+
+	__slots__ = ( 'shared', 'dirty', 'base' )
+
+	def __init__(self, attributes:JSON = None) -> None:
+		"""	Create a new attribute dictionary.
+
+			Args:
+				attributes: Optional attributes. List and dictionary values are shared until accessed.
+		"""
+		super().__init__(attributes or {})
+		self.checkpoint()
+
+
+	def checkpoint(self) -> None:
+		"""	Start tracking the changes from the current state of the attributes.
+		"""
+		self.base = dict(self)
+		"""	Shallow copy of the attributes at the last checkpoint. """
+		self.dirty:set[str] = set()
+		"""	Names of the attributes that were set, deleted or accessed for a change in place since the last checkpoint. """
+		self._share()
+
+
+	def snapshot(self) -> JSON:
+		"""	Return a shallow copy of the attributes, e.g. to store them. Values that are changed 
+			in place afterwards are copied first, so the snapshot is not affected.
+
+			Return:
+				Dictionary with the attributes.
+		"""
+		self._share()
+		return dict(self)
+
+
+	def copy(self) -> ResourceAttributes:	# type: ignore[override]
+		"""	Return a copy-on-write copy of the attributes.
+
+			Return:
+				New attribute dictionary. 
+		"""
+		self._share()
+		return ResourceAttributes(self)
+
+
+	def diff(self, modifiers:JSON = None) -> JSON:
+		"""	Return the attributes that were changed since the last checkpoint, in the same way as
+			`etc.Utils.resourceDiff()` compares the old and new attributes. Changes of internal attributes are 
+			ignored, but removed internal attributes are included, too.
+
+			Args:
+				modifiers: Optional attributes that let to the change. They are included even if their values didn't change.
+			Return:
+				Dictionary with the changed attributes. Removed attributes are *None*.
+		"""
+		candidates = self.dirty.union(modifiers) if modifiers else self.dirty
+		res = {}
+		for k, v in dict.items(self):
+			if k not in candidates or k.startswith('__'):	# ignore all internal attributes
+				continue
+			if k not in self.base or v != self.base[k] or (modifiers and k in modifiers):
+				res[k] = v
+		for k in self.base:
+			if k in candidates and not dict.__contains__(self, k):
+				res[k] = None
+		return res
+
+
+	def _share(self) -> None:
+		self.shared = { k for k, v in dict.items(self) if isinstance(v, (list, dict)) }
+
+
+	def __getitem__(self, key:str) -> Any:
+		if key in self.shared:
+			self.shared.discard(key)
+			self.dirty.add(key)		# It might be changed in place
+			value = deepcopy(dict.__getitem__(self, key))
+			dict.__setitem__(self, key, value)
+			return value
+		return dict.__getitem__(self, key)
+
+
+	def get(self, key:str, default:Any = None) -> Any:	# type: ignore[override]
+		return self[key] if dict.__contains__(self, key) else default
+
+
+	def __setitem__(self, key:str, value:Any) -> None:
+		self.shared.discard(key)
+		self.dirty.add(key)
+		dict.__setitem__(self, key, value)
+
+
+	def __delitem__(self, key:str) -> None:
+		self.shared.discard(key)
+		self.dirty.add(key)
+		dict.__delitem__(self, key)
+
+
+	def pop(self, key:str, *default:Any) -> Any:	# type: ignore[override]
+		if dict.__contains__(self, key):
+			value = self[key]
+			del self[key]
+			return value
+		return dict.pop(self, key, *default)
+
+
+	def setdefault(self, key:str, default:Any = None) -> Any:	# type: ignore[override]
+		if not dict.__contains__(self, key):
+			self[key] = default
+		return self[key]
+
+
+	def update(self, *args:Any, **kwargs:Any) -> None:	# type: ignore[override]
+		for k, v in dict(*args, **kwargs).items():
+			self[k] = v
+
+
+	def clear(self) -> None:
+		self.dirty.update(dict.keys(self))
+		self.shared.clear()
+		dict.clear(self)
+
+
+	def popitem(self) -> Tuple[str, Any]:
+		if not dict.__len__(self):
+			raise KeyError('popitem(): dictionary is empty')
+		key = next(reversed(dict.keys(self)))
+		return key, self.pop(key)
+
+
+	def __deepcopy__(self, memo:dict) -> JSON:
+		return { k: deepcopy(v, memo) for k, v in dict.items(self) }
+
 
 class Resource(object):
 	""" Base class for all oneM2M resource types """
@@ -46,6 +190,10 @@ class Resource(object):
 	_excludeFromUpdate = [ 'ri', 'ty', 'pi', 'ct', 'lt', 'st', 'rn', 'mgd' ]
 	"""	Resource attributes that are excluded when updating the resource """
 
+	_cacheRepresentation = True
+	"""	Indicator whether the serialized representation of the resource may be cached for RETRIEVE responses. This must be
+		*False* for resource types that set attributes for a RETRIEVE request without updating the resource. """
+
 	# ATTN: There is a similar definition in FCNT, TSB, and others! Don't Forget to add attributes there as well
 	internalAttributes	= [ _rtype, _srn, _node, _createdInternally, _imported, 
 							_isInstantiated, _originator, _announcedTo, _modified, _remoteID ]
@@ -79,12 +227,15 @@ class Resource(object):
 		"""	Flag set during creation of a resource instance whether a resource type allows only read-only access to a resource. """
 		self.inheritACP	= inheritACP
 		"""	Flag set during creation of a resource instance whether a resource type inherits the `resources.ACP.ACP` from its parent resource. """
-		self.dict 		= {}
-		"""	Dictionary for public and internal resource attributes. """
+		self.dict 		= ResourceAttributes()
+		"""	Copy-on-write dictionary for public and internal resource attributes. """
 		self.isImported	= False
 		"""	Flag set during creation of a resource instance whether a resource is imported, which disables some validation checks. """
+		self.serializationInvalidations:int = None
+		"""	The storage's serialization cache invalidation counter when the resource was retrieved from the storage. 
+			The serialized representation of the resource is only cached when this is set (see `Storage.serializeResource()`). """
 		self._originalDict = {}
-		"""	When retrieved from the database: Holds a temporary version of the resource attributes as they were read from the database. """
+		"""	When created: Holds a temporary copy of the resource attributes as they were given for the validation in `activate()`. """
 
 		# For some types the tpe/root is empty and will be set later in this method
 		if ty not in [ T.FCNT, T.FCI ]: 	
@@ -92,10 +243,13 @@ class Resource(object):
 
 		if dct is not None: 
 			self.isImported = dct.get(self._imported)	# might be None, or boolean
-			self.dict = deepcopy(dct.get(self.tpe))
+			self.dict = ResourceAttributes(dct.get(self.tpe))
 			if not self.dict:
-				self.dict = deepcopy(dct)
-			self._originalDict = deepcopy(dct)	# keep for validation in activate() later
+				self.dict = ResourceAttributes(dct)
+			# keep a copy for validation in activate() later. Attributes that were read from the database 
+			# already contain the internal resource type. They are not validated again and are not copied.
+			if self._rtype not in self.dict:
+				self._originalDict = deepcopy(dct)
 		else:
 			# no Dict, so the resource is instantiated programmatically
 			self.setAttribute(self._isInstantiated, True)
@@ -140,7 +294,7 @@ class Resource(object):
 
 			# Remove empty / null attributes from dict
 			# But see also the comment in update() !!!
-			self.dict = Utils.removeNoneValuesFromDict(self.dict, ['cr'])	# allow the ct attribute to stay in the dictionary. It will be handled with in the RegistrationManager
+			self.dict = ResourceAttributes(Utils.removeNoneValuesFromDict(self.dict, ['cr']))	# allow the ct attribute to stay in the dictionary. It will be handled with in the RegistrationManager
 
 			self[self._rtype] = self.tpe
 			self.setAttribute(self._announcedTo, [], overwrite = False)
@@ -155,8 +309,10 @@ class Resource(object):
 				update: Optional indicator whether only the updated attributes shall be included in the result.
 				noACP: Optional indicator whether the *acpi* attribute shall be included in the result.
 		"""
-		# remove (from a copy) all internal attributes before printing
-		dct = { k:deepcopy(v) for k,v in self.dict.items() 				# Copy k:v to the new dictionary, ...
+		# remove (from a copy) all internal attributes before printing. Only lists and dictionaries need to be copied
+		dct = { k:deepcopy(v) if isinstance(v, (list, dict)) else v		# Copy k:v to the new dictionary, ...
+					for k,v in dict.items(self.dict) 
+
 					if k not in self.internalAttributes 				# if k is not in internal attributes (starting with __), AND
 					and not (noACP and k == 'acpi')						# if not noACP is True and k is 'acpi', AND
 					and not (update and k in self._excludeFromUpdate) 	# if not update is True and k is in _excludeFromUpdate)
@@ -188,6 +344,7 @@ class Resource(object):
 		if not self[self._isInstantiated] and not self.isVirtual() :
 			if not (res := CSE.validator.validateAttributes(self._originalDict, self.tpe, self.ty, self._attributes, isImported = self.isImported, createdInternally = self.isCreatedInternally(), isAnnounced = self.isAnnounced())).status:
 				return res
+		self._originalDict = {}	# not needed anymore
 
 		# validate the resource logic
 		if not (res := self.validate(originator, create = True, parentResource = parentResource)).status:
@@ -247,7 +404,7 @@ class Resource(object):
 			Return:
 				Result object indicating success or failure.
 		"""
-		dictOrg = deepcopy(self.dict)	# Save for later for notification
+		self.dict.checkpoint()	# Track the changes for notification
 
 		updatedAttributes = None
 		if dct:
@@ -308,7 +465,7 @@ class Resource(object):
 			return res
 
 		# store last modified attributes
-		self[self._modified] = Utils.resourceDiff(dictOrg, self.dict, updatedAttributes)
+		self[self._modified] = self.dict.diff(updatedAttributes)
 
 		# Check subscriptions
 		CSE.notification.checkSubscriptions(self, NotificationEventType.resourceUpdate, modifiedAttributes = self[self._modified])
@@ -820,7 +977,7 @@ class Resource(object):
 				Result object indicating success or failure. The resource is returned as well in the *Result.resource* attribute.		
 		 """
 		if (res := CSE.storage.retrieveResource(ri = self.ri)).status:
-			self.dict = res.resource.dict
+			self.dict = res.resource.dict.copy()
 		return res
 
 	#########################################################################
@@ -235,7 +235,8 @@ class TS(AnnounceableResource):
 					childResource.setAttribute('et', maxEt)
 					childResource.dbUpdate()
 
-			self.validate(originator)	# Handle old TSI removals
+			# Update cni and cbs, and remove old TSI if necessary
+			self._updateInstances()
 		
 			# Add to monitoring if this is enabled for this TS (mdd & pei & mdt are not None, and mdd==True)
 			if self.mdd and self.pei is not None and self.mdt is not None:
@@ -250,8 +251,11 @@ class TS(AnnounceableResource):
 	def childRemoved(self, childResource:Resource, originator:str) -> None:
 		L.isDebug and L.logDebug(f'Child resource removed: {childResource.ri}')
 		super().childRemoved(childResource, originator)
-		if childResource.ty == T.TSI:	# Validate if child was TSI
-			self._validateChildren()
+		# Update cni and cbs if child was TSI.
+		# Only count the TSI when it is actually removed, because childRemoved() may be called before the deletion as well.
+		if childResource.ty == T.TSI:
+			if not CSE.storage.hasResource(childResource.ri):
+				self._updateInstances()
 		elif childResource.ty == T.SUB:
 			if childResource['enc/md']:
 				CSE.timeSeries.removeSubscription(self, childResource)
@@ -265,53 +269,53 @@ class TS(AnnounceableResource):
 
 
 	def _validateChildren(self) -> None:
-		""" Internal validation and checks. This called more often then just from
-			the validate() method.
+		""" Recalculate *cni* and *cbs* and remove the oldest <tsi> when the limits are met. 
+			This is done when the timeSeries is validated, ie. when it is created or updated.
 		"""
 		# Check whether we already are in validation the children (ie prevent unfortunate recursion by the Dispatcher)
 		if self.__validating:
 			return
 		self.__validating = True
-
-		# TODO Optimize: Do we really need the resources?
-		tsis = self.timeSeriesInstances()	# retrieve TIS child resources
-		cni = len(tsis)			
-			
-		# Check number of instances
-		if (mni := self.mni) is not None:	# mni is an int
-			while cni > mni and cni > 0:
-				L.isDebug and L.logDebug(f'cni > mni: Removing <tsi>: {tsis[0].ri}')
-				# remove oldest
-				# Deleting a child must not cause a notification for 'deleteDirectChild'.
-				# Don't do a delete check means that TS.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
-				CSE.dispatcher.deleteResource(tsis[0], parentResource = self, doDeleteCheck = False)
-				del tsis[0]
-				cni -= 1	# decrement cni when deleting a <cin>
-
-		# Calculate cbs
-		cbs = sum([ each.cs for each in tsis])
-
-		# check size
-		if (mbs := self.mbs) is not None:
-			while cbs > mbs and cbs > 0:
-				L.isDebug and L.logDebug(f'cbs > mbs: Removing <tsi>: {tsis[0].ri}')
-				# remove oldest
-				cbs -= tsis[0]['cs']
-				# Deleting a child must not cause a notification for 'deleteDirectChild'.
-				# Don't do a delete check means that TS.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
-				CSE.dispatcher.deleteResource(tsis[0], parentResource = self, doDeleteCheck = False)
-				del tsis[0]
-				cni -= 1	# decrement cni when deleting a <tsi>
-
-		# Some attributes may have been updated, so store the resource 
-		self['cni'] = cni
-		self['cbs'] = cbs
-		self.dbUpdate()
-	
+		self._updateInstances()
 		# End validating
 		self.__validating = False
 
 
+	def _updateInstances(self) -> None:
+		"""	Set *cni* and *cbs* from the storage's child index, remove the oldest <tsi> 
+			when *mni* or *mbs* are exceeded, and update the resource in the database.
+
+			This is done under the resource's lock and the values are always taken from
+			the storage, not from this (possibly outdated) copy of the resource. Otherwise
+			<tsi> that are added or removed concurrently would not be counted correctly.
+		"""
+		with CSE.storage.resourceLock(self.ri):
+			self._removeOldestInstances()
+			self.dbUpdate()
+
+
+	def _removeOldestInstances(self) -> None:
+		"""	Remove the oldest <tsi> as long as *cni* or *cbs* exceed *mni* or *mbs*, 
+			and set *cni* and *cbs* accordingly. The resource is not updated in the database.
+		"""
+		mni = self.mni
+		mbs = self.mbs
+		while True:
+			cni, cbs = CSE.storage.countDirectChildResourcesAndSizes(self.ri, T.TSI)
+			if not ((mni is not None and cni > mni) or (mbs is not None and cbs > mbs)):
+				break
+			# Only the oldest <tsi> is instantiated, directly from the storage's child index
+			if not (tsi := CSE.storage.latestOldestChildResource(self.ri, T.TSI, oldest = True)):
+				break
+			L.isDebug and L.logDebug(f'cni > mni or cbs > mbs: Removing <tsi>: {tsi.ri}')
+			# remove oldest
+			# Deleting a child must not cause a notification for 'deleteDirectChild'.
+			# Don't do a delete check means that TS.childRemoved() is not called, where subscriptions for 'deleteDirectChild'  is tested.
+			CSE.dispatcher.deleteResource(tsi, parentResource = self, doDeleteCheck = False)
+		self.setAttribute('cni', cni)
+		self.setAttribute('cbs', cbs)
+
+
 	def _validateDataDetect(self, updatedAttributes:JSON = None) -> None:
 		"""	This method checks and enables or disables certain data detect monitoring attributes.
 		"""
@@ -9,7 +9,7 @@
 
 from __future__ import annotations
 import time
-from typing import Optional, Tuple, List, cast
+from typing import Optional, Tuple, cast
 from ..etc import Utils
 from ..etc import RequestUtils
 from ..etc.Types import DesiredIdentifierResultType, ResourceTypes as T, ResponseStatusCode as RC, JSON, Result, ResultContentType
@@ -423,19 +423,10 @@ class AnnouncementManager(object):
 
 	def searchAnnounceableResourcesForCSI(self, csi:str, isAnnounced:bool) -> list[AnnounceableResource]:
 		""" Search and retrieve all resources that have the provided CSI in their 
-			'at' attribute. Also, distinguish between announced and not announced resources in the filter.
+			'at' attribute. Also, distinguish between announced and not announced resources.
+			The resources are looked up in the storage's announcement index.
 		"""
-
-		mcsi = f'{csi}/'
-		def _announcedFilter(r:JSON) -> bool:
-			if (at := r.get('at')) and len(list(filter(lambda x: x.startswith(mcsi), at))) > 0:	# check whether any entry in 'at' startswith mcsi
-				if ato := r.get(Resource._announcedTo):
-					for i in ato:
-						if csi == i[0]:	# 0=remote csi,
-							return isAnnounced
-					return not isAnnounced
-			return False
-
-		return cast(List[AnnounceableResource], CSE.storage.searchByFilter(_announcedFilter))
+		return [ cast(AnnounceableResource, resource)	for ri in CSE.storage.searchAnnounceableResourceIDs(csi, isAnnounced)
+														if (resource := CSE.storage.retrieveResource(ri = ri).resource) ]
 
 
@@ -134,6 +134,10 @@ def startup(args:argparse.Namespace, **kwargs: Dict[str, Any]) -> bool:
 	L.log(f'CSE-Type: {cseType.name}')
 	L.log(Configuration.print())
 	L.queueOff()				# No queuing of log messages during startup
+
+	# Select the generator for resource and request identifiers
+	from ..etc.Utils import setIDGenerator, seedIDGenerator
+	setIDGenerator(Configuration.get('cse.idGenerator'), cseCsi)
 	
 	# set the logger for the backgroundWorkers. Add an offset to compensate for
 	# this and other redirect functions to determine the correct file / linenumber
@@ -146,6 +150,7 @@ def startup(args:argparse.Namespace, **kwargs: Dict[str, Any]) -> bool:
 	console = Console()						# Start the console
 
 	storage = Storage()						# Initiatlize the resource storage
+	seedIDGenerator(storage.identifierRegistry.identifiers)	# Continue after the stored resource IDs
 	statistics = Statistics()				# Initialize the statistics system
 	registration = RegistrationManager()	# Initialize the registration manager
 	validator = Validator()					# Initialize the resource validator
@@ -218,7 +223,8 @@ def _shutdown() -> None:
 	"""
 	global cseStatus
 
-	if cseStatus != CSEStatus.RUNNING:
+	# The status is already STOPPING when the shutdown was requested via shutdown()
+	if cseStatus not in [ CSEStatus.RUNNING, CSEStatus.STOPPING ]:
 		return
 		
 	cseStatus = CSEStatus.STOPPING
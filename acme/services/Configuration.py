@@ -135,6 +135,7 @@ class Configuration(object):
 				'cse.supportedReleaseVersions'			: config.getlist('cse', 'supportedReleaseVersions',					fallback = ['2a', '3', '4']), # type: ignore [attr-defined]
 				'cse.releaseVersion'					: config.get('cse', 'releaseVersion',								fallback = '3'),
 				'cse.defaultSerialization'				: config.get('cse', 'defaultSerialization',							fallback = 'json'),
+				'cse.idGenerator'						: config.get('cse', 'idGenerator',									fallback = 'timeOrdered'),
 
 				#
 				#	CSE Security
@@ -200,10 +201,18 @@ class Configuration(object):
 				#	Database
 				#
 
+				'db.type'								: config.get('database', 'type', 									fallback = 'tinydb'),
 				'db.path'								: config.get('database', 'path', 									fallback = './data'),
 				'db.inMemory'							: config.getboolean('database', 'inMemory', 						fallback = False),
 				'db.cacheSize'							: config.getint('database', 'cacheSize', 							fallback = 0),		# Default: no caching
+				'db.resourceCacheSize'					: config.getint('database', 'resourceCacheSize',					fallback = 1000),
+				'db.serializationCacheSize'				: config.getint('database', 'serializationCacheSize',				fallback = 1000),
 				'db.resetOnStartup' 					: config.getboolean('database', 'resetOnStartup',					fallback = False),
+				'db.columnStore'						: config.getboolean('database', 'columnStore',						fallback = True),
+				'db.fragmentIndexes'					: config.getlist('database', 'fragmentIndexes',						fallback = []),	# type: ignore [attr-defined]
+				'db.compactionThreshold'				: config.getint('database', 'compactionThreshold',					fallback = 10000),
+				'db.groupCommitInterval'				: config.getint('database', 'groupCommitInterval',					fallback = 0),		# Default: no group commits
+				'db.groupCommitOperations'				: config.getint('database', 'groupCommitOperations',				fallback = 1000),
 
 				#
 				#	Logging
@@ -285,6 +294,8 @@ class Configuration(object):
 				#
 
 				'cse.sub.dur'							: config.getint('cse.resource.sub', 'batchNotifyDuration', 			fallback = 60),	# seconds
+				'cse.sub.batchBufferSize'				: config.getint('cse.resource.sub', 'batchNotifyBufferSize', 		fallback = 0),
+				'cse.sub.batchCheckpointInterval'		: config.getint('cse.resource.sub', 'batchNotifyCheckpointInterval', fallback = 0),	# seconds
 
 
 				#
@@ -374,6 +385,10 @@ class Configuration(object):
 			Configuration._configuration['cse.defaultSerialization'] = ContentSerializationType.toContentSerialization(ct)
 			if Configuration._configuration['cse.defaultSerialization'] == ContentSerializationType.UNKNOWN:
 				return False, f'Configuration Error: Unsupported \[cse]:defaultSerialization: {ct}'
+
+		# Identifier generator
+		if Configuration._configuration['cse.idGenerator'] not in Utils.idGenerators:
+			return False, f'Configuration Error: Unsupported \[cse]:idGenerator: {Configuration._configuration["cse.idGenerator"]}'
 		
 		# Registrar Serialization
 		if isinstance(ct := Configuration._configuration['cse.registrar.serialization'], str):
@@ -496,6 +511,36 @@ class Configuration(object):
 		# Check default subscription duration
 		if Configuration._configuration['cse.sub.dur'] < 1:
 			return False, 'Configuration Error: \[cse.resource.sub]:batchNotifyDuration must be > 0'
+		if Configuration._configuration['cse.sub.batchBufferSize'] < 0:
+			return False, 'Configuration Error: \[cse.resource.sub]:batchNotifyBufferSize must be >= 0'
+		if Configuration._configuration['cse.sub.batchCheckpointInterval'] < 0:
+			return False, 'Configuration Error: \[cse.resource.sub]:batchNotifyCheckpointInterval must be >= 0'
+
+		# Check database type
+		Configuration._configuration['db.type'] = Configuration._configuration['db.type'].lower()
+		if Configuration._configuration['db.type'] not in ['tinydb', 'sqlite']:
+			return False, 'Configuration Error: \[database]:type must be "tinydb" or "sqlite"'
+
+		if Configuration._configuration['db.resourceCacheSize'] < 0:
+			return False, 'Configuration Error: \[database]:resourceCacheSize must be >= 0'
+		if Configuration._configuration['db.serializationCacheSize'] < 0:
+			return False, 'Configuration Error: \[database]:serializationCacheSize must be >= 0'
+		if Configuration._configuration['db.compactionThreshold'] < 1:
+			return False, 'Configuration Error: \[database]:compactionThreshold must be > 0'
+		if Configuration._configuration['db.groupCommitInterval'] < 0:
+			return False, 'Configuration Error: \[database]:groupCommitInterval must be >= 0'
+		if Configuration._configuration['db.groupCommitOperations'] < 1:
+			return False, 'Configuration Error: \[database]:groupCommitOperations must be > 0'
+		# Convert the fragment indexes to tuples of attribute names
+		fragmentIndexes = []
+		for each in Configuration._configuration['db.fragmentIndexes']:
+			if not each:
+				continue
+			attributes = each if isinstance(each, tuple) else tuple([ a.strip() for a in each.split('+') ])	# may already be converted
+			if not all([ a.isidentifier() for a in attributes ]):
+				return False, f'Configuration Error: Invalid attribute name in \[database]:fragmentIndexes: {each}'
+			fragmentIndexes.append(attributes)
+		Configuration._configuration['db.fragmentIndexes'] = fragmentIndexes
 
 		# Check flexBlocking value
 		Configuration._configuration['cse.flexBlockingPreference'] = Configuration._configuration['cse.flexBlockingPreference'].lower()
@@ -736,10 +736,11 @@ Available under the BSD 3-Clause License
 			misc += '\n'
 		misc += f'Platform  : {sys.platform}\n'
 		misc += f'Python    : {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}\n'
+		misc += f'Cache     : {CSE.storage.resourceCache.hits} hits | {CSE.storage.resourceCache.misses} misses\n'
 
 		# Adapt the following line when adding resources to keep formatting. 
 		# It fills up the right columns to match the length of the left column.
-		misc += '\n' * ( 2 if CSE.statistics.statisticsEnabled else 7)
+		misc += '\n' * ( 1 if CSE.statistics.statisticsEnabled else 6)
 
 		requestsGrid = Table.grid(expand = True)
 		requestsGrid.add_column(ratio = 28)
@@ -9,15 +9,15 @@
 
 from __future__ import annotations
 from cgitb import reset
-import operator
-import sys
+import sys, itertools, threading
 from copy import deepcopy
-from typing import Any, List, Tuple, Dict, cast
+from typing import Any, Iterator, List, Tuple, Dict, cast
 
 from ..helpers import TextTools as TextTools
 from ..etc.Constants import Constants as C
 from ..etc.Types import ResourceTypes as T
 from ..etc.Types import FilterOperation
+from ..etc.Types import ContentStatus
 from ..etc.Types import Permission
 from ..etc.Types import DesiredIdentifierResultType as DRT
 from ..etc.Types import ResultContentType as RCN
@@ -36,9 +36,13 @@ from ..resources.Resource import Resource
 
 class Dispatcher(object):
 
+	_indexedCriteria = ( 'lbl', 'ty', 'crb', 'cra', 'exb', 'exa' )
+	"""	Filter criteria that the discovery query planner can look up in the storage's indexes. """
+
 	def __init__(self) -> None:
 		self.csiSlashLen 				= len(CSE.cseCsiSlash)
 		self.sortDiscoveryResources 	= Configuration.get('cse.sortDiscoveredResources')
+		self.deletions					= threading.local()	# nesting depth of deleteResource() per thread
 		L.isInfo and L.log('Dispatcher initialized')
 
 
@@ -171,30 +175,31 @@ class Dispatcher(object):
 
 		#
 		#	Handle more sophisticated RCN
+		#	res.request contains the content status and offset if the discovery result is limited
 		#
 
 		if request.args.rcn == RCN.attributesAndChildResources:
 			self.resourceTreeDict(allowedResources, resource)	# the function call add attributes to the target resource
-			return Result(status = True, rsc = RC.OK, resource = resource)
+			return Result(status = True, rsc = RC.OK, resource = resource, request = res.request)
 
 		elif request.args.rcn == RCN.attributesAndChildResourceReferences:
 			self._resourceTreeReferences(allowedResources, resource, request.args.drt, 'ch')	# the function call add attributes to the target resource
-			return Result(status = True, rsc = RC.OK, resource = resource)
+			return Result(status = True, rsc = RC.OK, resource = resource, request = res.request)
 
 		elif request.args.rcn == RCN.childResourceReferences: 
 			#childResourcesRef:JSON = { resource.tpe: {} }  # Root resource with no attribute
 			#childResourcesRef = self._resourceTreeReferences(allowedResources,  None, request.args.drt, 'm2m:rrl')
 			# self._resourceTreeReferences(allowedResources, childResourcesRef[resource.tpe], request.args.drt, 'm2m:rrl')
 			childResourcesRef = self._resourceTreeReferences(allowedResources, None, request.args.drt, 'm2m:rrl')
-			return Result(status = True, rsc = RC.OK, resource = childResourcesRef)
+			return Result(status = True, rsc = RC.OK, resource = childResourcesRef, request = res.request)
 
 		elif request.args.rcn == RCN.childResources:
 			childResources:JSON = { resource.tpe : {} } #  Root resource as a dict with no attribute
 			self.resourceTreeDict(allowedResources, childResources[resource.tpe]) # Adding just child resources
-			return Result(status = True, rsc = RC.OK, resource = childResources)
+			return Result(status = True, rsc = RC.OK, resource = childResources, request = res.request)
 
 		elif request.args.rcn == RCN.discoveryResultReferences: # URIList
-			return Result(status = True, rsc = RC.OK, resource = self._resourcesToURIList(allowedResources, request.args.drt))
+			return Result(status = True, rsc = RC.OK, resource = self._resourcesToURIList(allowedResources, request.args.drt), request = res.request)
 
 		else:
 			return Result.errorResult(dbg = 'wrong rcn for RETRIEVE')
@@ -258,82 +263,200 @@ class Dispatcher(object):
 				return Result.errorResult(rsc = RC.notFound, dbg = res.dbg)
 			rootResource = res.resource
 
-		# get all direct children
-		dcrs = self.directChildResources(id)
-
-		# Slice the page (offset and limit)
+		# Page (offset and limit)
 		offset = handling['ofst'] if 'ofst' in handling else 1			# default: 1 (first resource
 		limit = handling['lim'] if 'lim' in handling else sys.maxsize	# default: system max size or "maxint"
-		dcrs = dcrs[offset-1:offset-1+limit]							# now dcrs only contains the desired child resources for ofst and lim
 
 		# Get level
 		level = handling['lvl'] if 'lvl' in handling else sys.maxsize	# default: system max size or "maxint"
 
 		# a bit of optimization. This length stays the same.
-		allLen = len(attributes) if attributes else 0
-		if conditions:
-			allLen += ( len(conditions) +
-			  (len(conditions.get('ty'))-1 if 'ty' in conditions else 0) +		# -1 : compensate for len(conditions) in line 1
-			  (len(conditions.get('cty'))-1 if 'cty' in conditions else 0) +		# -1 : compensate for len(conditions) in line 1 
-			  (len(conditions.get('lbl'))-1 if 'lbl' in conditions else 0) 		# -1 : compensate for len(conditions) in line 1 
-			)
+		allLen = self._criteriaLength(conditions, attributes)
+
+		# Discover the resources. This is a lazy pipeline: resources are only instantiated, matched,
+		# access checked, and mapped to the *arp* resource until the requested page is complete.
+		# The query planner decides how the candidate resources are found: by walking the resource tree, 
+		# by evaluating the time, size and type criteria in the storage's column store, or by looking up 
+		# the most selective criterion in the storage's label, type and timestamp indexes.
+		# Then only the candidate resources are instantiated, and matched again only when there are other criteria.
+		plan, candidates = self._planDiscovery(rootResource, level, fo, allLen, conditions)
+		L.isDebug and L.logDebug(f'Discovery plan: {plan}')
+		if plan['plan'] == 'columnStore' and (discovered := CSE.storage.discoverResourceIDs(rootResource.ri, level, conditions, fo, allLen)) is not None:
+			ris, exact = discovered
+			if candidates is not None:
+				ris = [ ri for ri in ris if ri in candidates ]
+			resources = self._discoverResourceIDs(ris, originator, fo, allLen, exact, conditions, attributes, permission)
+		elif candidates is not None:
+			ris = CSE.storage.sortByResourceTree(rootResource[Resource._srn], level, candidates)
+			resources = self._discoverResourceIDs(ris, originator, fo, allLen, False, conditions, attributes, permission)
+		else:
+			resources = self._discoverResources(rootResource, originator, level, fo, allLen, conditions, attributes, permission)
 
-		# Discover the resources
-		discoveredResources = self._discoverResources(rootResource, originator, level, fo, allLen, dcrs=dcrs, conditions=conditions, attributes=attributes, permission=permission)
+		# Apply ARP if provided
+		if 'arp' in handling:
+			resources = self._discoverArpResources(resources, handling['arp'], originator, permission)
 
-		# NOTE: this list contains all results in the order they could be found while
+		# NOTE: the results are in the order they could be found while
 		#		walking the resource tree.
 		#		DON'T CHANGE THE ORDER. DON'T SORT.
 		#		Because otherwise the tree cannot be correctly re-constructed otherwise
 
-		# Apply ARP if provided
-		if 'arp' in handling:
-			arp = handling['arp']
-			result = []
-			for resource in discoveredResources:
-				# Check existence and permissions for the .../{arp} resource
-				srn = f'{resource[Resource._srn]}/{arp}'
-				if (res := self.retrieveResource(srn)).resource and CSE.security.hasAccess(originator, res.resource, permission):
-					result.append(res.resource)
-			discoveredResources = result	# re-assign the new resources to discoveredResources
-
+		# Slice the page (offset and limit). One more resource is looked up to determine
+		# whether there are more results.
+		discoveredResources = list(itertools.islice(resources, offset-1, offset-1+limit if limit < sys.maxsize else None))
+		if limit < sys.maxsize and next(resources, None):
+			L.isDebug and L.logDebug(f'Discovery result is limited to {limit} resources. Next offset: {offset+limit}')
+			return Result(status = True, data = discoveredResources, request = CSERequest(parameters = {	C.hfCTS: int(ContentStatus.PARTIAL_CONTENT),
+																										C.hfCTO: offset + limit }))
 		return Result(status = True, data = discoveredResources)
 
 
+	def explainDiscovery(self, request:CSERequest, originator:str) -> Result:
+		"""	Return the plan the query planner would choose for a discovery request, but don't discover
+			any resources.
+
+			Args:
+				request: The discovery request.
+				originator: The request's originator.
+			Return:
+				Result object. The plan is returned in the *data* attribute.
+		"""
+		_, id = self._checkHybridID(request, None)
+		if not (res := self.retrieveResource(id, originator, request)).resource:
+			return Result.errorResult(rsc = RC.notFound, dbg = res.dbg)
+		handling = request.args.handling
+		plan, _ = self._planDiscovery(res.resource, 
+									  handling['lvl'] if 'lvl' in handling else sys.maxsize, 
+									  request.args.fo, 
+									  self._criteriaLength(request.args.conditions, request.args.attributes), 
+									  request.args.conditions)
+		return Result(status = True, data = plan)
+
+
+	def _planDiscovery(self, rootResource:Resource, level:int, fo:int, allLen:int, conditions:Conditions) -> Tuple[JSON, set[str]]:
+		"""	Choose how the candidate resources of a discovery are found.
+
+			The label, type and timestamp indexes can only be used for a filter criterion that every result must 
+			match, ie. if the filter operation is AND or if the criterion is the only one. The number of 
+			resources that match the most selective of those criteria is compared with the number of resources
+			in the resource tree below the root resource, which is only counted up to that number. 
+			
+			The plans are:
+
+			- *index*: The resources that match the most selective criterion are the candidates.
+			- *columnStore*: The time, size and type criteria are evaluated in the column store. 
+			- *walk*: The resource tree is walked.
+
+			Args:
+				rootResource: The root resource of the discovery.
+				level: Number of levels of the resource tree to discover.
+				fo: Filter operation.
+				allLen: Number of filter criteria and attributes.
+				conditions: Filter criteria.
+			Return:
+				Tuple of the plan and a set of candidate resource IDs. The set is None if the candidates 
+				are not limited by an index.
+		"""
+		plan:JSON = { 'plan': 'walk' }
+		cardinalities:dict[str, int] = {}
+		if conditions:
+			for name in self._indexedCriteria:
+				if (value := conditions.get(name)) is None:
+					continue
+				if fo != FilterOperation.AND and allLen != (len(value) if isinstance(value, list) else 1):
+					continue
+				if (count := CSE.storage.countDiscoveryCandidates(name, value)) is not None:
+					cardinalities[name] = count
+
+		candidates = None
+		if cardinalities:
+			criterion = min(cardinalities, key = cardinalities.get)		# type: ignore[arg-type]
+			subtree = CSE.storage.countResourceTree(rootResource.ri, level, cardinalities[criterion] + 1)
+			plan.update({ 'criterion': criterion, 
+						  'candidates': cardinalities[criterion], 
+						  'subtree': subtree, 
+						  'cardinalities': cardinalities })
+			if cardinalities[criterion] < subtree:
+				plan['plan'] = 'index'
+				return plan, CSE.storage.searchDiscoveryCandidates(criterion, conditions[criterion])
+
+		if CSE.storage.hasColumnStoreConditions(conditions):
+			plan['plan'] = 'columnStore'
+			# Labels are not in the column store, but the label index can still limit the result
+			if 'lbl' in cardinalities:
+				candidates = CSE.storage.searchDiscoveryCandidates('lbl', conditions['lbl'])
+		return plan, candidates
+
+
+	def _criteriaLength(self, conditions:Conditions, attributes:Parameters) -> int:
+		"""	Return the number of filter criteria and attributes of a discovery. Each element of
+			the *ty*, *cty* and *lbl* lists counts as a separate criterion.
+		"""
+		allLen = len(attributes) if attributes else 0
+		if conditions:
+			allLen += ( len(conditions) +
+			  (len(conditions.get('ty'))-1 if 'ty' in conditions else 0) +		# -1 : compensate for len(conditions) in line 1
+			  (len(conditions.get('cty'))-1 if 'cty' in conditions else 0) +		# -1 : compensate for len(conditions) in line 1 
+			  (len(conditions.get('lbl'))-1 if 'lbl' in conditions else 0) 		# -1 : compensate for len(conditions) in line 1 
+			)
+		return allLen
+
+
 	def _discoverResources(self, rootResource:Resource,
 								 originator:str, 
 								 level:int, 
 								 fo:int, 
 								 allLen:int, 
-								 dcrs:list[Resource] = None, 
 								 conditions:Conditions = None, 
 								 attributes:Parameters = None, 
-								 permission:Permission = Permission.DISCOVERY) -> list[Resource]:
+								 permission:Permission = Permission.DISCOVERY) -> Iterator[Resource]:
+		"""	Walk the resource tree below a resource and yield the matching resources.
+			Child resources are only instantiated when they are reached.
+		"""
 		if not rootResource or level == 0:		# no resource or level == 0
-			return []
-
-		# get all direct children, if not provided
-		if not dcrs:
-			if len(dcrs := self.directChildResources(rootResource.ri)) == 0:
-				return []
+			return
 
-		# Filter and add those left to the result
-		discoveredResources = []
-		for r in dcrs:
+		for doc in CSE.storage.directChildResources(rootResource.ri, raw = True):
 
 			# Exclude virtual resources
-			if r.isVirtual():
+			if T.isVirtualResource(doc['ty']) or not (r := Factory.resourceFromDict(doc).resource):
 				continue
 
 			# check permissions and filter. Only then add a resource
 			# First match then access. bc if no match then we don't need to check permissions (with all the overhead)
 			if self._matchResource(r, conditions, attributes, fo, allLen) and CSE.security.hasAccess(originator, r, permission):
-				discoveredResources.append(r)
+				yield r
 
 			# Iterate recursively over all (not only the filtered) direct child resources
-			discoveredResources.extend(self._discoverResources(r, originator, level-1, fo, allLen, conditions=conditions, attributes=attributes))
+			yield from self._discoverResources(r, originator, level-1, fo, allLen, conditions, attributes, permission)
+
+
+	def _discoverResourceIDs(self, ris:list[str], 
+								   originator:str, 
+								   fo:int, 
+								   allLen:int, 
+								   exact:bool, 
+								   conditions:Conditions, 
+								   attributes:Parameters, 
+								   permission:Permission) -> Iterator[Resource]:
+		"""	Yield the resources that were pre-selected by the storage's column store or label index. 
+			They are only matched again when not all criteria were evaluated.
+		"""
+		for ri in ris:
+			if (r := CSE.storage.retrieveResource(ri = ri).resource) and \
+			   (exact or self._matchResource(r, conditions, attributes, fo, allLen)) and \
+			   CSE.security.hasAccess(originator, r, permission):
+				yield r
 
-		return discoveredResources
+
+	def _discoverArpResources(self, resources:Iterator[Resource], arp:str, originator:str, permission:Permission) -> Iterator[Resource]:
+		"""	Map discovered resources to their *arp* (applyRelativePath) child resources.
+		"""
+		for resource in resources:
+			# Check existence and permissions for the .../{arp} resource
+			srn = f'{resource[Resource._srn]}/{arp}'
+			if (res := self.retrieveResource(srn)).resource and CSE.security.hasAccess(originator, res.resource, permission):
+				yield res.resource
 
 
 	def _matchResource(self, r:Resource, conditions:Conditions, attributes:Parameters, fo:int, allLen:int) -> bool:	
@@ -650,7 +773,7 @@ class Dispatcher(object):
 		if resource.isVirtual():
 			return resource.handleUpdateRequest(request, id, originator)	# type: ignore[no-any-return]
 
-		dictOrg = deepcopy(resource.dict)	# Save for later
+		dictOrg = resource.dict.copy()	# Save for later. Copy-on-write
 
 
 		if not (res := self.updateResource(resource, deepcopy(request.pc), originator=originator)).resource:
@@ -669,7 +792,7 @@ class Dispatcher(object):
 		if request.args.rcn is None or request.args.rcn == RCN.attributes:	# rcn is an int
 			return res
 		elif request.args.rcn == RCN.modifiedAttributes:
-			dictNew = deepcopy(resource.dict)
+			dictNew = resource.dict
 			requestPC = request.pc[tpe]
 			# return only the modified attributes. This does only include those attributes that are updated differently, or are
 			# changed by the CSE, then from the original request. Luckily, all key/values that are touched in the update request
@@ -796,6 +919,18 @@ class Dispatcher(object):
 
 
 	def deleteResource(self, resource:Resource, originator:str=None, withDeregistration:bool=False, parentResource:Resource=None, doDeleteCheck:bool=True) -> Result:
+		# Deleting a resource also deletes its child resources recursively. The deleted resources
+		# are removed from their groups only once, after the outermost delete has finished
+		self.deletions.depth = getattr(self.deletions, 'depth', 0) + 1
+		try:
+			return self._deleteResource(resource, originator, withDeregistration, parentResource, doDeleteCheck)
+		finally:
+			self.deletions.depth -= 1
+			if not self.deletions.depth and CSE.group:
+				CSE.group.removeDeletedMembers()
+
+
+	def _deleteResource(self, resource:Resource, originator:str, withDeregistration:bool, parentResource:Resource, doDeleteCheck:bool) -> Result:
 		L.isDebug and L.logDebug(f'Removing resource ri: {resource.ri}, type: {resource.ty}')
 
 		resource.deactivate(originator)	# deactivate it first
@@ -812,6 +947,9 @@ class Dispatcher(object):
 		# delete the resource from the DB. Save the result to return later
 		res = resource.dbDelete()
 
+		# Collect the removal of the resource from the groups it is a member of
+		CSE.group and CSE.group.addDeletedMember(resource)
+
 		# send a delete event
 		CSE.event.deleteResource(resource) 	# type: ignore
 
@@ -899,8 +1037,8 @@ class Dispatcher(object):
 	def retrieveLatestOldestInstance(self, pi:str, ty:T, oldest:bool = False) -> Resource:
 		"""	Get the latest or oldest x-Instance resource for a parent.
 
-			This is done by searching through all resources once to find the fitting resource 
-			(parent + type)	with the latest or oldest `ct` attribute.
+			This is done by looking up the direct child resources of the parent resource
+			in the storage's child index, which is ordered by the `ct` attribute.
 
 			Args:
 				pi: parent resourceIdentifier
@@ -910,27 +1048,7 @@ class Dispatcher(object):
 			Return:
 				Resource
 		"""
-		hit:Tuple[JSON, str] = None
-		op = operator.gt if oldest else operator.lt
-
-		# This function used as a mapper to search through all resources and
-		# determines the newest CIN resource for this parent
-		# This should be a bit faster than getting all the CIN, instantiating them, 
-		# and throwig them all away etc
-		def determineLatest(res:JSON) -> bool:
-			nonlocal hit
-			if res['pi'] == pi and res['ty'] == ty:
-				ct = res['ct']
-				if not hit or op(hit[1], ct):
-					hit = ( res, ct )
-			return False
-
-		# Search through the resources with the mapping functions
-		CSE.storage.searchByFilter(filter = determineLatest)
-		if not hit:
-			return None
-		# Instantiate and return resource
-		return Factory.resourceFromDict(hit[0]).resource
+		return CSE.storage.latestOldestChildResource(pi, ty, oldest)
 
 
 	def discoverChildren(self, id:str, resource:Resource, originator:str, handling:JSON, permission:Permission) -> list[Resource]:
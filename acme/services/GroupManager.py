@@ -8,6 +8,7 @@
 #
 
 from typing import cast, List
+from threading import Lock
 from ..etc.Types import ResourceTypes as T, Result, ConsistencyStrategy, Permission, Operation, ResponseStatusCode as RC, CSERequest, JSON
 from ..etc import Utils as Utils
 from ..resources.FCNT import FCNT
@@ -22,8 +23,19 @@ from ..services import CSE as CSE
 class GroupManager(object):
 
 	def __init__(self) -> None:
-		# Add delete event handler because we like to monitor the resources in mid
-		CSE.event.addHandler(CSE.event.deleteResource, self.handleDeleteEvent) 		# type: ignore
+		# Reverse index of the group members: member ri -> group ris, and group ri -> member ris
+		self.memberGroups:dict[str, set[str]] = {}
+		self.groupMembers:dict[str, set[str]] = {}
+		# Members of groups that still need to be removed: group ri -> member ris
+		self.pendingRemovals:dict[str, set[str]] = {}
+		self.lockIndex = Lock()
+		self.lockRemovals = Lock()
+
+		CSE.event.addHandler(CSE.event.cseReset, self.restart)		# type: ignore
+
+		# Index the <group> resources, because they are searched when the member index is built
+		CSE.storage.addFragmentIndex(('ty', ))
+		self.rebuildMemberIndex()
 		L.isInfo and L.log('GroupManager initialized')
 
 
@@ -37,6 +49,70 @@ class GroupManager(object):
 		return True
 
 
+	def restart(self) -> None:
+		"""	Restart the Group Manager. The resources have already been removed, so the member index is cleared.
+		"""
+		with self.lockIndex:
+			self.memberGroups.clear()
+			self.groupMembers.clear()
+			self.pendingRemovals.clear()
+		L.isDebug and L.logDebug('GroupManager restarted')
+
+
+	#########################################################################
+	#
+	#	Member index
+	#
+
+	def rebuildMemberIndex(self) -> None:
+		"""	Clear the member index and rebuild it from all stored <group> resources.
+		"""
+		groups = CSE.storage.searchByFragment({ 'ty' : T.GRP })
+		with self.lockIndex:
+			self.memberGroups.clear()
+			self.groupMembers.clear()
+			self.pendingRemovals.clear()
+		for group in groups:
+			self.indexGroupMembers(group)
+
+
+	def indexGroupMembers(self, group:Resource) -> None:
+		"""	Add or replace the members of a <group> resource in the member index.
+
+			Args:
+				group: The <group> resource.
+		"""
+		ri = group.ri
+		members = set(group.mid or [])
+		with self.lockIndex:
+			oldMembers = self.groupMembers.get(ri, set())
+			for each in oldMembers - members:
+				self._removeMemberGroup(each, ri)
+			for each in members - oldMembers:
+				self.memberGroups.setdefault(each, set()).add(ri)
+			self.groupMembers[ri] = members
+
+
+	def unindexGroupMembers(self, group:Resource) -> None:
+		"""	Remove a <group> resource from the member index.
+
+			Args:
+				group: The <group> resource.
+		"""
+		ri = group.ri
+		with self.lockIndex:
+			for each in self.groupMembers.pop(ri, ()):
+				self._removeMemberGroup(each, ri)
+			self.pendingRemovals.pop(ri, None)
+
+
+	def _removeMemberGroup(self, member:str, ri:str) -> None:
+		if (groups := self.memberGroups.get(member)) is not None:
+			groups.discard(ri)
+			if not groups:
+				del self.memberGroups[member]
+
+
 	#########################################################################
 
 	def validateGroup(self, group:Resource, originator:str) -> Result:
@@ -69,6 +145,7 @@ class GroupManager(object):
 
 
 		group.dbUpdate()
+		self.indexGroupMembers(group)
 		# TODO: check virtual resources
 		# return Result(status = True, rsc = RC.OK)
 		return Result.successResult()
@@ -261,25 +338,44 @@ class GroupManager(object):
 
 	#########################################################################
 	#
-	#	Event Handler
+	#	Deleted members
 	#
 
-	def handleDeleteEvent(self, deletedResource:Resource) -> None:
-		"""	Handle a delete event. Check whether the deleted resource is
-			a member of a group. If yes, remove the member. This method is
-			called by the event manager. 
+	def addDeletedMember(self, deletedResource:Resource) -> None:
+		"""	Check whether a deleted resource is a member of groups. If yes, collect its removal
+			from those groups. The removals from the same group are collected until `removeDeletedMembers()`
+			is called, so that a group is updated only once when several of its members are deleted
+			together, e.g. with their parent resource. This method is called by the dispatcher for
+			every deleted resource.
 
 			Args:
 				deletedResource: The deleted resource to check
 		"""
-		L.isDebug and L.logDebug('Looking for and removing deleted resource from groups')
-
 		ri = deletedResource.ri
-		groups = CSE.storage.searchByFragment(	{ 'ty' : T.GRP }, 
-												lambda r: (mid := r.get('mid')) and ri in mid)	# type: ignore # Filter all <grp> where mid contains ri
-		for group in groups:
-			L.isDebug and L.logDebug(f'Removing deleted resource: {ri} from group: {group.ri}')
-			group['mid'].remove(ri)
-			group['cnm'] = group.cnm - 1
-			group.dbUpdate()
+		with self.lockIndex:
+			if not (groupRIs := self.memberGroups.pop(ri, None)):
+				return
+			for groupRI in groupRIs:
+				self.groupMembers[groupRI].discard(ri)
+				self.pendingRemovals.setdefault(groupRI, set()).add(ri)
+		L.isDebug and L.logDebug(f'Collected removal of deleted resource: {ri} from groups')
+
+
+	def removeDeletedMembers(self) -> None:
+		"""	Remove the collected deleted members from their groups. Each group is updated once for all its 
+			pending removals. This method is called by the dispatcher after the outermost delete has finished.
+		"""
+		with self.lockRemovals:		# Group updates are serialized
+			while True:
+				with self.lockIndex:
+					if not self.pendingRemovals:
+						return
+					groupRI, ris = self.pendingRemovals.popitem()
+				if not (group := CSE.storage.retrieveResource(ri = groupRI).resource):
+					continue
+				L.isDebug and L.logDebug(f'Removing deleted resources: {ris} from group: {groupRI}')
+				mid = [ each for each in group.mid if each not in ris ]
+				group['cnm'] = group.cnm - (len(group.mid) - len(mid))
+				group['mid'] = mid
+				group.dbUpdate()
 
@@ -25,11 +25,13 @@ import isodate
 from ..etc.Constants import Constants as C
 from ..etc.Types import ReqResp, ResourceTypes as T, Result, ResponseStatusCode as RC, JSON
 from ..etc.Types import Operation, CSERequest, ContentSerializationType as CST, Parameters
+from ..etc.Types import ResultContentType as RCN
 from ..etc import Utils as Utils, RequestUtils as RequestUtils
 from ..services.Configuration import Configuration
 from ..services import CSE as CSE
 from ..services.Logging import Logging as L, LogLevel
 from ..webui.webUI import WebUI
+from ..resources.Resource import Resource
 from ..helpers import TextTools as TextTools
 from ..helpers.BackgroundWorker import *
 from ..etc import DateUtils
@@ -525,10 +527,21 @@ class HttpServer(object):
 				result.request.parameters[C.hfEC] = ec
 	
 
+		#
+		#	Serialize a retrieved resource. Its representation might be cached.
+		#	Only plain attributes, because child resources don't change the parent's *lt*
+		#
+		if originalRequest and originalRequest.op == Operation.RETRIEVE and \
+		   originalRequest.args.rcn == RCN.attributes and \
+		   isinstance(result.resource, Resource) and \
+		   not result.embeddedRequest and \
+		   result.request.ct in [ CST.JSON, CST.CBOR ]:
+			content = CSE.storage.serializeResource(result.resource, result.request.ct, originalRequest.args.rcn)
+
 		#
 		#	Transform request to oneM2M request
 		#
-		outResult = RequestUtils.requestFromResult(result, isResponse=True)
+		outResult = RequestUtils.requestFromResult(result, isResponse=True, withContent = not content)
 
 		#
 		#	Transform oneM2M request to http message
@@ -545,6 +558,10 @@ class HttpServer(object):
 			headers[C.hfRVI] = rvi
 		if vsi := Utils.findXPath(cast(JSON, outResult.data), 'vsi'):
 			headers[C.hfVSI] = vsi
+		if cnst := Utils.findXPath(cast(JSON, outResult.data), 'cnst'):
+			headers[C.hfCTS] = f'{cnst}'
+		if cnot := Utils.findXPath(cast(JSON, outResult.data), 'cnot'):
+			headers[C.hfCTO] = f'{cnot}'
 		headers[C.hfOT] = DateUtils.getResourceDate()
 
 		# HTTP status code
@@ -556,11 +573,16 @@ class HttpServer(object):
 
 		# From hereon, data is a string or byte string
 		origData:JSON = cast(JSON, outResult.data)
-		outResult.data = RequestUtils.serializeData(cast(JSON, outResult.data)['pc'], result.request.ct) if 'pc' in cast(JSON, outResult.data) else ''
+		if content:
+			outResult.data = content
+		else:
+			outResult.data = RequestUtils.serializeData(cast(JSON, outResult.data)['pc'], result.request.ct) if 'pc' in cast(JSON, outResult.data) else ''
 		
 		# Build and return the response
 		if isinstance(outResult.data, bytes):
 			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}\nBody: \n{TextTools.toHex(outResult.data)}\n=>\n{str(result.toData())}')
+		elif content:
+			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}\nBody: {content}\n')
 		elif 'pc' in origData:
 			# L.isDebug and L.logDebug(f'<== HTTP Response (RSC: {int(result.rsc)}):\nHeaders: {str(headers)}\nBody: {str(content)}\n')
 			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}\nBody: {origData["pc"]}\n')	# might be different serialization
@@ -53,6 +53,10 @@ class Importer(object):
 				self.assignAttributePolicies() and \
 				self.importScripts()):
 			return False
+
+		# Compile the validators for the imported and assigned attribute policies
+		CSE.validator.compileValidators()
+
 		if CSE.script.scriptDirectories:
 			if not self.importScripts(CSE.script.scriptDirectories):
 				return False
@@ -10,7 +10,8 @@
 from __future__ import annotations
 import sys
 import isodate
-from typing import Callable, Union
+from dataclasses import dataclass, field
+from typing import Callable, Union, Tuple
 from threading import Lock
 from tinydb.utils import V
 
@@ -23,7 +24,8 @@ from ..services.Logging import Logging as L
 from ..services.Configuration import Configuration
 from ..services import CSE
 from ..resources.Resource import Resource
-from ..helpers.BackgroundWorker import BackgroundWorkerPool
+from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.TimerWheel import TimerWheel
 
 # TODO: removal policy (e.g. unsuccessful tries)
 
@@ -31,18 +33,62 @@ SenderFunction = Callable[[str], bool]	# type:ignore[misc] # bc cyclic definitio
 """ Type definition for sender callback function. """
 
 
+@dataclass
+class BatchNotificationBuffer:
+	"""	Buffer for the outstanding batch notifications of a subscription for a single notification target.
+	"""
+	ri:str								= None	# Resource ID of the subscription
+	nu:str								= None	# Notification target
+	ln:bool								= False	# latestNotify
+	notifications:list[JSON]			= field(default_factory = list)	# Notifications in the order they were added
+
+
 class NotificationManager(object):
 
 
 	def __init__(self) -> None:
 		self.lockBatchNotification = Lock()	# Lock for batchNotifications
+		self.batchNotifications:dict[Tuple[str, str], BatchNotificationBuffer] = {}	# (ri, nu) -> buffer
+		self.batchNotificationsModified = False
+		self.batchNotificationBufferSize = Configuration.get('cse.sub.batchBufferSize')
+		self.batchNotificationTimers = TimerWheel(resolution = 0.1)
+		self.batchNotificationWorker:BackgroundWorker = None
+
+		# Restore the batch notifications from the last checkpoint, and start the checkpoint worker
+		self._restoreBatchNotifications()
+		self.batchNotificationCheckpointWorker:BackgroundWorker = None
+		if (checkpointInterval := Configuration.get('cse.sub.batchCheckpointInterval')) > 0:
+			self.batchNotificationCheckpointWorker = BackgroundWorkerPool.newWorker(checkpointInterval, 
+																					self._checkpointBatchNotifications, 
+																					'batchNotificationCheckpoint', 
+																					startWithDelay = True).start()
+
+		# Add a handler when the CSE is reset
+		CSE.event.addHandler(CSE.event.cseReset, self.restart)	# type: ignore
+
 		L.isInfo and L.log('NotificationManager initialized')
 
 
 	def shutdown(self) -> bool:
+		if self.batchNotificationCheckpointWorker:
+			self.batchNotificationCheckpointWorker.stop()
+		if self.batchNotificationWorker:
+			self.batchNotificationWorker.stop()
+		self.batchNotificationTimers.clear()
+		self._checkpointBatchNotifications()	# Store the outstanding batch notifications
 		L.isInfo and L.log('NotificationManager shut down')
 		return True
 
+
+	def restart(self) -> None:
+		"""	Restart the NotificationManager service. Discard all outstanding batch notifications.
+		"""
+		self.batchNotificationTimers.clear()
+		with self.lockBatchNotification:
+			self.batchNotifications.clear()
+			self.batchNotificationsModified = False
+		L.isDebug and L.logDebug('NotificationManager restarted')
+
 	###########################################################################
 	#
 	#	Subscriptions
@@ -93,18 +139,17 @@ class NotificationManager(object):
 			Return:
 				List of storage subscription documents, NOT Subscription resources.
 			"""
-		if not (subs := CSE.storage.getSubscriptionsForParent(ri)):
+		if not net:
 			return []
-		result:list[JSON] = []
-		for each in subs:
-			if net and any(x in net for x in each['net']):
-				result.append(each)
-		
+		if len(net) == 1:
+			entries = CSE.storage.getSubscriptionEntries(ri, net[0])
+		else:
+			entries = [ entry for entry in CSE.storage.getSubscriptionEntriesForParent(ri) if not entry.net.isdisjoint(net) ]
+
 		# filter by chty if set
 		if chty:
-			result = [ each for each in result if (_chty := each['chty']) is None or chty in _chty]
-
-		return result
+			return [ entry.subscription for entry in entries if entry.chty is None or chty in entry.chty ]
+		return [ entry.subscription for entry in entries ]
 
 
 	def checkSubscriptions(self, resource:Resource, 
@@ -122,29 +167,23 @@ class NotificationManager(object):
 		# ATTN: The "subscription" returned here are NOT the <sub> resources,
 		# but an internal representation from the 'subscription' DB !!!
 		# Access to attributes is different bc the structure is flattened
-		if not (subs := CSE.storage.getSubscriptionsForParent(ri)):
+		if not (entries := CSE.storage.getSubscriptionEntries(ri, reason)):	# only subscriptions that include the reason
 			return
-		for sub in subs:
+		for entry in entries:
+			sub = entry.subscription
 			# Prevent own notifications for subscriptions 
 			if childResource and \
 				sub['ri'] == childResource.ri and \
 				reason in [ NotificationEventType.createDirectChild, NotificationEventType.deleteDirectChild ]:
 					continue
-			if reason not in sub['net']:	# check whether reason is actually included in the subscription
-				continue
 			if reason in [ NotificationEventType.createDirectChild, NotificationEventType.deleteDirectChild ]:	# reasons for child resources
-				chty = sub['chty']
-				if chty and not childResource.ty in chty:	# skip if chty is set and child.type is not in the list
+				if entry.chty and childResource.ty not in entry.chty:	# skip if chty is set and child.type is not in the set
 					continue
 				self._handleSubscriptionNotification(sub, reason, resource = childResource, modifiedAttributes = modifiedAttributes)
 			
 			# Check Update and enc/atr vs the modified attributes 
-			elif reason == NotificationEventType.resourceUpdate and (atr := sub['atr']) and modifiedAttributes:
-				found = False
-				for k in atr:
-					if k in modifiedAttributes:
-						found = True
-				if found:
+			elif reason == NotificationEventType.resourceUpdate and entry.atr and modifiedAttributes:
+				if not entry.atr.isdisjoint(modifiedAttributes):
 					self._handleSubscriptionNotification(sub, reason, resource = resource, modifiedAttributes = modifiedAttributes)
 				else:
 					L.isDebug and L.logDebug('Skipping notification: No matching attributes found')
@@ -501,10 +540,9 @@ class NotificationManager(object):
 		# Then get all the URIs/notification targets from that subscription. They might already
 		# be filtered.
 		if sub := CSE.storage.getSubscription(ri):
-			ln = sub['ln'] if 'ln' in sub else False
 			for nu in sub['nus']:
-				self._stopNotificationBatchWorker(ri, nu)						# Stop a potential worker for that particular batch
-				self._sendSubscriptionAggregatedBatchNotification(ri, nu, ln)	# Send all remaining notifications
+				self._stopNotificationBatchWorker(ri, nu)					# Stop a potential timer for that particular batch
+				self._sendSubscriptionAggregatedBatchNotification(ri, nu)	# Send all remaining notifications
 
 
 	def _storeBatchNotification(self, nu:str, sub:JSON, notificationRequest:JSON) -> bool:
@@ -518,67 +556,73 @@ class NotificationManager(object):
 
 		# Alway add the notification first before doing the other handling
 		ri = sub['ri']
-		CSE.storage.addBatchNotification(ri, nu, notificationRequest)
-
-		#  Check for actions
-		if (num := Utils.findXPath(sub, 'bn/num')) and (cnt := CSE.storage.countBatchNotifications(ri, nu)) >= num:
+		with self.lockBatchNotification:
+			if not (buffer := self.batchNotifications.get((ri, nu))):
+				buffer = self.batchNotifications[(ri, nu)] = BatchNotificationBuffer(ri, nu)
+			buffer.ln = sub['ln'] if 'ln' in sub else False
+			buffer.notifications.append({	'ri' 		: ri,
+											'nu' 		: nu,
+											'tstamp'	: DateUtils.utcTime(),
+											'request'	: notificationRequest
+										})
+			cnt = len(buffer.notifications)
+			self.batchNotificationsModified = True
+
+		#  Check for actions. A full buffer is sent as well, but only if a buffer size is configured
+		if ((num := Utils.findXPath(sub, 'bn/num')) and cnt >= num) or (self.batchNotificationBufferSize and cnt >= self.batchNotificationBufferSize):
 			L.isDebug and L.logDebug(f'Sending batch notification: bn/num: {num}  countBatchNotifications: {cnt}')
 
-			ln = sub['ln'] if 'ln' in sub else False
-			self._stopNotificationBatchWorker(ri, nu)	# Stop the worker, not needed
-			self._sendSubscriptionAggregatedBatchNotification(ri, nu, ln)
+			self._stopNotificationBatchWorker(ri, nu)	# Stop the timer, not needed
+			self._sendSubscriptionAggregatedBatchNotification(ri, nu)
 
-		# Check / start Timer worker to guard the batch notification duration
+		# Check / start a timer to guard the batch notification duration
 		else:
-			try:
-				dur = isodate.parse_duration(Utils.findXPath(sub, 'bn/dur')).total_seconds()
-			except Exception:
+			if (dur := self._batchNotificationDuration(sub)) is None:
 				return False
 			self._startNewBatchNotificationWorker(ri, nu, dur)
 		return True
 
 
-	def _sendSubscriptionAggregatedBatchNotification(self, ri:str, nu:str, ln:bool = False) -> bool:
+	def _sendSubscriptionAggregatedBatchNotification(self, ri:str, nu:str) -> bool:
 		"""	Send and remove(!) the available BatchNotifications for an ri & nu.
 		"""
 		with self.lockBatchNotification:
-			L.isDebug and L.logDebug(f'Sending aggregated subscription notifications for ri: {ri}')
-
-			# Collect the stored notifications for the batch and aggregate them
-			notifications = []
-			for notification in sorted(CSE.storage.getBatchNotifications(ri, nu), key = lambda x: x['tstamp']):	# type: ignore[no-any-return] # sort by timestamp added
-				if n := Utils.findXPath(notification['request'], 'sgn'):
-					notifications.append(n)
-			if len(notifications) == 0:	# This can happen when the subscription is deleted and there are no outstanding notifications
-				return False
-
-			additionalParameters = None
-			if ln:
-				notifications = notifications[-1:]
-				additionalParameters = { 'ec' : str(EventCategory.Latest.value) }	# event category
-
-			# Aggregate and send
-			notificationRequest = {
-				'm2m:agn' : { 'm2m:sgn' : notifications }
-			}
-
-			#	TODO check whether nu is an RI. Get that resource as target reosurce and pass it on to the send request
-			#
-			#	TODO This could actually be the part to handle batch notifications correctly. always store the target's ri
-			#		 if it is a resource. only determine which poa and the ct later (ie here).
-			#
-
-			# Delete old notifications
-			if not CSE.storage.removeBatchNotifications(ri, nu):
-				L.isWarn and L.logWarn('Error removing aggregated batch notifications')
+			# This can happen when the subscription is deleted and there are no outstanding notifications
+			if not (buffer := self.batchNotifications.pop((ri, nu), None)):
 				return False
+			self.batchNotificationsModified = True
+		L.isDebug and L.logDebug(f'Sending aggregated subscription notifications for ri: {ri}')
+
+		# Collect the buffered notifications for the batch and aggregate them
+		notifications = []
+		for notification in buffer.notifications:	# already ordered by the time they were added
+			if n := Utils.findXPath(notification['request'], 'sgn'):
+				notifications.append(n)
+		if len(notifications) == 0:
+			return False
 
-			# Send the request
-			if not self._sendRequest(nu, notificationRequest, parameters = additionalParameters).status:
-				L.isWarn and L.logWarn('Error sending aggregated batch notifications')
-				return False
+		additionalParameters = None
+		if buffer.ln:
+			notifications = notifications[-1:]
+			additionalParameters = { 'ec' : str(EventCategory.Latest.value) }	# event category
+
+		# Aggregate and send
+		notificationRequest = {
+			'm2m:agn' : { 'm2m:sgn' : notifications }
+		}
+
+		#	TODO check whether nu is an RI. Get that resource as target reosurce and pass it on to the send request
+		#
+		#	TODO This could actually be the part to handle batch notifications correctly. always store the target's ri
+		#		 if it is a resource. only determine which poa and the ct later (ie here).
+		#
+
+		# Send the request
+		if not self._sendRequest(nu, notificationRequest, parameters = additionalParameters).status:
+			L.isWarn and L.logWarn('Error sending aggregated batch notifications')
+			return False
 
-			return True
+		return True
 
 # TODO expiration counter
 
@@ -589,22 +633,78 @@ class NotificationManager(object):
 	# 	return Result(status=True) if CSE.storage.updateSubscription(subscription) else Result(status=False, rsc=RC.internalServerError, dbg='cannot update subscription in database')
 
 
+	def _batchNotificationDuration(self, sub:JSON) -> float:
+		"""	Return the batch notification duration of a subscription in seconds, or None if it cannot be determined.
+		"""
+		try:
+			return isodate.parse_duration(Utils.findXPath(sub, 'bn/dur')).total_seconds()
+		except Exception:
+			return None
+
+
 	def _startNewBatchNotificationWorker(self, ri:str, nu:str, dur:float) -> bool:
 		if dur is None or dur < 1:	
 			L.logErr('BatchNotification duration is < 1')
 			return False
-		# Check and start a notification worker to send notifications after some time
-		if len(BackgroundWorkerPool.findWorkers(self._workerID(ri, nu))) > 0:	# worker started, return
-			return True
-		L.isDebug and L.logDebug(f'Starting new batchNotificationsWorker. Duration : {dur:f} seconds')
-		BackgroundWorkerPool.newActor(self._sendSubscriptionAggregatedBatchNotification, delay=dur, name=self._workerID(ri, nu)).start(ri=ri, nu=nu)
+		# Add a timer to send the notifications after some time. Nothing happens if a timer is already running
+		if self.batchNotificationTimers.add((ri, nu), dur):
+			L.isDebug and L.logDebug(f'Starting new batch notification timer. Duration : {dur:f} seconds')
+
+		# All timers are driven by a single worker. It only runs while there are timers
+		with self.lockBatchNotification:
+			if not self.batchNotificationWorker:
+				self.batchNotificationWorker = BackgroundWorkerPool.newWorker(self.batchNotificationTimers.resolution, 
+																			  self._batchNotificationTimerWorker, 
+																			  'batchNotificationTimer', 
+																			  startWithDelay = True).start()
 		return True
 
 
 	def _stopNotificationBatchWorker(self, ri:str, nu:str) -> None:
-		BackgroundWorkerPool.stopWorkers(self._workerID(ri, nu))
+		self.batchNotificationTimers.cancel((ri, nu))
+
+
+	def _batchNotificationTimerWorker(self) -> bool:
+		"""	Advance the timer wheel and send the batch notifications whose duration has passed.
+			The worker stops itself when there are no more timers.
+		"""
+		for ri, nu in self.batchNotificationTimers.advance():
+			BackgroundWorkerPool.runJob(lambda ri = ri, nu = nu: self._sendSubscriptionAggregatedBatchNotification(ri, nu), name = self._workerID(ri, nu))	# type: ignore[misc]
+		with self.lockBatchNotification:
+			if len(self.batchNotificationTimers) == 0:
+				self.batchNotificationWorker = None
+				return False
+		return True
+
+
+	def _checkpointBatchNotifications(self) -> bool:
+		"""	Store the outstanding batch notifications in the database, replacing the previous checkpoint.
+			This is done during shutdown and, if configured, periodically for crash recovery.
+		"""
+		with self.lockBatchNotification:
+			if not self.batchNotificationsModified:
+				return True
+			notifications = [ each for buffer in self.batchNotifications.values() for each in buffer.notifications ]
+			self.batchNotificationsModified = False
+		L.isDebug and L.logDebug(f'Checkpointing {len(notifications)} batch notification(s)')
+		CSE.storage.replaceBatchNotifications(notifications)
+		return True
+
+
+	def _restoreBatchNotifications(self) -> None:
+		"""	Restore the outstanding batch notifications from the last checkpoint and restart their timers.
+		"""
+		with self.lockBatchNotification:
+			for notification in sorted(CSE.storage.getBatchNotifications(), key = lambda x: x['tstamp']):	# type: ignore[no-any-return] # sort by timestamp added
+				if not (sub := CSE.storage.getSubscription(ri := notification['ri'])):	# ignore notifications for removed subscriptions
+					continue
+				if not (buffer := self.batchNotifications.get((ri, nu := notification['nu']))):
+					buffer = self.batchNotifications[(ri, nu)] = BatchNotificationBuffer(ri, nu, ln = sub['ln'] if 'ln' in sub else False)
+				buffer.notifications.append(notification)
+		for (ri, nu) in list(self.batchNotifications.keys()):
+			L.isDebug and L.logDebug(f'Restoring batch notifications for ri: {ri} nu: {nu}')
+			self._startNewBatchNotificationWorker(ri, nu, self._batchNotificationDuration(CSE.storage.getSubscription(ri)))
 
 
 	def _workerID(self, ri:str, nu:str) -> str:
 		return f'{ri};{nu}'
-
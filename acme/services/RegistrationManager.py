@@ -322,7 +322,7 @@ class RegistrationManager(object):
 	def expirationDBMonitor(self) -> bool:
 		# L.isDebug and L.logDebug('Looking for expired resources')
 		now = DateUtils.getResourceDate()
-		resources = CSE.storage.searchByFilter(lambda r: (et := r.get('et'))  and et < now)
+		resources = CSE.storage.searchExpiredResources(now)
 		for resource in resources:
 			# try to retrieve the resource first bc it might have been deleted as a child resource
 			# of an expired resource
@@ -331,7 +331,13 @@ class RegistrationManager(object):
 			L.isDebug and L.logDebug(f'Expiring resource (and child resouces): {resource.ri}')
 			CSE.dispatcher.deleteResource(resource, withDeregistration = True)	# ignore result
 			CSE.event.expireResource(resource) # type: ignore
-				
+
+		# Sleep until the next resource expires, but not longer than the configured interval
+		if self.expWorker:
+			interval = self.checkExpirationsInterval
+			if (nextEt := CSE.storage.nextExpirationTime()) and 0.0 < (delta := DateUtils.timeUntilAbsRelTimestamp(nextEt)) < interval:
+				interval = delta + 0.01
+			self.expWorker.interval = interval
 		return True
 
 
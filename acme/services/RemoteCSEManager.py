@@ -557,7 +557,8 @@ class RemoteCSEManager(object):
 		else:
 			ri = id
 
-		if not (res := CSE.dispatcher.retrieveLocalResource(ri=ri)).status:
+		# Only retrieve the resource when its ri is known
+		if not CSE.storage.identifier(ri) or not (res := CSE.dispatcher.retrieveLocalResource(ri=ri)).status:
 			csr = getCSRWithDescendant(f'/{ri}')
 		else:
 			csr = res.resource
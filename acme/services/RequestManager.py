@@ -45,6 +45,10 @@ class RequestManager(object):
 		self.flexBlockingBlocking			 = Configuration.get('cse.flexBlockingPreference') == 'blocking'
 		self.requestExpirationDelta			 = Configuration.get('cse.requestExpirationDelta')
 
+		# Index the attributes that are searched for the originators of requests
+		CSE.storage.addFragmentIndex(('aei', ))
+		CSE.storage.addFragmentIndex(('csi', ))
+		CSE.storage.addFragmentIndex(('ty', 'aei'))
 
 		self.requestHandlers:RequestHandler  = { 		# Map request handlers for operations in the RequestManager and the dispatcher
 			Operation.RETRIEVE	: RequestCallback(self.retrieveRequest, CSE.dispatcher.processRetrieveRequest),
@@ -13,6 +13,7 @@ from copy import deepcopy
 from typing import Callable, Dict, Union, Any, Tuple, cast
 from pathlib import Path
 import json, os, fnmatch
+from urllib.parse import parse_qs
 from ..etc.Types import JSON, ACMEIntEnum, CSERequest, Operation, ResourceTypes
 from ..services.Configuration import Configuration
 from ..helpers.Interpreter import PContext, checkMacros, PError, PState, PFuncCallable
@@ -79,6 +80,7 @@ class ACMEPContext(PContext):
 
 							 			'attribute':			self.doAttribute,
 										'csestatus':			self.doCseStatus,
+										'explaindiscovery':		self.doExplainDiscovery,
 							 			'hasattribute':			self.doHasAttribute,
 										'isipython':			self.doIsIPython,
 										'storagehas':			self.doStorageHas,
@@ -580,6 +582,54 @@ class ACMEPContext(PContext):
 		return str(CSE.cseStatus)
 
 
+	def doExplainDiscovery(self, pcontext:PContext, arg:str, line:str) -> str:
+		""" Return the plan that the CSE's query planner chooses for a discovery request, 
+			without discovering any resources.
+		
+			Example:
+				[explainDiscovery <target>?<filter criteria>]
+			Args:
+				pcontext: PContext object of the runnig script.
+				arg: remaining argument(s) of the command.
+			Returns:
+				The plan as a JSON string, or None in case of an error.
+		"""
+		target, _, query = arg.strip().partition('?')
+		if not target or ' ' in target:
+			pcontext.setError(PError.invalid, f'Invalid format: explainDiscovery <target>?<filter criteria>')
+			return None
+
+		# Get the request originator. Default is the CSE's originator
+		if (originator := self.getVariable('request.originator')) is None:
+			originator = CSE.cseOriginator
+
+		# Prepare a discovery request. The filter criteria are handled like the arguments of an http request
+		req = { 'op': Operation.RETRIEVE,
+				'fr': originator,
+				'to': target, 
+				'rvi': CSE.releaseVersion,
+				'rqi': Utils.uniqueRI(), 
+				'fc': { 'fu': 1 }
+			}
+		for key, values in parse_qs(query.strip(), keep_blank_values = True).items():
+			if key in [ 'ty', 'cty', 'lbl' ]:
+				req['fc'][key] = values
+			elif key in [ 'rcn', 'drt' ]:
+				req[key] = values[-1]
+			else:
+				req['fc'][key] = values[-1]
+		request = CSERequest()
+		request.originalRequest = req
+		if not (res := CSE.request.fillAndValidateCSERequest(request)).status:
+			pcontext.setError(PError.invalid, f'Invalid request: {res.dbg}')
+			return None
+
+		if not (res := CSE.dispatcher.explainDiscovery(request, originator)).status:
+			pcontext.setError(PError.invalid, f'Cannot explain discovery: {res.dbg}')
+			return None
+		return json.dumps(res.data)
+
+
 	def doHasAttribute(self, pcontext:PContext, arg:str, line:str) -> str:
 		""" Check whether an attribute exists for the given its key path . 
 		
@@ -5,27 +5,35 @@
 #	License: BSD 3-Clause License. See the LICENSE file for further details.
 #
 #	Store, retrieve and manage resources in the database. It currently relies on
-#	the document database TinyDB. It is possible to store resources either on disc
-#	or just in memory.
+#	either the document database TinyDB or on SQLite. It is possible to store 
+#	resources either on disc or just in memory.
 #
 
 from __future__ import annotations
 
-import os, shutil
-from threading import Lock
-from typing import Callable, cast, List
+import os, shutil, json, sqlite3, threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Lock, RLock
+from typing import Any, Callable, cast, Iterable, Iterator, List, Tuple
 from tinydb import TinyDB, Query
-from tinydb.storages import MemoryStorage
-from tinydb.table import Document
-from tinydb.operations import delete 
-
-from ..etc.Types import ResourceTypes as T, Result, ResponseStatusCode as RC, JSON
-from ..etc import DateUtils as DateUtils
+from tinydb.storages import MemoryStorage, JSONStorage, Storage as TinyDBStorage
+from tinydb.middlewares import CachingMiddleware
+from tinydb.table import Document, Table
+from tinydb.utils import LRUCache
+
+from ..etc.Types import ResourceTypes as T, Result, ResponseStatusCode as RC, JSON, Conditions
+from ..etc.Types import ContentSerializationType as CST, ResultContentType as RCN
+from ..etc import DateUtils as DateUtils, RequestUtils as RequestUtils
 from ..services.Configuration import Configuration
 from ..services.Logging import Logging as L
 from ..services import CSE as CSE
 from ..resources.Resource import Resource
 from ..resources import Factory
+from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.ReadWriteLock import ReadWriteLock, ReadRWLock, WriteRWLock
+from ..helpers.StorageIndexes import LabelIndex, AnnouncementIndex, ColumnStore, DocumentIndex, ChildIndex, TimestampIndex, numpy
 
 
 class Storage(object):
@@ -45,8 +53,42 @@ class Storage(object):
 				L.logErr('db.path not set')
 				raise RuntimeError('db.path not set')
 
+		# create the cache for instantiated resources
+		self.resourceCache = ResourceCache(Configuration.get('db.resourceCacheSize'))
+
+		# create the cache for serialized resources
+		self.serializationCache = SerializationCache(Configuration.get('db.serializationCacheSize'))
+
+		# Locks for single resources, see resourceLock()
+		self.lockResourceLocks = Lock()
+		self.resourceLocks:dict[str, RLock] = {}
+
+		# create the in-memory identifier and subscription registries. They are filled after the DB is validated
+		self.identifierRegistry = IdentifierRegistry()
+		self.subscriptionRegistry = SubscriptionRegistry()
+
+		# create the in-memory label and announcement indexes. They are filled after the DB is validated
+		self.labelIndex = LabelIndex()
+		self.announcementIndex = AnnouncementIndex(Resource._announcedTo)
+
+		# create the optional column store for discovery. It is filled after the DB is validated
+		self.columnStore:ColumnStore = None
+		if Configuration.get('db.columnStore'):
+			if numpy:
+				self.columnStore = ColumnStore()
+			else:
+				L.isInfo and L.log('NumPy is not installed. Discovery does not use the column store')
+
 		# create DB object and open DB
-		self.db = TinyDBBinding(self.dbPath, postfix = f'-{CSE.cseCsi[1:]}') # add CSE CSI as postfix
+		self.db:TinyDBBinding|SQLiteBinding = None
+		if Configuration.get('db.type') == 'sqlite':
+			self.db = SQLiteBinding(self.dbPath, postfix = f'-{CSE.cseCsi[1:]}') # add CSE CSI as postfix
+		else:
+			self.db = TinyDBBinding(self.dbPath, postfix = f'-{CSE.cseCsi[1:]}') # add CSE CSI as postfix
+
+		# Add the configured indexes for searchByFragment(). Others are added by the services
+		for attributes in Configuration.get('db.fragmentIndexes'):
+			self.addFragmentIndex(attributes)
 
 		# Reset dbs?
 		if self.dbReset:
@@ -61,10 +103,30 @@ class Storage(object):
 		if not self.inMemory and not self.dbReset and not self._backupDB():
 			raise RuntimeError('DB Error')
 
+		# Register the stored identifiers, subscriptions, and the indexed resource attributes
+		self.identifierRegistry.rebuild(self.db.searchIdentifiers())
+		self.subscriptionRegistry.rebuild(self.db.searchSubscriptions())
+		resources = self.db.discoverResourcesByFilter(lambda doc: True)
+		self.labelIndex.rebuild(resources)
+		self.announcementIndex.rebuild(resources)
+		if self.columnStore:
+			self.columnStore.rebuild(resources)
+		del resources
+
+		# Start the background flusher for group commits
+		self.groupCommitWorker:BackgroundWorker = None
+		if not self.inMemory and (groupCommitInterval := Configuration.get('db.groupCommitInterval')) > 0:
+			L.isInfo and L.log(f'DB group commit interval: {groupCommitInterval} ms')
+			self.groupCommitWorker = BackgroundWorkerPool.newWorker(groupCommitInterval / 1000.0, self.flushDBWorker, 'dbFlushWorker', startWithDelay = True).start()
+
 		L.isInfo and L.log('Storage initialized')
 
 
 	def shutdown(self) -> bool:
+		if self.groupCommitWorker:
+			self.groupCommitWorker.stop()
+			self.groupCommitWorker = None
+		self.flush()
 		self.db.closeDB()
 		self.db = None
 		L.isInfo and L.log('Storage shut down')
@@ -76,11 +138,32 @@ class Storage(object):
 		"""
 		try:
 			self.db.purgeDB()
+			self.resourceCache.clear()
+			self.serializationCache.clear()
+			self.identifierRegistry.clear()
+			self.subscriptionRegistry.clear()
+			self.labelIndex.clear()
+			self.announcementIndex.clear()
+			if self.columnStore:
+				self.columnStore.clear()
 		except Exception as e:
 			L.logErr(f'Exception during purge: {e}', exc=e)
 			quit()
 
 
+	def flush(self) -> None:
+		"""	Write all pending changes to the databases' storage.
+		"""
+		self.db.flush()
+
+
+	def flushDBWorker(self) -> bool:
+		"""	Background worker to periodically write pending changes to the databases' storage.
+		"""
+		self.flush()
+		return True
+
+
 	def _validateDB(self) -> bool:
 		"""	Trying to validate the database files by reading from them.
 		"""
@@ -90,9 +173,9 @@ class Storage(object):
 			dbFile = 'resources'
 			self.hasResource('_')
 			dbFile = 'identifiers'
-			self.structuredIdentifier('_')
+			self.db.searchIdentifiers(srn = '_')
 			dbFile = 'subscription'
-			self.getSubscription('_')
+			self.db.searchSubscriptions(ri = '_')
 			dbFile = 'batch notification'
 			self.countBatchNotifications('_', '_')
 			dbFile = 'statistics'
@@ -109,6 +192,7 @@ class Storage(object):
 		dir = f'{self.dbPath}/backup'
 		L.isDebug and L.logDebug(f'Creating DB backup in directory: {dir}')
 		os.makedirs(dir, exist_ok = True)
+		self.flush()
 		return self.db.backupDB(dir)
 		
 
@@ -125,6 +209,8 @@ class Storage(object):
 		if overwrite:
 			L.isDebug and L.logDebug('Resource enforced overwrite')
 			self.db.upsertResource(resource)
+			self.resourceCache.invalidate(ri)
+			self.serializationCache.invalidate(ri)
 		else: 
 			if not self.hasResource(ri, srn):	# Only when not resource does not exist yet
 				self.db.insertResource(resource)
@@ -134,28 +220,39 @@ class Storage(object):
 
 		# Add path to identifiers db
 		self.db.insertIdentifier(resource, ri, srn)
+		self.identifierRegistry.add(ri, resource.rn, srn, resource.ty)
+		self.labelIndex.add(ri, resource.lbl)
+		self.announcementIndex.add(resource.dict)
+		if self.columnStore:
+			self.columnStore.add(resource.dict)
 		return Result(status = True, rsc = RC.created)
 
 
 	def hasResource(self, ri:str = None, srn:str = None) -> bool:
 		"""	Check whether a resource with either the ri or the srn already exists.
 		"""
-		return (ri is not None and self.db.hasResource(ri = ri)) or (srn is not None and self.db.hasResource(srn = srn))
+		return (ri is not None and self.db.hasResource(ri = ri)) or (srn is not None and srn in self.identifierRegistry.structured)
 
 
 	def retrieveResource(self, ri:str = None, csi:str = None, srn:str = None, aei:str = None, raw:bool = False) -> Result:
 		""" Return a resource via different addressing methods. 
 		"""
 		resources = []
+		invalidations = self.resourceCache.invalidations	# before reading from the DB
+		serializationInvalidations = self.serializationCache.invalidations	# before reading from the cache or the DB
 
 		if ri:		# get a resource by its ri
 			# L.logDebug(f'Retrieving resource ri: {ri}')
+			if not raw and (resource := self.resourceCache.get(ri)):
+				resource.serializationInvalidations = serializationInvalidations
+				return Result(status = True, rsc = RC.OK, resource = resource)
 			resources = self.db.searchResources(ri = ri)
 
 		elif srn:	# get a resource by its structured rn
 			# L.logDebug(f'Retrieving resource srn: {srn}')
-			# get the ri via the srn from the identifers table
-			resources = self.db.searchResources(srn = srn)
+			# get the ri via the srn from the identifers table, and retrieve the resource by its ri
+			if (identifier := self.identifierRegistry.getStructured(srn)):
+				return self.retrieveResource(ri = identifier['ri'], raw = raw)
 
 		elif csi:	# get the CSE by its csi
 			# L.logDebug(f'Retrieving resource csi: {csi}')
@@ -167,13 +264,45 @@ class Storage(object):
 		# L.logDebug(resources)
 		# return CSE.dispatcher.resourceFromDict(resources[0]) if len(resources) == 1 else None,
 		if (l := len(resources)) == 1:
-			return Result(status = True, resource = resources[0]) if raw else Factory.resourceFromDict(resources[0])
+			if raw:
+				return Result(status = True, resource = resources[0])
+			if (res := Factory.resourceFromDict(resources[0])).resource:
+				self.resourceCache.add(res.resource, invalidations)
+				res.resource.serializationInvalidations = serializationInvalidations
+			return res
 		elif l == 0:
 			return Result.errorResult(rsc = RC.notFound, dbg = 'resource not found')
 
 		return Result.errorResult(rsc = RC.internalServerError, dbg = 'database inconsistency')
 
 
+	def serializeResource(self, resource:Resource, ct:CST, rcn:RCN) -> str|bytes:
+		"""	Return the serialized representation of a resource, e.g. for a RETRIEVE response. 
+			The representation is taken from the serialization cache if the resource didn't 
+			change since it was serialized the last time. 
+			
+			A new representation is only added to the cache when the resource was retrieved with
+			`retrieveResource()`, and there were no invalidations since then. Otherwise an outdated
+			resource could be cached, e.g. when a *cni* update happened after the retrieval.
+
+			Args:
+				resource: The resource to serialize.
+				ct: The content serialization type. Must be JSON or CBOR.
+				rcn: The result content of the request. It is part of the cache key.
+			Return:
+				String or byte string with the serialized resource.
+		"""
+		if not resource._cacheRepresentation or not (ri := resource.ri):
+			return RequestUtils.serializeData(resource.asDict(), ct)
+		key = (resource.lt, int(ct), int(rcn))	# The enums are not hashable
+		if (data := self.serializationCache.get(ri, key)) is not None:
+			return data
+		data = RequestUtils.serializeData(resource.asDict(), ct)
+		if resource.serializationInvalidations is not None:
+			self.serializationCache.add(ri, key, data, resource.serializationInvalidations)
+		return data
+
+
 	def retrieveResourcesByType(self, ty:T) -> list[Document]:
 		""" Return all resources of a certain type. 
 		"""
@@ -184,18 +313,34 @@ class Storage(object):
 	def updateResource(self, resource:Resource) -> Result:
 		# ri = resource.ri
 		# L.logDebug(f'Updating resource (ty: {resource.ty}, ri: {ri}, rn: {resource.rn})')
-		return Result(status = True, resource = self.db.updateResource(resource), rsc = RC.updated)
+		result = Result(status = True, resource = self.db.updateResource(resource), rsc = RC.updated)
+		self.resourceCache.invalidate(resource.ri)
+		self.serializationCache.invalidate(resource.ri)
+		self.labelIndex.add(resource.ri, resource.lbl)
+		self.announcementIndex.add(resource.dict)
+		if self.columnStore:
+			self.columnStore.add(resource.dict)
+		return result
 
 
 	def deleteResource(self, resource:Resource) -> Result:
 		# L.logDebug(f'Removing resource (ty: {resource.ty}, ri: {ri}, rn: {resource.rn})'
 		self.db.deleteResource(resource)
 		self.db.deleteIdentifier(resource)
+		self.identifierRegistry.remove(resource.ri)
+		self.resourceCache.invalidate(resource.ri)
+		self.serializationCache.invalidate(resource.ri)
+		with self.lockResourceLocks:
+			self.resourceLocks.pop(resource.ri, None)
+		self.labelIndex.remove(resource.ri)
+		self.announcementIndex.remove(resource.ri)
+		if self.columnStore:
+			self.columnStore.remove(resource.ri)
 		return Result(status = True, rsc = RC.deleted)
 
 
 	def directChildResources(self, pi:str, ty:T = None, raw:bool = False) -> list[Document]|list[Resource]:
-		"""	Return a list of direct child resources, or an empty list
+		"""	Return a list of direct child resources, ordered by their creation time, or an empty list
 		"""
 		docs = [ each for each in self.db.searchResources(pi = pi, ty = int(ty) if ty is not None else None)]
 		return docs if raw else cast(List[Resource], list(map(lambda x: Factory.resourceFromDict(x).resource, docs)))
@@ -205,39 +350,287 @@ class Storage(object):
 		# 		]
 
 
+	def countDiscoveryCandidates(self, name:str, value:Any) -> int:
+		"""	Return the number of resources that match a single discovery filter criterion, according 
+			to the label index or the database's type and timestamp indexes.
+
+			Args:
+				name: Name of the filter criterion. One of *lbl*, *ty*, *crb*, *cra*, *exb*, *exa*.
+				value: Value of the filter criterion.
+			Return:
+				Number of matching resources, or None if the criterion is not indexed or the value cannot be used.
+		"""
+		if name == 'lbl':
+			return self.labelIndex.count(value) if isinstance(value, list) else None
+		if name == 'ty':
+			return self.db.countResourcesByTypes(tys) if (tys := self._discoveryTypes(value)) else None
+		if (timestamp := self._discoveryTimestamp(name, value)):
+			return self.db.countResourcesByTimestamp(**timestamp)
+		return None
+
+
+	def searchDiscoveryCandidates(self, name:str, value:Any) -> set[str]:
+		"""	Return the resource IDs of the resources that match a single discovery filter criterion, 
+			according to the label index or the database's type and timestamp indexes.
+
+			Args:
+				name: Name of the filter criterion. One of *lbl*, *ty*, *crb*, *cra*, *exb*, *exa*.
+				value: Value of the filter criterion.
+			Return:
+				Set of resource IDs, or None if the criterion is not indexed or the value cannot be used.
+		"""
+		if name == 'lbl':
+			return self.labelIndex.search(value) if isinstance(value, list) else None
+		if name == 'ty':
+			return set(self.db.searchResourceIDsByTypes(tys)) if (tys := self._discoveryTypes(value)) else None
+		if (timestamp := self._discoveryTimestamp(name, value)):
+			return set(self.db.searchResourceIDsByTimestamp(**timestamp))
+		return None
+
+
+	def _discoveryTypes(self, value:Any) -> list[int]:
+		"""	Return the resource types of a *ty* filter criterion, or None if the value cannot be used.
+		"""
+		try:
+			return [ int(each) for each in value ] if isinstance(value, list) and value else None
+		except (ValueError, TypeError):
+			return None
+
+
+	def _discoveryTimestamp(self, name:str, value:Any) -> JSON:
+		"""	Return the arguments for a timestamp search for a *crb*, *cra*, *exb* or *exa* filter criterion,
+			or None if the criterion is not a timestamp criterion or the value cannot be used. 
+			The comparisons are the same as in `Dispatcher._matchResource()`.
+		"""
+		if name not in ('crb', 'cra', 'exb', 'exa') or not value or not isinstance(value, str):
+			return None
+		return {	'attribute': 'ct' if name[0] == 'c' else 'et',
+					'before' if name[-1] == 'b' else 'after': value }
+
+
+	def countResourceTree(self, ri:str, level:int, limit:int) -> int:
+		"""	Count the resources in the resource tree below a resource, but stop counting after *limit*
+			resources. The resources are not retrieved.
+
+			Args:
+				ri: Resource ID of the root resource.
+				level: Number of levels of the resource tree below the root resource.
+				limit: Maximum number to count.
+			Return:
+				Number of resources, at most *limit*.
+		"""
+		count = 0
+		frontier = [ ri ]
+		while frontier and level > 0 and count < limit:
+			children = []
+			for each in frontier:
+				children.extend(childRIs := self.db.searchChildRIs(each))
+				if (count := count + len(childRIs)) >= limit:
+					return limit
+			frontier = children
+			level -= 1
+		return min(count, limit)
+
+
+	def searchAnnounceableResourceIDs(self, csi:str, isAnnounced:bool) -> list[str]:
+		"""	Return the resource IDs of the resources that have an announcement target of a remote CSE 
+			in their *at* attribute, and that are or are not announced to that CSE.
+			See `AnnouncementIndex.search()` for details.
+
+			Args:
+				csi: CSE-ID of the remote CSE.
+				isAnnounced: Return the announced resources if True, and the not announced resources otherwise.
+			Return:
+				List of resource IDs, in the order in which the resources were created.
+		"""
+		return self.announcementIndex.search(csi, isAnnounced)
+
+
+	def sortByResourceTree(self, srn:str, level:int, ris:Iterable[str]) -> list[str]:
+		"""	Select the non-virtual resources in the resource tree below a resource from a collection
+			of resource IDs, and sort them in the order of the resource tree. This is the order of a
+			depth-first walk where the direct child resources are ordered by their creation time.
+
+			Args:
+				srn: Structured resource name of the root resource.
+				level: Number of levels of the resource tree below the root resource.
+				ris: Resource IDs.
+			Return:
+				List of resource IDs.
+		"""
+		prefix = f'{srn}/'
+		rootLevel = srn.count('/')
+		keys:dict[str, Tuple[str, int, str]] = {}	# srn -> sort key among the siblings
+
+		def siblingKey(srn:str) -> Tuple[str, int, str]:
+			if (key := keys.get(srn)) is None:
+				if not (identifier := self.identifierRegistry.getStructured(srn)) or not (doc := self.retrieveResource(ri = identifier['ri'], raw = True).resource):
+					return None
+				key = keys[srn] = (doc['ct'], doc['ty'], doc['ri'])
+			return key
+
+		result = []
+		for ri in ris:
+			if not (identifier := self.identifierRegistry.get(ri)) or T.isVirtualResource(identifier['ty']):
+				continue
+			if not (resourceSrn := identifier['srn']).startswith(prefix) or resourceSrn.count('/') - rootLevel > level:
+				continue
+			# The sort key is the list of the sibling keys of the resource and its ancestors below the root resource
+			path = []
+			end = len(prefix)
+			while (end := resourceSrn.find('/', end + 1)) != -1:
+				path.append(siblingKey(resourceSrn[:end]))
+			path.append(siblingKey(resourceSrn))
+			if None not in path:
+				result.append((path, ri))
+		result.sort()
+		return [ ri for _, ri in result ]
+
+
+	def hasColumnStoreConditions(self, conditions:Conditions) -> bool:
+		"""	Check whether the column store is available and can evaluate any of the filter criteria.
+
+			Args:
+				conditions: Filter criteria.
+			Return:
+				True if the column store can be used for a discovery with these filter criteria.
+		"""
+		return self.columnStore is not None and bool(conditions) and not self.columnStore.conditions.isdisjoint(conditions)
+
+
+	def discoverResourceIDs(self, pi:str, level:int, conditions:Conditions, fo:int, allLen:int) -> Tuple[list[str], bool]:
+		"""	Discover resources via the column store. See `ColumnStore.discover()` for the arguments.
+
+			Return:
+				Tuple of the list of resource IDs of the discovered resources, and a flag whether the 
+				filter criteria were completely evaluated. None is returned if the column store is not
+				available or cannot evaluate the filter criteria.
+		"""
+		if not self.hasColumnStoreConditions(conditions):
+			return None
+		return self.columnStore.discover(pi, level, conditions, fo, allLen)
+
+
+	def latestOldestChildResource(self, pi:str, ty:T, oldest:bool = False) -> Resource:
+		"""	Return the latest or oldest direct child resource of a type.
+
+			Args:
+				pi: Resource ID of the parent resource.
+				ty: Resource type of the child resource.
+				oldest: If True then return the oldest child resource, otherwise the latest.
+			Return:
+				Resource, or None if the resource has no child resources of that type.
+		"""
+		if not (ri := self.db.searchLatestOldestChildRI(pi, int(ty), oldest)):
+			return None
+		return self.retrieveResource(ri = ri).resource
+
+
 	def countDirectChildResources(self, pi:str, ty:T = None) -> int:
 		"""	Count the direct child resources.
 		"""
-		return len(self.db.searchResources(pi = pi, ty = int(ty) if ty is not None else None))
+		return self.db.countChildResources(pi, int(ty) if ty is not None else None)
+
+
+	def countDirectChildResourcesAndSizes(self, pi:str, ty:T) -> Tuple[int, int]:
+		"""	Count the direct child resources of a type, and sum up their content sizes.
+			The values are taken from the child index, so the child resources are not retrieved.
+
+			Args:
+				pi: Resource ID of the parent resource.
+				ty: Resource type of the child resources.
+			Return:
+				Tuple (number of child resources, sum of their *cs* attributes).
+		"""
+		return self.db.countChildResourcesAndSizes(pi, int(ty))
+
+
+	def resourceLock(self, ri:str) -> RLock:
+		"""	Return the lock for a resource. It is used to serialize changes of a resource
+			that depend on its child resources, e.g. the *cni* and *cbs* attributes of a &lt;container>.
+			The lock is removed when the resource is deleted.
+
+			Args:
+				ri: Resource ID of the resource.
+			Return:
+				Re-entrant lock.
+		"""
+		with self.lockResourceLocks:
+			if (lock := self.resourceLocks.get(ri)) is None:
+				lock = self.resourceLocks[ri] = RLock()
+			return lock
+
+
+	def countDirectChildResourcesByType(self, pi:str) -> dict[int, int]:
+		"""	Count the direct child resources for each resource type.
+
+			Args:
+				pi: Resource ID of the parent resource.
+			Return:
+				Dictionary that maps resource types to the number of child resources of that type.
+		"""
+		return self.db.countChildResourcesByType(pi)
 
 
 	def countResources(self) -> int:
 		return self.db.countResources()
 
 
-	def identifier(self, ri:str) -> list[Document]:
+	def identifier(self, ri:str) -> list[JSON]:
 		"""	Search for the resource with the given resource ID,
 
 			Args:
 				ri: Resource ID for the resource to look for
 			Return:
-				List of found resources, or an empty list
+				List of found identifier documents, or an empty list
 		"""
-		return self.db.searchIdentifiers(ri = ri)
+		return [ identifier ] if (identifier := self.identifierRegistry.get(ri)) else []
 
 
-	def structuredIdentifier(self, srn:str) -> list[Document]:
-		return self.db.searchIdentifiers(srn = srn)
+	def structuredIdentifier(self, srn:str) -> list[JSON]:
+		return [ identifier ] if (identifier := self.identifierRegistry.getStructured(srn)) else []
+
+
+	def addFragmentIndex(self, attributes:Tuple[str, ...]) -> None:
+		"""	Declare an index for `searchByFragment()`. A search whose fragment contains all attributes of 
+			an index only matches the resources that have the same values for those attributes, instead 
+			of all resources. If several indexes apply then the one with the most attributes is used.
+			Declaring an index again has no effect.
+
+			Args:
+				attributes: Names of the indexed resource attributes.
+		"""
+		self.db.addFragmentIndex(tuple(attributes))
 
 
 	def searchByFragment(self, dct:dict, filter:Callable[[JSON], bool] = None) -> list[Resource]:
 		""" Search and return all resources that match the given fragment dictionary/document.
+			See `addFragmentIndex()` for how to avoid matching all resources.
 		"""
 		return	[ res	for each in self.db.searchByFragment(dct) 
 						if (not filter or filter(each)) and (res := Factory.resourceFromDict(each).resource) # either there is no filter or the filter is called to test the resource
 				] 
 
 
+	def searchExpiredResources(self, et:str = None) -> list[Resource]:
+		"""	Return a list of resources that expire before a timestamp, ordered by their expiration time.
+
+			Args:
+				et: ISO 8601 timestamp. If None then the current time is used.
+			Return:
+				List of expired resources, or an empty list.
+		"""
+		return	[ res	for each in self.db.searchExpiredResources(et if et else DateUtils.getResourceDate())
+						if (res := Factory.resourceFromDict(each).resource)
+				]
+
+
+	def nextExpirationTime(self) -> str:
+		"""	Return the earliest expiration timestamp of all resources, or None if no resource has an expiration timestamp.
+		"""
+		return self.db.nextExpirationTime()
+
+
 	def searchByFilter(self, filter:Callable[[JSON], bool]) -> list[Resource]:
 		"""	Return a list of resouces that match the given filter, or an empty list.
 		"""
@@ -253,30 +646,62 @@ class Storage(object):
 
 	def getSubscription(self, ri:str) -> JSON:
 		# L.logDebug(f'Retrieving subscription: {ri}')
-		subs = self.db.searchSubscriptions(ri = ri)
-		if not subs or len(subs) != 1:
-			return None
-		return subs[0]
+		return entry.subscription if (entry := self.subscriptionRegistry.get(ri)) else None
 
 
-	def getSubscriptionsForParent(self, pi:str) -> list[Document]:
+	def getSubscriptionsForParent(self, pi:str) -> list[JSON]:
 		# L.logDebug(f'Retrieving subscriptions for parent: {pi}')
-		return self.db.searchSubscriptions(pi = pi)
+		return [ entry.subscription for entry in self.subscriptionRegistry.forParent(pi) ]
+
+
+	def getSubscriptionEntries(self, pi:str, net:int) -> list[SubscriptionEntry]:
+		"""	Return the subscription registry entries of a resource for a notification event type.
+
+			Args:
+				pi: Resource ID of the subscribed-to resource.
+				net: Notification event type.
+			Return:
+				List of SubscriptionEntry, or an empty list.
+		"""
+		return self.subscriptionRegistry.forParent(pi, net)
+
+
+	def getSubscriptionEntriesForParent(self, pi:str) -> list[SubscriptionEntry]:
+		"""	Return all subscription registry entries of a resource.
+
+			Args:
+				pi: Resource ID of the subscribed-to resource.
+			Return:
+				List of SubscriptionEntry, or an empty list.
+		"""
+		return self.subscriptionRegistry.forParent(pi)
 
 
 	def addSubscription(self, subscription:Resource) -> bool:
 		# L.logDebug(f'Adding subscription: {ri}')
-		return self.db.upsertSubscription(subscription)
+		return self._upsertSubscription(subscription)
 
 
 	def removeSubscription(self, subscription:Resource) -> bool:
 		# L.logDebug(f'Removing subscription: {subscription.ri}')
-		return self.db.removeSubscription(subscription)
+		result = self.db.removeSubscription(subscription)
+		self.subscriptionRegistry.remove(subscription.ri)
+		return result
 
 
 	def updateSubscription(self, subscription:Resource) -> bool:
 		# L.logDebug(f'Updating subscription: {ri}')
-		return self.db.upsertSubscription(subscription)
+		return self._upsertSubscription(subscription)
+
+
+	def _upsertSubscription(self, subscription:Resource) -> bool:
+		"""	Store a subscription in the database and register the stored document in the subscription registry.
+		"""
+		if not self.db.upsertSubscription(subscription):
+			return False
+		if (subs := self.db.searchSubscriptions(ri = subscription.ri)):
+			self.subscriptionRegistry.add(subs[0])
+		return True
 
 
 	#########################################################################
@@ -292,10 +717,24 @@ class Storage(object):
 		return self.db.countBatchNotifications(ri, nu)
 
 
-	def getBatchNotifications(self, ri:str, nu:str) -> list[Document]:
+	def getBatchNotifications(self, ri:str = None, nu:str = None) -> list[Document]:
+		"""	Return the stored batch notifications for a subscription and notification target, 
+			or all stored batch notifications if *ri* is not given.
+		"""
 		return self.db.getBatchNotifications(ri, nu)
 
 
+	def replaceBatchNotifications(self, notifications:list[JSON]) -> bool:
+		"""	Replace all stored batch notifications.
+
+			Args:
+				notifications: List of batch notification documents with *ri*, *nu*, *tstamp* and *request*.
+			Return:
+				Boolean indicating success.
+		"""
+		return self.db.replaceBatchNotifications(notifications)
+
+
 	def removeBatchNotifications(self, ri:str, nu:str) -> bool:
 		return self.db.removeBatchNotifications(ri, nu)
 
@@ -326,211 +765,985 @@ class Storage(object):
 
 #########################################################################
 #
-#	DB class that implements the TinyDB binding
+#	Cache for instantiated resources
 #
-#	This class may be moved later to an own module.
 
+class ResourceCache(object):
+	"""	Bounded LRU cache of instantiated resources, keyed by their resource ID.
 
-class TinyDBBinding(object):
+		The cache holds private copies of the resources. `get()` returns a new copy of
+		a cached resource, so that callers can modify the returned resource without
+		affecting the cache. Entries must be invalidated *after* a resource was
+		changed or removed in the database.
+	"""
 
-	def __init__(self, path:str = None, postfix:str = '') -> None:
-		self.path = path
-		self.cacheSize = Configuration.get('db.cacheSize')
-		L.isInfo and L.log(f'Cache Size: {self.cacheSize:d}')
+	def __init__(self, size:int) -> None:
+		"""	Create a new resource cache.
 
-		# create transaction locks
-		self.lockResources				= Lock()
-		self.lockIdentifiers			= Lock()
-		self.lockSubscriptions			= Lock()
-		self.lockBatchNotifications		= Lock()
-		self.lockStatistics 			= Lock()
+			Args:
+				size: Maximum number of cached resources. 0 disables the cache.
+		"""
+		self.size = size
+		self.resources:OrderedDict[str, Resource] = OrderedDict()
+		self.lock = Lock()
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0	# Incremented with every invalidation. Used to detect outdated additions
 
-		# file names
-		self.fileResources				= f'{self.path}/resources{postfix}.json'
-		self.fileIdentifiers			= f'{self.path}/identifiers{postfix}.json'
-		self.fileSubscriptions			= f'{self.path}/subscriptions{postfix}.json'
-		self.fileBatchNotifications		= f'{self.path}/batchNotifications{postfix}.json'
-		self.fileStatistics				= f'{self.path}/statistics{postfix}.json'
 
-		# All databases/tables will use the smart query cache
-		if Configuration.get('db.inMemory'):
-			L.isInfo and L.log('DB in memory')
-			self.dbResources 			= TinyDB(storage = MemoryStorage)
-			self.dbIdentifiers 			= TinyDB(storage = MemoryStorage)
-			self.dbSubscriptions 		= TinyDB(storage = MemoryStorage)
-			self.dbBatchNotifications	= TinyDB(storage = MemoryStorage)
-			self.dbStatistics			= TinyDB(storage = MemoryStorage)
-		else:
-			L.isInfo and L.log('DB in file system')
-			self.dbResources 			= TinyDB(self.fileResources)
-			self.dbIdentifiers 			= TinyDB(self.fileIdentifiers)
-			self.dbSubscriptions 		= TinyDB(self.fileSubscriptions)
-			self.dbBatchNotifications 	= TinyDB(self.fileBatchNotifications)
-			self.dbStatistics 			= TinyDB(self.fileStatistics)
-		
-		# Open/Create tables
-		self.tabResources 				= self.dbResources.table('resources', cache_size = self.cacheSize)
-		self.tabIdentifiers 			= self.dbIdentifiers.table('identifiers', cache_size = self.cacheSize)
-		self.tabSubscriptions 			= self.dbSubscriptions.table('subsriptions', cache_size = self.cacheSize)
-		self.tabBatchNotifications 		= self.dbBatchNotifications.table('batchNotifications', cache_size = self.cacheSize)
-		self.tabStatistics 				= self.dbStatistics.table('statistics', cache_size = self.cacheSize)
+	@staticmethod
+	def _copy(resource:Resource) -> Resource:
+		"""	Return a copy of a resource without running the resource's initialization again.
+		"""
+		result = object.__new__(type(resource))
+		result.__dict__.update(resource.__dict__)
+		result.dict = resource.dict.copy()	# copy-on-write
+		return result
 
-		# Create the Queries
-		self.resourceQuery 				= Query()
-		self.identifierQuery 			= Query()
-		self.subscriptionQuery			= Query()
-		self.batchNotificationQuery 	= Query()
 
+	def get(self, ri:str) -> Resource:
+		"""	Return a copy of a cached resource.
 
-	def closeDB(self) -> None:
-		L.isInfo and L.log('Closing DBs')
-		with self.lockResources:
-			self.dbResources.close()
-		with self.lockIdentifiers:
-			self.dbIdentifiers.close()
-		with self.lockSubscriptions:
-			self.dbSubscriptions.close()
-		with self.lockBatchNotifications:
-			self.dbBatchNotifications.close()
-		with self.lockStatistics:
-			self.dbStatistics.close()
+			Args:
+				ri: Resource ID of the resource.
+			Return:
+				A copy of the cached resource, or None if the resource is not cached.
+		"""
+		if not self.size:
+			return None
+		with self.lock:
+			if (resource := self.resources.get(ri)) is None:
+				self.misses += 1
+				return None
+			self.resources.move_to_end(ri)
+			self.hits += 1
+		return self._copy(resource)	# Cached resources are never modified, so copy outside the lock
 
 
-	def purgeDB(self) -> None:
-		L.isInfo and L.log('Purging DBs')
-		self.tabResources.truncate()
-		self.tabIdentifiers.truncate()
-		self.tabSubscriptions.truncate()
-		self.tabBatchNotifications.truncate()
-		self.tabStatistics.truncate()
-	
+	def add(self, resource:Resource, invalidations:int) -> None:
+		"""	Add a copy of a resource to the cache, and remove the least recently used resources if necessary.
 
-	def backupDB(self, dir:str) -> bool:
-		shutil.copy2(self.fileResources, dir)
-		shutil.copy2(self.fileIdentifiers, dir)
-		shutil.copy2(self.fileSubscriptions, dir)
-		shutil.copy2(self.fileBatchNotifications, dir)
-		shutil.copy2(self.fileStatistics, dir)
-		return True
+			Args:
+				resource: The resource to add.
+				invalidations: The value of *invalidations* before the resource was read from the database. 
+					The resource is not added if there were invalidations in the meantime, because it might be outdated.
+		"""
+		if not self.size:
+			return
+		resource = self._copy(resource)
+		with self.lock:
+			if invalidations != self.invalidations:
+				return
+			self.resources[resource.ri] = resource
+			self.resources.move_to_end(resource.ri)
+			while len(self.resources) > self.size:
+				self.resources.popitem(last = False)
 
 
-	#
-	#	Resources
-	#
+	def invalidate(self, ri:str) -> None:
+		"""	Remove a resource from the cache.
 
+			Args:
+				ri: Resource ID of the resource.
+		"""
+		with self.lock:
+			self.resources.pop(ri, None)
+			self.invalidations += 1
 
-	def insertResource(self, resource: Resource) -> None:
-		with self.lockResources:
-			self.tabResources.insert(resource.dict)
-	
 
-	def upsertResource(self, resource: Resource) -> None:
-		#L.logDebug(resource)
-		with self.lockResources:
-			# Update existing or insert new when overwriting
-			self.tabResources.upsert(resource.dict, self.resourceQuery.ri == resource.ri)
-	
+	def clear(self) -> None:
+		"""	Remove all resources from the cache.
+		"""
+		with self.lock:
+			self.resources.clear()
+			self.invalidations += 1
 
-	def updateResource(self, resource: Resource) -> Resource:
-		#L.logDebug(resource)
-		with self.lockResources:
-			ri = resource.ri
-			self.tabResources.update(resource.dict, self.resourceQuery.ri == ri)
-			# remove nullified fields from db and resource
-			for k in list(resource.dict):
-				if resource.dict[k] is None:	# only remove the real None attributes, not those with 0
-					self.tabResources.update(delete(k), self.resourceQuery.ri == ri)	# type: ignore [no-untyped-call]
-					del resource.dict[k]
-			return resource
 
+class SerializationCache(object):
+	"""	Bounded LRU cache of serialized resource representations, keyed by their resource ID.
 
-	def deleteResource(self, resource: Resource) -> None:
-		with self.lockResources:
-			self.tabResources.remove(self.resourceQuery.ri == resource.ri)	
-	
+		For each resource the cache holds the representations for different keys, e.g. 
+		for different content serializations. Entries must be invalidated *after* a 
+		resource was changed or removed in the database.
+	"""
 
-	def searchResources(self, ri:str = None, csi:str = None, srn:str = None, pi:str = None, ty:int = None, aei:str = None) -> list[Document]:
-		if not srn:
-			with self.lockResources:
-				if ri:
-					return self.tabResources.search(self.resourceQuery.ri == ri)
-				elif csi:
-					return self.tabResources.search(self.resourceQuery.csi == csi)	
-				elif pi:
-					if ty is not None:	# ty is an int
-						return self.tabResources.search((self.resourceQuery.pi == pi) & (self.resourceQuery.ty == ty))
-					return self.tabResources.search(self.resourceQuery.pi == pi)
-				elif ty is not None:	# ty is an int
-					return self.tabResources.search(self.resourceQuery.ty == ty)	
-				elif aei:
-					return self.tabResources.search(self.resourceQuery.aei == aei)	
-		
-		else:
-			# for SRN find the ri first and then try again recursively (outside the lock!!)
-			if len((identifiers := self.searchIdentifiers(srn=srn))) == 1:
-				return self.searchResources(ri=identifiers[0]['ri'])
+	def __init__(self, size:int) -> None:
+		"""	Create a new serialization cache.
 
-		return []
+			Args:
+				size: Maximum number of resources for which representations are cached. 0 disables the cache.
+		"""
+		self.size = size
+		self.representations:OrderedDict[str, dict[Tuple, str|bytes]] = OrderedDict()
+		self.lock = Lock()
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0	# Incremented with every invalidation. Used to detect outdated additions
 
 
-	def discoverResourcesByFilter(self, func:Callable[[JSON], bool]) -> list[Document]:
-		with self.lockResources:
-			return self.tabResources.search(func)	# type: ignore [arg-type]
+	def get(self, ri:str, key:Tuple) -> str|bytes:
+		"""	Return a cached representation of a resource.
 
+			Args:
+				ri: Resource ID of the resource.
+				key: Key of the representation, e.g. the *lt* attribute, content serialization and result content.
+			Return:
+				The cached representation, or None if it is not cached.
+		"""
+		if not self.size:
+			return None
+		with self.lock:
+			if (entries := self.representations.get(ri)) is None or (data := entries.get(key)) is None:
+				self.misses += 1
+				return None
+			self.representations.move_to_end(ri)
+			self.hits += 1
+			return data
 
-	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
-		if not srn:
-			with self.lockResources:
-				if ri:
-					return self.tabResources.contains(self.resourceQuery.ri == ri)	
-				elif csi :
-					return self.tabResources.contains(self.resourceQuery.csi == csi)
-				elif ty is not None:	# ty is an int
-					return self.tabResources.contains(self.resourceQuery.ty == ty)
-		else:
-			# find the ri first and then try again recursively
-			if len((identifiers := self.searchIdentifiers(srn=srn))) == 1:
-				return self.hasResource(ri = identifiers[0]['ri'])
-		return False
 
+	def add(self, ri:str, key:Tuple, data:str|bytes, invalidations:int) -> None:
+		"""	Add a representation of a resource to the cache, and remove the least recently used resources if necessary.
 
-	def countResources(self) -> int:
-		with self.lockResources:
-			return len(self.tabResources)
+			Args:
+				ri: Resource ID of the resource.
+				key: Key of the representation.
+				data: The serialized representation.
+				invalidations: The value of *invalidations* before the resource was retrieved. 
+					The representation is not added if there were invalidations in the meantime, because it might be outdated.
+		"""
+		if not self.size:
+			return
+		with self.lock:
+			if invalidations != self.invalidations:
+				return
+			self.representations.setdefault(ri, {})[key] = data
+			self.representations.move_to_end(ri)
+			while len(self.representations) > self.size:
+				self.representations.popitem(last = False)
 
 
-	def searchByFragment(self, dct:dict) -> list[Document]:
-		""" Search and return all resources that match the given dictionary/document. """
-		with self.lockResources:
-			return self.tabResources.search(self.resourceQuery.fragment(dct))
+	def invalidate(self, ri:str) -> None:
+		"""	Remove all representations of a resource from the cache.
 
-	#
-	#	Identifiers
-	#
+			Args:
+				ri: Resource ID of the resource.
+		"""
+		with self.lock:
+			self.representations.pop(ri, None)
+			self.invalidations += 1
 
 
-	def insertIdentifier(self, resource:Resource, ri:str, srn:str) -> None:
-		# L.isDebug and L.logDebug({'ri' : ri, 'rn' : resource.rn, 'srn' : srn, 'ty' : resource.ty})		
-		with self.lockIdentifiers:
-			self.tabIdentifiers.upsert(
-				{	'ri' : ri, 
-					'rn' : resource.rn, 
-					'srn' : srn,
-					'ty' : resource.ty 
-				}, 
-				self.identifierQuery.ri == ri)
+	def clear(self) -> None:
+		"""	Remove all representations from the cache.
+		"""
+		with self.lock:
+			self.representations.clear()
+			self.invalidations += 1
+
+
+@dataclass
+class SubscriptionEntry:
+	"""	Entry of the `SubscriptionRegistry`. It holds a subscription document from the
+		subscriptions database together with its notification filters as frozensets.
+	"""
+	subscription:JSON				= None	# The subscription document, NOT the <sub> resource
+	net:frozenset[int]				= None	# enc/net
+	chty:frozenset[int]				= None	# enc/chty, or None if not set
+	atr:frozenset[str]				= None	# enc/atr, or None if not set
+
+
+	@classmethod
+	def fromDocument(cls, subscription:JSON) -> SubscriptionEntry:
+		"""	Create a new entry for a subscription document.
+
+			Args:
+				subscription: Subscription document as stored in the subscriptions database.
+			Return:
+				SubscriptionEntry object.
+		"""
+		return cls(	subscription = subscription,
+					net  = frozenset(subscription.get('net') or []),
+					chty = frozenset(chty) if (chty := subscription.get('chty')) is not None else None,
+					atr  = frozenset(atr) if (atr := subscription.get('atr')) is not None else None)
+
+
+class SubscriptionRegistry(object):
+	"""	In-memory registry of the subscriptions, indexed by the parent resource ID and
+		the notification event types. 
+		
+		Looking up the subscriptions of a resource for a notification event type is a 
+		single dictionary access, and for most resources a miss. The registry must be 
+		updated *after* a subscription was changed or removed in the database.
+	"""
+
+	def __init__(self) -> None:
+		self.subscriptions:dict[str, SubscriptionEntry] = {}					# ri -> entry
+		self.parents:dict[str, dict[str, SubscriptionEntry]] = {}				# pi -> ri -> entry
+		self.events:dict[Tuple[str, int], dict[str, SubscriptionEntry]] = {}	# (pi, net) -> ri -> entry
+		self.lock = Lock()
+
+
+	def rebuild(self, subscriptions:list[JSON]) -> None:
+		"""	Clear the registry and rebuild it from subscription documents.
+
+			Args:
+				subscriptions: List of subscription documents.
+		"""
+		with self.lock:
+			self._clear()
+			for each in subscriptions:
+				self._add(SubscriptionEntry.fromDocument(each))
+
+
+	def get(self, ri:str) -> SubscriptionEntry:
+		"""	Return the entry of a subscription.
+
+			Args:
+				ri: Resource ID of the <sub> resource.
+			Return:
+				SubscriptionEntry, or None if the subscription is not registered.
+		"""
+		return self.subscriptions.get(ri)
+
+
+	def forParent(self, pi:str, net:int = None) -> list[SubscriptionEntry]:
+		"""	Return the entries of the subscriptions of a resource, ordered by their registration.
+
+			Args:
+				pi: Resource ID of the subscribed-to resource.
+				net: Optional notification event type. If given then only the subscriptions for this event type are returned.
+			Return:
+				List of SubscriptionEntry, or an empty list.
+		"""
+		if not (entries := self.parents.get(pi) if net is None else self.events.get((pi, net))):
+			return []
+		with self.lock:
+			return list(entries.values())
+
+
+	def add(self, subscription:JSON) -> None:
+		"""	Add or replace a subscription. A replaced subscription keeps its position in the registry.
+
+			Args:
+				subscription: Subscription document.
+		"""
+		entry = SubscriptionEntry.fromDocument(subscription)
+		with self.lock:
+			if (previous := self.subscriptions.get(entry.subscription['ri'])):
+				if previous.subscription.get('pi') == entry.subscription.get('pi'):
+					self._remove(previous, previous.net - entry.net, parent = False)	# the remaining keys are replaced in place
+				else:
+					self._remove(previous, previous.net)
+			self._add(entry)
+
+
+	def remove(self, ri:str) -> None:
+		"""	Remove a subscription.
+
+			Args:
+				ri: Resource ID of the <sub> resource.
+		"""
+		with self.lock:
+			if (entry := self.subscriptions.pop(ri, None)):
+				self._remove(entry, entry.net)
+
+
+	def clear(self) -> None:
+		"""	Remove all subscriptions from the registry.
+		"""
+		with self.lock:
+			self._clear()
+
+
+	def _clear(self) -> None:
+		self.subscriptions.clear()
+		self.parents.clear()
+		self.events.clear()
+
+
+	def _add(self, entry:SubscriptionEntry) -> None:
+		ri = entry.subscription['ri']
+		pi = entry.subscription.get('pi')
+		self.subscriptions[ri] = entry
+		self.parents.setdefault(pi, {})[ri] = entry
+		for net in entry.net:
+			self.events.setdefault((pi, net), {})[ri] = entry
+
+
+	def _remove(self, entry:SubscriptionEntry, nets:frozenset[int], parent:bool = True) -> None:
+		"""	Remove an entry from the indexes for some event types, and optionally from the parent index.
+		"""
+		ri = entry.subscription['ri']
+		pi = entry.subscription.get('pi')
+		for net in nets:
+			if (entries := self.events.get(key := (pi, net))):
+				entries.pop(ri, None)
+				if not entries:
+					del self.events[key]
+		if parent and (entries := self.parents.get(pi)):
+			entries.pop(ri, None)
+			if not entries:
+				del self.parents[pi]
+
+
+class IdentifierRegistry(object):
+	"""	In-memory registry of the resource identifiers. It maps resource IDs to their identifier
+		documents (see `TinyDBBinding.insertIdentifier()`), and structured resource names to 
+		resource IDs, so that resolving identifiers doesn't need to access the identifiers database. 
+		The registry must be updated *after* an identifier was changed or removed in the database.
+	"""
+
+	def __init__(self) -> None:
+		self.identifiers:dict[str, JSON] = {}	# ri -> identifier document
+		self.structured:dict[str, str] = {}		# srn -> ri
+		self.lock = Lock()
+
+
+	def rebuild(self, identifiers:list[JSON]) -> None:
+		"""	Clear the registry and rebuild it from identifier documents.
+
+			Args:
+				identifiers: List of identifier documents.
+		"""
+		with self.lock:
+			self.identifiers.clear()
+			self.structured.clear()
+			for each in identifiers:
+				self._add(dict(each))
+
+
+	def get(self, ri:str) -> JSON:
+		"""	Return the identifier document of a resource.
+
+			Args:
+				ri: Resource ID.
+			Return:
+				Identifier document, or None if the resource is not registered.
+		"""
+		return self.identifiers.get(ri)
+
+
+	def getStructured(self, srn:str) -> JSON:
+		"""	Return the identifier document of a resource by its structured resource name.
+
+			Args:
+				srn: Structured resource name.
+			Return:
+				Identifier document, or None if the resource is not registered.
+		"""
+		return self.identifiers.get(ri) if (ri := self.structured.get(srn)) else None
+
+
+	def add(self, ri:str, rn:str, srn:str, ty:int) -> None:
+		"""	Add or replace the identifiers of a resource.
+
+			Args:
+				ri: Resource ID.
+				rn: Resource name.
+				srn: Structured resource name.
+				ty: Resource type.
+		"""
+		with self.lock:
+			if (previous := self.identifiers.get(ri)) and self.structured.get(previous['srn']) == ri:
+				del self.structured[previous['srn']]
+			self._add({ 'ri': ri, 'rn': rn, 'srn': srn, 'ty': ty })
+
+
+	def remove(self, ri:str) -> None:
+		"""	Remove the identifiers of a resource.
+
+			Args:
+				ri: Resource ID.
+		"""
+		with self.lock:
+			if (identifier := self.identifiers.pop(ri, None)) and self.structured.get(identifier['srn']) == ri:
+				del self.structured[identifier['srn']]
+
+
+	def clear(self) -> None:
+		"""	Remove all identifiers from the registry.
+		"""
+		with self.lock:
+			self.identifiers.clear()
+			self.structured.clear()
+
+
+	def _add(self, identifier:JSON) -> None:
+		self.identifiers[identifier['ri']] = identifier
+		self.structured[identifier['srn']] = identifier['ri']
+
+
+class AppendLogStorage(TinyDBStorage):
+	"""	TinyDB storage that keeps the database content in memory and persists changes
+		to single documents in an append-only operation log. 
+		
+		The log is compacted into a snapshot file, which has the same format as TinyDB's 
+		*JSONStorage* file, when the number of logged operations exceeds a threshold, when 
+		the database is closed, and when requested explicitly. At startup the snapshot is 
+		read and the operations in the log are replayed on top of it.
+
+		Since TinyDB itself only reads and writes whole databases the changed documents must
+		be logged explicitly by calling `logDocument()`.
+	"""
+
+	def __init__(self, path:str, compactionThreshold:int = 10000, flushOperations:int = 1) -> None:
+		"""	Open the storage, read the snapshot and replay the log.
+
+			Args:
+				path: Path of the snapshot file. The log file has the same name, but the extension ".log".
+				compactionThreshold: Number of logged operations after which the log is compacted into the snapshot.
+				flushOperations: Number of logged operations after which the log is flushed to disk. 1 means that every operation is flushed immediately.
+		"""
+		super().__init__()
+		self.path = path
+		self.logPath = f'{os.path.splitext(path)[0]}.log'
+		self.compactionThreshold = compactionThreshold
+		self.flushOperations = flushOperations
+		self.data:dict[str, dict[str, JSON]] = None
+		self.logCount = 0
+		self.unflushedCount = 0
+
+		# Read the snapshot
+		if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+			with open(self.path, 'r', encoding = 'utf-8') as file:
+				self.data = json.load(file)
+		
+		# Replay the log
+		if os.path.exists(self.logPath):
+			with open(self.logPath, 'r', encoding = 'utf-8') as file:
+				for line in file:
+					try:
+						record = json.loads(line)
+					except json.JSONDecodeError:
+						# Probably the last record was not completely written
+						L.logWarn(f'Ignoring incomplete record in database log: {self.logPath}')
+						break
+					table = self._replayTable(record['t'])
+					if (doc := record['d']) is None:
+						table.pop(str(record['id']), None)
+					else:
+						table[str(record['id'])] = doc
+					self.logCount += 1
+
+		# Start with a fresh log and an up-to-date snapshot
+		if self.logCount or not os.path.exists(self.path):
+			self.compact()
+		self.logFile = open(self.logPath, 'a', encoding = 'utf-8')
+
+
+	def _replayTable(self, name:str) -> dict[str, JSON]:
+		"""	Return the data of a table for replaying the log. Create the table if necessary.
+		"""
+		if self.data is None:
+			self.data = {}
+		return self.data.setdefault(name, {})
+
+
+	def read(self) -> dict[str, dict[str, Any]]:
+		return self.data
+
+
+	def write(self, data:dict[str, dict[str, Any]]) -> None:
+		# Only update the in-memory data. Changes are persisted by logDocument() and compact()
+		self.data = data
+
+
+	def logDocument(self, table:str, docID:int, doc:JSON) -> None:
+		"""	Append the new state of a document to the log.
+
+			Args:
+				table: Name of the table.
+				docID: The document's ID.
+				doc: The complete new document, or None if the document has been removed.
+		"""
+		self.logFile.write(json.dumps({ 't': table, 'id': docID, 'd': doc }))
+		self.logFile.write('\n')
+		self.logCount += 1
+		self.unflushedCount += 1
+		if self.logCount >= self.compactionThreshold:
+			self.compact()
+		elif self.unflushedCount >= self.flushOperations:
+			self.flush()
+
+
+	def flush(self) -> None:
+		"""	Write all logged operations to disk.
+		"""
+		if self.unflushedCount:
+			self.logFile.flush()
+			os.fsync(self.logFile.fileno())
+			self.unflushedCount = 0
+
+
+	def compact(self) -> None:
+		"""	Write the current database content to the snapshot file and clear the log.
+
+			The snapshot is first written to a temporary file, which then replaces
+			the previous snapshot. Replaying a log on top of a newer snapshot does not
+			change the result, so the log is truncated only afterwards.
+		"""
+		tmpPath = f'{self.path}.tmp'
+		with open(tmpPath, 'w', encoding = 'utf-8') as file:
+			json.dump(self.data if self.data is not None else {}, file)
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(tmpPath, self.path)
+		if (logFile := getattr(self, 'logFile', None)):
+			logFile.flush()
+			logFile.truncate(0)
+		else:
+			open(self.logPath, 'w').close()
+		self.logCount = 0
+		self.unflushedCount = 0
+
+
+	def close(self) -> None:
+		self.compact()
+		self.logFile.close()
+
+
+class SynchronizedLRUCache(LRUCache):
+	"""	TinyDB's query cache is updated by read operations as well. This LRU cache 
+		synchronizes the access, so that a table can be read by multiple threads in parallel.
+	"""
+
+	def __init__(self, capacity:int = None) -> None:
+		super().__init__(capacity)
+		self.lock = Lock()
+
+
+	def get(self, key:Any, default:Any = None) -> Any:
+		with self.lock:
+			return super().get(key, default)
+
+
+	def set(self, key:Any, value:Any) -> None:
+		with self.lock:
+			super().set(key, value)
+
+
+	def __delitem__(self, key:Any) -> None:
+		with self.lock:
+			super().__delitem__(key)
+
+
+	def clear(self) -> None:
+		with self.lock:
+			super().clear()
+
+
+class SynchronizedTable(Table):
+	"""	TinyDB table with a synchronized query cache.
+	"""
+	query_cache_class = SynchronizedLRUCache
+
+
+class SynchronizedTinyDB(TinyDB):
+	"""	TinyDB database with tables that can be read by multiple threads in parallel.
+		Write operations must still be serialized by the caller.
+	"""
+	table_class = SynchronizedTable
+
+
+class GroupCommitMiddleware(CachingMiddleware):
+	"""	Keep the content of a file based database in memory and write it to the underlying
+		storage only after a number of changes, or when `flush()` is called.
+	"""
+
+	def __init__(self, storageCls:type, flushOperations:int) -> None:
+		"""	Initialize the middleware.
+
+			Args:
+				storageCls: The class of the underlying storage.
+				flushOperations: Number of changes after which the data is written to the underlying storage.
+		"""
+		super().__init__(storageCls)
+		self.WRITE_CACHE_SIZE = flushOperations
+
+
+#########################################################################
+#
+#	DB class that implements the TinyDB binding
+#
+#	This class may be moved later to an own module.
+
+
+class TinyDBBinding(object):
+
+	def __init__(self, path:str = None, postfix:str = '') -> None:
+		self.path = path
+		self.cacheSize = Configuration.get('db.cacheSize')
+		L.isInfo and L.log(f'Cache Size: {self.cacheSize:d}')
+
+		# create transaction locks. 
+		# Read operations use shared read locks and can run in parallel, write operations use exclusive write locks.
+		self.lockResources				= ReadWriteLock()
+		self.lockIdentifiers			= ReadWriteLock()
+		self.lockSubscriptions			= ReadWriteLock()
+		self.lockBatchNotifications		= ReadWriteLock()
+		self.lockStatistics 			= ReadWriteLock()
+
+		# file names
+		self.fileResources				= f'{self.path}/resources{postfix}.json'
+		self.fileIdentifiers			= f'{self.path}/identifiers{postfix}.json'
+		self.fileSubscriptions			= f'{self.path}/subscriptions{postfix}.json'
+		self.fileBatchNotifications		= f'{self.path}/batchNotifications{postfix}.json'
+		self.fileStatistics				= f'{self.path}/statistics{postfix}.json'
+
+		# All databases/tables will use the smart query cache
+		if Configuration.get('db.inMemory'):
+			L.isInfo and L.log('DB in memory')
+			self.dbResources 			= SynchronizedTinyDB(storage = MemoryStorage)
+			self.dbIdentifiers 			= SynchronizedTinyDB(storage = MemoryStorage)
+			self.dbSubscriptions 		= SynchronizedTinyDB(storage = MemoryStorage)
+			self.dbBatchNotifications	= SynchronizedTinyDB(storage = MemoryStorage)
+			self.dbStatistics			= SynchronizedTinyDB(storage = MemoryStorage)
+		else:
+			L.isInfo and L.log('DB in file system')
+			# Resources and identifiers are kept in memory. Changes are written to append-only logs
+			compactionThreshold			= Configuration.get('db.compactionThreshold')
+			# With group commits changes are written to disk only after a number of operations, or by the background flusher
+			flushOperations				= Configuration.get('db.groupCommitOperations') if Configuration.get('db.groupCommitInterval') > 0 else 1
+			self.dbResources 			= SynchronizedTinyDB(self.fileResources, storage = AppendLogStorage, compactionThreshold = compactionThreshold, flushOperations = flushOperations)
+			self.dbIdentifiers 			= SynchronizedTinyDB(self.fileIdentifiers, storage = AppendLogStorage, compactionThreshold = compactionThreshold, flushOperations = flushOperations)
+			# The other databases are read from memory as well, so that parallel reads don't share a file handle.
+			# Without group commits every change is written through to the file.
+			self.dbSubscriptions 		= SynchronizedTinyDB(self.fileSubscriptions, storage = GroupCommitMiddleware(JSONStorage, flushOperations))
+			self.dbBatchNotifications 	= SynchronizedTinyDB(self.fileBatchNotifications, storage = GroupCommitMiddleware(JSONStorage, flushOperations))
+			self.dbStatistics 			= SynchronizedTinyDB(self.fileStatistics, storage = GroupCommitMiddleware(JSONStorage, flushOperations))
+		
+		# Open/Create tables
+		self.tabResources 				= self.dbResources.table('resources', cache_size = self.cacheSize)
+		self.tabIdentifiers 			= self.dbIdentifiers.table('identifiers', cache_size = self.cacheSize)
+		self.tabSubscriptions 			= self.dbSubscriptions.table('subsriptions', cache_size = self.cacheSize)
+		self.tabBatchNotifications 		= self.dbBatchNotifications.table('batchNotifications', cache_size = self.cacheSize)
+		self.tabStatistics 				= self.dbStatistics.table('statistics', cache_size = self.cacheSize)
+
+		# Create the Queries
+		self.resourceQuery 				= Query()
+		self.identifierQuery 			= Query()
+		self.subscriptionQuery			= Query()
+		self.batchNotificationQuery 	= Query()
+
+		# Build the in-memory indexes
+		self.indexResources				= DocumentIndex(self.tabResources, [ 'ri', 'ty', 'aei', 'csi' ])
+		self.indexChildren				= ChildIndex(self.tabResources)
+		self.indexTimestamps			= { attribute: TimestampIndex(self.tabResources, attribute) for attribute in [ 'ct', 'et' ] }
+		self.resourceIndexes:list[DocumentIndex|ChildIndex|TimestampIndex] = [ self.indexResources, self.indexChildren, *self.indexTimestamps.values() ]
+		# Lookups by ri or srn are served by the Storage's IdentifierRegistry. Only the document IDs
+		# of the identifier documents are kept here, so that they can be updated and removed directly.
+		self.identifierDocIDs:dict[str, int] = { doc['ri']: doc.doc_id for doc in self.tabIdentifiers.all() }
+
+
+	def _logDocument(self, table:Table, docID:int) -> None:
+		"""	Persist the current state of a document if the table is stored in an append-only log.
+
+			Args:
+				table: The table that contains the document.
+				docID: The document's ID. If the document doesn't exist anymore then its removal is logged.
+		"""
+		if isinstance(storage := table.storage, AppendLogStorage):
+			storage.logDocument(table.name, docID, table.get(doc_id = docID))
+
+
+	def _compact(self, table:Table) -> None:
+		"""	Compact the append-only log of a table into its snapshot file.
+		"""
+		if isinstance(storage := table.storage, AppendLogStorage):
+			storage.compact()
+
+
+	def flush(self) -> None:
+		"""	Write pending changes of all databases to disk.
+		"""
+		for db, lock in [ (self.dbResources, self.lockResources),
+						  (self.dbIdentifiers, self.lockIdentifiers),
+						  (self.dbSubscriptions, self.lockSubscriptions),
+						  (self.dbBatchNotifications, self.lockBatchNotifications),
+						  (self.dbStatistics, self.lockStatistics) ]:
+			if isinstance(storage := db.storage, (AppendLogStorage, CachingMiddleware)):
+				with WriteRWLock(lock):
+					storage.flush()
+
+
+	def closeDB(self) -> None:
+		L.isInfo and L.log('Closing DBs')
+		with WriteRWLock(self.lockResources):
+			self.dbResources.close()
+		with WriteRWLock(self.lockIdentifiers):
+			self.dbIdentifiers.close()
+		with WriteRWLock(self.lockSubscriptions):
+			self.dbSubscriptions.close()
+		with WriteRWLock(self.lockBatchNotifications):
+			self.dbBatchNotifications.close()
+		with WriteRWLock(self.lockStatistics):
+			self.dbStatistics.close()
+
+
+	def purgeDB(self) -> None:
+		L.isInfo and L.log('Purging DBs')
+		with WriteRWLock(self.lockResources):
+			self.tabResources.truncate()
+			for index in self.resourceIndexes:
+				index.clear()
+			self._compact(self.tabResources)
+		with WriteRWLock(self.lockIdentifiers):
+			self.tabIdentifiers.truncate()
+			self.identifierDocIDs.clear()
+			self._compact(self.tabIdentifiers)
+		self.tabSubscriptions.truncate()
+		self.tabBatchNotifications.truncate()
+		self.tabStatistics.truncate()
+	
+
+	def backupDB(self, dir:str) -> bool:
+		with WriteRWLock(self.lockResources):
+			self._compact(self.tabResources)
+			shutil.copy2(self.fileResources, dir)
+		with WriteRWLock(self.lockIdentifiers):
+			self._compact(self.tabIdentifiers)
+			shutil.copy2(self.fileIdentifiers, dir)
+		shutil.copy2(self.fileSubscriptions, dir)
+		shutil.copy2(self.fileBatchNotifications, dir)
+		shutil.copy2(self.fileStatistics, dir)
+		return True
+
+
+	#
+	#	Resources
+	#
+
+
+	def _indexAddResource(self, docID:int, doc:JSON) -> None:
+		for index in self.resourceIndexes:
+			index.add(docID, doc)
+
+
+	def _indexUpdateResource(self, docID:int, oldDoc:JSON, newDoc:JSON) -> None:
+		for index in self.resourceIndexes:
+			index.update(docID, oldDoc, newDoc)
+
+
+	def _indexRemoveResource(self, docID:int, doc:JSON) -> None:
+		for index in self.resourceIndexes:
+			index.remove(docID, doc)
+
+
+	def insertResource(self, resource: Resource) -> None:
+		with WriteRWLock(self.lockResources):
+			docID = self.tabResources.insert(resource.dict.snapshot())	# The resource copies shared values before changing them
+			self._indexAddResource(docID, resource.dict)
+			self._logDocument(self.tabResources, docID)
+	
+
+	def upsertResource(self, resource: Resource) -> None:
+		#L.logDebug(resource)
+		with WriteRWLock(self.lockResources):
+			# Update existing or insert new when overwriting
+			if (docIDs := self.indexResources.docIDs('ri', resource.ri)):
+				docID = docIDs[0]
+				oldDoc = self.tabResources.get(doc_id = docID)
+				self.tabResources.update(resource.dict.snapshot(), doc_ids = [ docID ])
+				self._indexUpdateResource(docID, oldDoc, self.tabResources.get(doc_id = docID))
+			else:
+				docID = self.tabResources.insert(resource.dict.snapshot())
+				self._indexAddResource(docID, resource.dict)
+			self._logDocument(self.tabResources, docID)
+	
+
+	def updateResource(self, resource: Resource) -> Resource:
+		#L.logDebug(resource)
+		with WriteRWLock(self.lockResources):
+			if not (docIDs := self.indexResources.docIDs('ri', resource.ri)):
+				return resource
+			docID = docIDs[0]
+			oldDoc = self.tabResources.get(doc_id = docID)
+
+			def _update(doc:JSON) -> None:
+				doc.update(resource.dict.snapshot())
+				# remove nullified fields from db 
+				for k, v in resource.dict.items():
+					if v is None:	# only remove the real None attributes, not those with 0
+						del doc[k]
+
+			self.tabResources.update(_update, doc_ids = [ docID ])	# type: ignore [arg-type]
+			self._indexUpdateResource(docID, oldDoc, self.tabResources.get(doc_id = docID))
+			self._logDocument(self.tabResources, docID)
+
+			# remove nullified fields from the resource. Don't read the values with [], which would copy them
+			for k in [ k for k, v in dict.items(resource.dict) if v is None ]:
+				del resource.dict[k]
+			return resource
+
+
+	def deleteResource(self, resource: Resource) -> None:
+		with WriteRWLock(self.lockResources):
+			for docID in self.indexResources.docIDs('ri', resource.ri):
+				if (doc := self.tabResources.get(doc_id = docID)) is not None:
+					self._indexRemoveResource(docID, doc)
+				self.tabResources.remove(doc_ids = [ docID ])
+				self._logDocument(self.tabResources, docID)
+	
+
+	def searchResources(self, ri:str = None, csi:str = None, srn:str = None, pi:str = None, ty:int = None, aei:str = None) -> list[Document]:
+		if not srn:
+			with ReadRWLock(self.lockResources):
+				if ri:
+					return self.indexResources.search('ri', ri)
+				elif csi:
+					return self.indexResources.search('csi', csi)
+				elif pi:
+					return [ doc	for childRI in self.indexChildren.childRIs(pi, ty)	# ty is an int or None
+									for doc in self.indexResources.search('ri', childRI) ]
+				elif ty is not None:	# ty is an int
+					return self.indexResources.search('ty', ty)
+				elif aei:
+					return self.indexResources.search('aei', aei)
+		
+		else:
+			# for SRN find the ri first and then try again recursively (outside the lock!!)
+			if len((identifiers := self.searchIdentifiers(srn=srn))) == 1:
+				return self.searchResources(ri=identifiers[0]['ri'])
+
+		return []
+
+
+	def discoverResourcesByFilter(self, func:Callable[[JSON], bool]) -> list[Document]:
+		with ReadRWLock(self.lockResources):
+			return self.tabResources.search(func)	# type: ignore [arg-type]
+
+
+	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
+		if not srn:
+			with ReadRWLock(self.lockResources):
+				if ri:
+					return self.indexResources.contains('ri', ri)
+				elif csi :
+					return self.indexResources.contains('csi', csi)
+				elif ty is not None:	# ty is an int
+					return self.indexResources.contains('ty', ty)
+		else:
+			# find the ri first and then try again recursively
+			if len((identifiers := self.searchIdentifiers(srn=srn))) == 1:
+				return self.hasResource(ri = identifiers[0]['ri'])
+		return False
+
+
+	def countResources(self) -> int:
+		with ReadRWLock(self.lockResources):
+			return len(self.tabResources)
+
+
+	def searchLatestOldestChildRI(self, pi:str, ty:int, oldest:bool = False) -> str:
+		with ReadRWLock(self.lockResources):
+			return self.indexChildren.oldestLatestChildRI(pi, ty, oldest)
+
+
+	def searchExpiredResources(self, et:str) -> list[Document]:
+		with ReadRWLock(self.lockResources):
+			return [ doc	for ri in self.indexTimestamps['et'].search(before = et)
+							for doc in self.indexResources.search('ri', ri) ]
+
+
+	def nextExpirationTime(self) -> str:
+		with ReadRWLock(self.lockResources):
+			return self.indexTimestamps['et'].first()
+
+
+	def countResourcesByTypes(self, tys:list[int]) -> int:
+		with ReadRWLock(self.lockResources):
+			return sum([ self.indexResources.count('ty', ty) for ty in tys ])
+
+
+	def searchResourceIDsByTypes(self, tys:list[int]) -> list[str]:
+		with ReadRWLock(self.lockResources):
+			return [ doc['ri'] for ty in tys for doc in self.indexResources.search('ty', ty) ]
+
+
+	def countResourcesByTimestamp(self, attribute:str, before:str = None, after:str = None) -> int:
+		with ReadRWLock(self.lockResources):
+			return self.indexTimestamps[attribute].count(before, after)
+
+
+	def searchResourceIDsByTimestamp(self, attribute:str, before:str = None, after:str = None) -> list[str]:
+		with ReadRWLock(self.lockResources):
+			return self.indexTimestamps[attribute].search(before, after)
+
+
+	def countChildResources(self, pi:str, ty:int = None) -> int:
+		with ReadRWLock(self.lockResources):
+			return self.indexChildren.count(pi, ty)
+
+
+	def countChildResourcesByType(self, pi:str) -> dict[int, int]:
+		with ReadRWLock(self.lockResources):
+			return self.indexChildren.countByType(pi)
+
+
+	def countChildResourcesAndSizes(self, pi:str, ty:int) -> Tuple[int, int]:
+		with ReadRWLock(self.lockResources):
+			return (self.indexChildren.count(pi, ty), self.indexChildren.contentSize(pi, ty))
+
+
+	def searchChildRIs(self, pi:str) -> list[str]:
+		with ReadRWLock(self.lockResources):
+			return self.indexChildren.childRIs(pi)
+
+
+	def addFragmentIndex(self, attributes:Tuple[str, ...]) -> None:
+		"""	Add an index for `searchByFragment()` to the in-memory resource indexes.
+
+			Args:
+				attributes: Names of the indexed resource attributes.
+		"""
+		with WriteRWLock(self.lockResources):
+			self.indexResources.addKey(attributes[0] if len(attributes) == 1 else attributes)
+
+
+	def searchByFragment(self, dct:dict) -> list[Document]:
+		""" Search and return all resources that match the given dictionary/document. 
+		
+			If an in-memory index applies to the fragment then only the indexed documents are matched.
+		"""
+		with ReadRWLock(self.lockResources):
+			key, value = self.indexResources.keyFor(dct)
+			if key is None:
+				return self.tabResources.search(self.resourceQuery.fragment(dct))
+			return [ doc	for doc in self.indexResources.search(key, value)
+							if all(k in doc and doc[k] == v for k, v in dct.items()) ]
+
+	#
+	#	Identifiers
+	#
+
+
+	def insertIdentifier(self, resource:Resource, ri:str, srn:str) -> None:
+		# L.isDebug and L.logDebug({'ri' : ri, 'rn' : resource.rn, 'srn' : srn, 'ty' : resource.ty})		
+		with WriteRWLock(self.lockIdentifiers):
+			identifier = {	'ri' : ri, 
+							'rn' : resource.rn, 
+							'srn' : srn,
+							'ty' : resource.ty 
+						 }
+			if (docID := self.identifierDocIDs.get(ri)) is not None:
+				self.tabIdentifiers.update(identifier, doc_ids = [ docID ])
+			else:
+				docID = self.identifierDocIDs[ri] = self.tabIdentifiers.insert(identifier)
+			self._logDocument(self.tabIdentifiers, docID)
 
 
 	def deleteIdentifier(self, resource:Resource) -> None:
-		with self.lockIdentifiers:
-			self.tabIdentifiers.remove(self.identifierQuery.ri == resource.ri)
+		with WriteRWLock(self.lockIdentifiers):
+			if (docID := self.identifierDocIDs.pop(resource.ri, None)) is not None:
+				self.tabIdentifiers.remove(doc_ids = [ docID ])
+				self._logDocument(self.tabIdentifiers, docID)
 
 
 	def searchIdentifiers(self, ri:str = None, srn:str = None) -> list[Document]:
 		"""	Search for an resource ID OR for a structured name in the identifiers DB.
 
 			Either *ri* or *srn* shall be given. If both are given then *srn*
-			is taken.
+			is taken. If none is given then all identifier documents are returned.
 		
 			Args:
 				ri: Resource ID to search for.
@@ -538,12 +1751,12 @@ class TinyDBBinding(object):
 			Return:
 				A list of found identifier documents (see `insertIdentifier`), or an empty list if not found.
 		 """
-		with self.lockIdentifiers:
+		with ReadRWLock(self.lockIdentifiers):
 			if srn:
 				return self.tabIdentifiers.search(self.identifierQuery.srn == srn)
 			elif ri:
 				return self.tabIdentifiers.search(self.identifierQuery.ri == ri)
-			return []
+			return self.tabIdentifiers.all()
 
 
 	#
@@ -552,16 +1765,16 @@ class TinyDBBinding(object):
 
 
 	def searchSubscriptions(self, ri:str=None, pi:str=None) -> list[Document]:
-		with self.lockSubscriptions:
+		with ReadRWLock(self.lockSubscriptions):
 			if ri:
 				return self.tabSubscriptions.search(self.subscriptionQuery.ri == ri)
 			if pi:
 				return self.tabSubscriptions.search(self.subscriptionQuery.pi == pi)
-			return None
+			return self.tabSubscriptions.all()
 
 
 	def upsertSubscription(self, subscription:Resource) -> bool:
-		with self.lockSubscriptions:
+		with WriteRWLock(self.lockSubscriptions):
 			ri = subscription.ri
 			return self.tabSubscriptions.upsert(
 					{	'ri'  : ri, 
@@ -581,7 +1794,7 @@ class TinyDBBinding(object):
 
 
 	def removeSubscription(self, subscription:Resource) -> bool:
-		with self.lockSubscriptions:
+		with WriteRWLock(self.lockSubscriptions):
 			return len(self.tabSubscriptions.remove(self.subscriptionQuery.ri == subscription.ri)) > 0
 
 
@@ -590,7 +1803,7 @@ class TinyDBBinding(object):
 	#
 
 	def addBatchNotification(self, ri:str, nu:str, notificationRequest:JSON) -> bool:
-		with self.lockBatchNotifications:
+		with WriteRWLock(self.lockBatchNotifications):
 			return self.tabBatchNotifications.insert(
 					{	'ri' 		: ri,
 						'nu' 		: nu,
@@ -600,17 +1813,27 @@ class TinyDBBinding(object):
 
 
 	def countBatchNotifications(self, ri:str, nu:str) -> int:
-		with self.lockBatchNotifications:
+		with ReadRWLock(self.lockBatchNotifications):
 			return self.tabBatchNotifications.count((self.batchNotificationQuery.ri == ri) & (self.batchNotificationQuery.nu == nu))
 
 
-	def getBatchNotifications(self, ri:str, nu:str) -> list[Document]:
-		with self.lockBatchNotifications:
+	def getBatchNotifications(self, ri:str = None, nu:str = None) -> list[Document]:
+		with ReadRWLock(self.lockBatchNotifications):
+			if ri is None:
+				return self.tabBatchNotifications.all()
 			return self.tabBatchNotifications.search((self.batchNotificationQuery.ri == ri) & (self.batchNotificationQuery.nu == nu))
 
 
+	def replaceBatchNotifications(self, notifications:list[JSON]) -> bool:
+		with WriteRWLock(self.lockBatchNotifications):
+			self.tabBatchNotifications.truncate()
+			if notifications:
+				self.tabBatchNotifications.insert_multiple(notifications)
+			return True
+
+
 	def removeBatchNotifications(self, ri:str, nu:str) -> bool:
-		with self.lockBatchNotifications:
+		with WriteRWLock(self.lockBatchNotifications):
 			return len(self.tabBatchNotifications.remove((self.batchNotificationQuery.ri == ri) & (self.batchNotificationQuery.nu == nu))) > 0
 
 
@@ -619,14 +1842,14 @@ class TinyDBBinding(object):
 	#
 
 	def searchStatistics(self) -> JSON:
-		with self.lockStatistics:
+		with ReadRWLock(self.lockStatistics):
 			stats = self.tabStatistics.get(doc_id = 1)
 			# return stats if stats is not None and len(stats) > 0 else None
 			return stats if stats else None
 
 
 	def upsertStatistics(self, stats:JSON) -> bool:
-		with self.lockStatistics:
+		with WriteRWLock(self.lockStatistics):
 			if len(self.tabStatistics) > 0:
 				return self.tabStatistics.update(stats, doc_ids = [1]) is not None
 			else:
@@ -636,6 +1859,541 @@ class TinyDBBinding(object):
 	def purgeStatistics(self) -> None:
 		"""	Purge the statistics DB.
 		"""
-		with self.lockStatistics:
+		with WriteRWLock(self.lockStatistics):
 			self.tabStatistics.truncate()
 
+
+
+
+#########################################################################
+#
+#	DB class that implements the SQLite binding
+#
+#	Resources, subscriptions and statistics are stored as JSON documents. The
+#	attributes that are used for lookups are stored in additional, indexed columns.
+
+
+class SQLiteBinding(object):
+
+	resourceColumns = [ 'ri', 'pi', 'ty', 'aei', 'csi', 'ct', 'et', 'cs' ]
+	"""	Resource attributes that are stored in their own, indexed columns. """
+
+	readerPoolSize = 8
+	"""	Maximum number of connections for readers. Further readers wait until a connection is returned. """
+
+	def __init__(self, path:str = None, postfix:str = '') -> None:
+		self.path = path
+		self.inMemory = Configuration.get('db.inMemory')
+
+		# All write operations are serialized and use the same connection. 
+		# Readers take a connection from a bounded pool and don't lock
+		self.lockWrite = Lock()
+
+		# Attribute combinations that are indexed for searchByFragment()
+		self.fragmentIndexes:list[Tuple[str, ...]] = []
+
+		# Pool of reader connections. The connections are created on demand and reused by 
+		# all threads, e.g. the short-lived threads of the http server
+		self.lockConnections = Lock()
+		self.readerSlots = threading.BoundedSemaphore(self.readerPoolSize)
+		self.idleConnections:list[sqlite3.Connection] = []
+		self.connections:list[sqlite3.Connection] = []
+
+		# file names
+		self.fileDB = f'{self.path}/acme{postfix}.db'
+
+		if self.inMemory:
+			L.isInfo and L.log('DB in memory')
+			# All connections share the same named in-memory database
+			self.uri = f'file:acme{postfix}?mode=memory&cache=shared'
+		else:
+			L.isInfo and L.log('DB in file system')
+			self.uri = f'file:{self.fileDB}'
+
+		# Create the write connection, and the tables and indexes. The write connection also keeps an in-memory DB alive
+		with self.lockWrite:
+			self.writeConnection = self._connect()
+			if not self.inMemory:
+				# The journal mode is persistent in the database file. It only needs to be set once
+				self.writeConnection.execute('PRAGMA journal_mode = WAL')
+				self.writeConnection.execute('PRAGMA synchronous = NORMAL')
+			self.writeConnection.executescript("""
+				CREATE TABLE IF NOT EXISTS resources (ri TEXT PRIMARY KEY, pi TEXT, ty INTEGER, aei TEXT, csi TEXT, ct TEXT, et TEXT, cs INTEGER, doc TEXT NOT NULL);
+				CREATE INDEX IF NOT EXISTS resourcesEt ON resources (et) WHERE et IS NOT NULL;
+				CREATE INDEX IF NOT EXISTS resourcesCt ON resources (ct);
+				CREATE INDEX IF NOT EXISTS resourcesPiCt ON resources (pi, ct);
+				CREATE INDEX IF NOT EXISTS resourcesPiTyCt ON resources (pi, ty, ct);
+				CREATE INDEX IF NOT EXISTS resourcesPiTyCs ON resources (pi, ty, cs);
+				CREATE INDEX IF NOT EXISTS resourcesTy ON resources (ty);
+				CREATE INDEX IF NOT EXISTS resourcesAei ON resources (aei);
+				CREATE INDEX IF NOT EXISTS resourcesCsi ON resources (csi);
+
+				CREATE TABLE IF NOT EXISTS identifiers (ri TEXT PRIMARY KEY, rn TEXT, srn TEXT, ty INTEGER);
+				CREATE INDEX IF NOT EXISTS identifiersSrn ON identifiers (srn);
+
+				CREATE TABLE IF NOT EXISTS subscriptions (ri TEXT PRIMARY KEY, pi TEXT, doc TEXT NOT NULL);
+				CREATE INDEX IF NOT EXISTS subscriptionsPi ON subscriptions (pi);
+
+				CREATE TABLE IF NOT EXISTS batchNotifications (id INTEGER PRIMARY KEY, ri TEXT, nu TEXT, tstamp REAL, request TEXT);
+				CREATE INDEX IF NOT EXISTS batchNotificationsRiNu ON batchNotifications (ri, nu);
+
+				CREATE TABLE IF NOT EXISTS statistics (id INTEGER PRIMARY KEY, doc TEXT NOT NULL);
+			""")
+
+
+	def _connect(self) -> sqlite3.Connection:
+		"""	Open a new connection to the database.
+
+			Return:
+				The new connection.
+		"""
+		connection = sqlite3.connect(self.uri, uri = True, isolation_level = None, check_same_thread = False)
+		if self.inMemory:
+			connection.execute('PRAGMA read_uncommitted = true')
+		connection.execute('PRAGMA busy_timeout = 5000')
+		with self.lockConnections:
+			self.connections.append(connection)
+		return connection
+
+
+	@contextmanager
+	def _reader(self) -> Iterator[sqlite3.Connection]:
+		"""	Borrow a reader connection from the pool, and return it to the pool afterwards.
+			A new connection is only opened if no idle connection is available and the pool 
+			is not exhausted. Otherwise the caller waits for a connection.
+
+			Return:
+				A reader connection, for use in a *with* statement.
+		"""
+		with self.readerSlots:
+			with self.lockConnections:
+				connection = self.idleConnections.pop() if self.idleConnections else None
+			if connection is None:
+				connection = self._connect()
+			try:
+				yield connection
+			finally:
+				with self.lockConnections:
+					if connection in self.connections:	# Not closed in the meantime
+						self.idleConnections.append(connection)
+
+
+	def _query(self, sql:str, parameters:tuple = ()) -> list[tuple]:
+		"""	Execute a query on a pooled reader connection and return all rows.
+		"""
+		with self._reader() as connection:
+			return connection.execute(sql, parameters).fetchall()
+
+
+	def _resourceRow(self, doc:JSON) -> tuple:
+		"""	Return the column values for a resource document, followed by the encoded document.
+		"""
+		return (doc.get('ri'), 
+				doc.get('pi'), 
+				int(ty) if (ty := doc.get('ty')) is not None else None, 
+				doc.get('aei'), 
+				doc.get('csi'), 
+				doc.get('ct'),
+				doc.get('et') or None,
+				doc.get('cs'),
+				json.dumps(doc))
+
+
+	def flush(self) -> None:
+		"""	Nothing to do. Changes are committed by SQLite.
+		"""
+		pass
+
+
+	def closeDB(self) -> None:
+		L.isInfo and L.log('Closing DBs')
+		with self.lockWrite, self.lockConnections:
+			for connection in self.connections:
+				connection.close()
+			self.connections.clear()
+			self.idleConnections.clear()
+
+
+	def purgeDB(self) -> None:
+		L.isInfo and L.log('Purging DBs')
+		with self.lockWrite:
+			self.writeConnection.executescript("""
+				BEGIN;
+				DELETE FROM resources;
+				DELETE FROM identifiers;
+				DELETE FROM subscriptions;
+				DELETE FROM batchNotifications;
+				DELETE FROM statistics;
+				COMMIT;
+			""")
+	
+
+	def backupDB(self, dir:str) -> bool:
+		if self.inMemory:
+			return True
+		backup = sqlite3.connect(f'{dir}/{os.path.basename(self.fileDB)}')
+		try:
+			with self.lockWrite:
+				self.writeConnection.backup(backup)
+		finally:
+			backup.close()
+		return True
+
+
+	#
+	#	Resources
+	#
+
+
+	def insertResource(self, resource: Resource) -> None:
+		with self.lockWrite:
+			self.writeConnection.execute('INSERT INTO resources (ri, pi, ty, aei, csi, ct, et, cs, doc) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', self._resourceRow(resource.dict))
+	
+
+	def upsertResource(self, resource: Resource) -> None:
+		#L.logDebug(resource)
+		with self.lockWrite:
+			# Update existing or insert new when overwriting
+			if (rows := self.writeConnection.execute('SELECT doc FROM resources WHERE ri = ?', (resource.ri, )).fetchall()):
+				doc = json.loads(rows[0][0])
+				doc.update(resource.dict)
+				self.writeConnection.execute('UPDATE resources SET ri = ?, pi = ?, ty = ?, aei = ?, csi = ?, ct = ?, et = ?, cs = ?, doc = ? WHERE ri = ?', self._resourceRow(doc) + (resource.ri, ))
+			else:
+				self.writeConnection.execute('INSERT INTO resources (ri, pi, ty, aei, csi, ct, et, cs, doc) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', self._resourceRow(resource.dict))
+	
+
+	def updateResource(self, resource: Resource) -> Resource:
+		#L.logDebug(resource)
+		with self.lockWrite:
+			ri = resource.ri
+			if (rows := self.writeConnection.execute('SELECT doc FROM resources WHERE ri = ?', (ri, )).fetchall()):
+				doc = json.loads(rows[0][0])
+				doc.update(resource.dict)
+				# remove nullified fields from db
+				for k, v in resource.dict.items():
+					if v is None:	# only remove the real None attributes, not those with 0
+						del doc[k]
+				self.writeConnection.execute('UPDATE resources SET ri = ?, pi = ?, ty = ?, aei = ?, csi = ?, ct = ?, et = ?, cs = ?, doc = ? WHERE ri = ?', self._resourceRow(doc) + (ri, ))
+
+		# remove nullified fields from the resource. Don't read the values with [], which would copy them
+		for k in [ k for k, v in dict.items(resource.dict) if v is None ]:
+			del resource.dict[k]
+		return resource
+
+
+	def deleteResource(self, resource: Resource) -> None:
+		with self.lockWrite:
+			self.writeConnection.execute('DELETE FROM resources WHERE ri = ?', (resource.ri, ))
+	
+
+	def searchResources(self, ri:str = None, csi:str = None, srn:str = None, pi:str = None, ty:int = None, aei:str = None) -> list[JSON]:
+		if not srn:
+			if ri:
+				rows = self._query('SELECT doc FROM resources WHERE ri = ?', (ri, ))
+			elif csi:
+				rows = self._query('SELECT doc FROM resources WHERE csi = ? ORDER BY rowid', (csi, ))
+			elif pi:
+				# Child resources are ordered by their creation time
+				if ty is not None:	# ty is an int
+					rows = self._query('SELECT doc FROM resources WHERE pi = ? AND ty = ? ORDER BY ct, ri', (pi, int(ty)))
+				else:
+					rows = self._query('SELECT doc FROM resources WHERE pi = ? ORDER BY ct, ty, ri', (pi, ))
+			elif ty is not None:	# ty is an int
+				rows = self._query('SELECT doc FROM resources WHERE ty = ? ORDER BY rowid', (int(ty), ))
+			elif aei:
+				rows = self._query('SELECT doc FROM resources WHERE aei = ? ORDER BY rowid', (aei, ))
+			else:
+				return []
+			return [ json.loads(row[0]) for row in rows ]
+		
+		# for SRN find the ri first and then try again recursively
+		if len((identifiers := self.searchIdentifiers(srn = srn))) == 1:
+			return self.searchResources(ri = identifiers[0]['ri'])
+		return []
+
+
+	def discoverResourcesByFilter(self, func:Callable[[JSON], bool]) -> list[JSON]:
+		return [ doc	for row in self._query('SELECT doc FROM resources ORDER BY rowid')
+						if func(doc := json.loads(row[0])) ]
+
+
+	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
+		if not srn:
+			if ri:
+				return len(self._query('SELECT 1 FROM resources WHERE ri = ? LIMIT 1', (ri, ))) > 0
+			elif csi :
+				return len(self._query('SELECT 1 FROM resources WHERE csi = ? LIMIT 1', (csi, ))) > 0
+			elif ty is not None:	# ty is an int
+				return len(self._query('SELECT 1 FROM resources WHERE ty = ? LIMIT 1', (int(ty), ))) > 0
+		else:
+			# find the ri first and then try again recursively
+			if len((identifiers := self.searchIdentifiers(srn = srn))) == 1:
+				return self.hasResource(ri = identifiers[0]['ri'])
+		return False
+
+
+	def countResources(self) -> int:
+		return self._query('SELECT COUNT(*) FROM resources')[0][0]
+
+
+	def searchLatestOldestChildRI(self, pi:str, ty:int, oldest:bool = False) -> str:
+		if oldest:
+			rows = self._query('SELECT ri FROM resources WHERE pi = ? AND ty = ? ORDER BY ct, ri LIMIT 1', (pi, int(ty)))
+		else:
+			rows = self._query('SELECT ri FROM resources WHERE pi = ? AND ty = ? ORDER BY ct DESC, ri DESC LIMIT 1', (pi, int(ty)))
+		return rows[0][0] if rows else None
+
+
+	def searchExpiredResources(self, et:str) -> list[Document]:
+		return [ json.loads(row[0]) for row in self._query('SELECT doc FROM resources WHERE et IS NOT NULL AND et < ? ORDER BY et', (et, )) ]
+
+
+	def nextExpirationTime(self) -> str:
+		return self._query('SELECT MIN(et) FROM resources WHERE et IS NOT NULL')[0][0]
+
+
+	def countResourcesByTypes(self, tys:list[int]) -> int:
+		return self._query(f'SELECT COUNT(*) FROM resources WHERE ty IN ({", ".join("?" * len(tys))})', tuple(tys))[0][0]
+
+
+	def searchResourceIDsByTypes(self, tys:list[int]) -> list[str]:
+		return [ row[0] for row in self._query(f'SELECT ri FROM resources WHERE ty IN ({", ".join("?" * len(tys))})', tuple(tys)) ]
+
+
+	def countResourcesByTimestamp(self, attribute:str, before:str = None, after:str = None) -> int:
+		where, args = self._timestampCondition(attribute, before, after)
+		return self._query(f'SELECT COUNT(*) FROM resources WHERE {where}', args)[0][0]
+
+
+	def searchResourceIDsByTimestamp(self, attribute:str, before:str = None, after:str = None) -> list[str]:
+		where, args = self._timestampCondition(attribute, before, after)
+		return [ row[0] for row in self._query(f'SELECT ri FROM resources WHERE {where} ORDER BY {attribute}, ri', args) ]
+
+
+	def _timestampCondition(self, attribute:str, before:str, after:str) -> Tuple[str, tuple]:
+		"""	Return the WHERE condition and its arguments for a search by the *ct* or *et* column.
+		"""
+		if attribute not in ('ct', 'et'):
+			raise ValueError(f'not a timestamp column: {attribute}')
+		conditions = [ f'{attribute} IS NOT NULL' ]
+		args:list[str] = []
+		if before:
+			conditions.append(f'{attribute} < ?')
+			args.append(before)
+		if after:
+			conditions.append(f'{attribute} > ?')
+			args.append(after)
+		return ' AND '.join(conditions), tuple(args)
+
+
+	def countChildResources(self, pi:str, ty:int = None) -> int:
+		if ty is not None:
+			return self._query('SELECT COUNT(*) FROM resources WHERE pi = ? AND ty = ?', (pi, int(ty)))[0][0]
+		return self._query('SELECT COUNT(*) FROM resources WHERE pi = ?', (pi, ))[0][0]
+
+
+	def countChildResourcesByType(self, pi:str) -> dict[int, int]:
+		return { row[0]: row[1] for row in self._query('SELECT ty, COUNT(*) FROM resources WHERE pi = ? GROUP BY ty', (pi, )) }
+
+
+	def countChildResourcesAndSizes(self, pi:str, ty:int) -> Tuple[int, int]:
+		# Only uses the covering index on (pi, ty, cs)
+		row = self._query('SELECT COUNT(*), TOTAL(cs) FROM resources WHERE pi = ? AND ty = ?', (pi, int(ty)))[0]
+		return (row[0], int(row[1]))
+
+
+	def searchChildRIs(self, pi:str) -> list[str]:
+		return [ row[0] for row in self._query('SELECT ri FROM resources WHERE pi = ? ORDER BY ct, ty, ri', (pi, )) ]
+
+
+	def _fragmentExpression(self, attribute:str) -> str:
+		"""	Return the SQL expression for a resource attribute: either its column, or the
+			attribute extracted from the JSON document.
+		"""
+		return attribute if attribute in self.resourceColumns else f"json_extract(doc, '$.{attribute}')"
+
+
+	def addFragmentIndex(self, attributes:Tuple[str, ...]) -> None:
+		"""	Create an index for `searchByFragment()`. Attributes that are not stored in their own
+			columns are indexed as expressions on the JSON document.
+
+			Args:
+				attributes: Names of the indexed resource attributes.
+		"""
+		if attributes in self.fragmentIndexes:
+			return
+		self.fragmentIndexes.append(attributes)
+		if len(attributes) == 1 and attributes[0] in self.resourceColumns:
+			return	# Already indexed
+		with self.lockWrite:
+			self.writeConnection.execute(f'CREATE INDEX IF NOT EXISTS resourcesFragment_{"_".join(attributes)} ON resources ({", ".join([ self._fragmentExpression(a) for a in attributes ])})')
+
+
+	def searchByFragment(self, dct:dict) -> list[JSON]:
+		""" Search and return all resources that match the given dictionary/document. 
+		
+			Fragment attributes that are stored in their own columns, and the attributes of the
+			largest applicable fragment index, are used to preselect the candidates. All attributes 
+			are then matched against the candidate documents.
+		"""
+		conditions = []
+		parameters = []
+		for k in self.resourceColumns:
+			if k in dct:
+				conditions.append(f'{k} = ?')
+				parameters.append(int(dct[k]) if k == 'ty' else dct[k])
+		indexed:Tuple[str, ...] = ()
+		for attributes in self.fragmentIndexes:
+			if len(attributes) > len(indexed) and all(a in dct and isinstance(dct[a], (str, int, float)) for a in attributes):
+				indexed = attributes
+		for k in indexed:
+			if k not in self.resourceColumns:
+				conditions.append(f'{self._fragmentExpression(k)} = ?')
+				parameters.append(int(dct[k]) if isinstance(dct[k], int) else dct[k])
+		where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+		return [ doc	for row in self._query(f'SELECT doc FROM resources{where} ORDER BY rowid', tuple(parameters))
+						if all(k in (doc := json.loads(row[0])) and doc[k] == v for k, v in dct.items()) ]
+
+
+	#
+	#	Identifiers
+	#
+
+
+	def insertIdentifier(self, resource:Resource, ri:str, srn:str) -> None:
+		# L.isDebug and L.logDebug({'ri' : ri, 'rn' : resource.rn, 'srn' : srn, 'ty' : resource.ty})		
+		with self.lockWrite:
+			self.writeConnection.execute('INSERT INTO identifiers (ri, rn, srn, ty) VALUES (?, ?, ?, ?) ON CONFLICT (ri) DO UPDATE SET rn = excluded.rn, srn = excluded.srn, ty = excluded.ty', 
+									   (ri, resource.rn, srn, int(resource.ty) if resource.ty is not None else None))
+
+
+	def deleteIdentifier(self, resource:Resource) -> None:
+		with self.lockWrite:
+			self.writeConnection.execute('DELETE FROM identifiers WHERE ri = ?', (resource.ri, ))
+
+
+	def searchIdentifiers(self, ri:str = None, srn:str = None) -> list[JSON]:
+		"""	Search for an resource ID OR for a structured name in the identifiers DB.
+
+			Either *ri* or *srn* shall be given. If both are given then *srn*
+			is taken. If none is given then all identifier documents are returned.
+		
+			Args:
+				ri: Resource ID to search for.
+				srn: Structured path to search for.
+			Return:
+				A list of found identifier documents (see `insertIdentifier`), or an empty list if not found.
+		 """
+		if srn:
+			rows = self._query('SELECT ri, rn, srn, ty FROM identifiers WHERE srn = ? ORDER BY rowid', (srn, ))
+		elif ri:
+			rows = self._query('SELECT ri, rn, srn, ty FROM identifiers WHERE ri = ?', (ri, ))
+		else:
+			rows = self._query('SELECT ri, rn, srn, ty FROM identifiers ORDER BY rowid')
+		return [ { 'ri': row[0], 'rn': row[1], 'srn': row[2], 'ty': row[3] } for row in rows ]
+
+
+	#
+	#	Subscriptions
+	#
+
+
+	def searchSubscriptions(self, ri:str=None, pi:str=None) -> list[JSON]:
+		if ri:
+			return [ json.loads(row[0]) for row in self._query('SELECT doc FROM subscriptions WHERE ri = ?', (ri, )) ]
+		if pi:
+			return [ json.loads(row[0]) for row in self._query('SELECT doc FROM subscriptions WHERE pi = ? ORDER BY rowid', (pi, )) ]
+		return [ json.loads(row[0]) for row in self._query('SELECT doc FROM subscriptions ORDER BY rowid') ]
+
+
+	def upsertSubscription(self, subscription:Resource) -> bool:
+		with self.lockWrite:
+			ri = subscription.ri
+			doc = {	'ri'  : ri, 
+					'pi'  : subscription.pi,
+					'nct' : subscription.nct,
+					'net' : subscription['enc/net'],	# TODO perhaps store enc as a whole?
+					'atr' : subscription['enc/atr'],
+					'chty': subscription['enc/chty'],
+					'exc' : subscription.exc,
+					'ln'  : subscription.ln,
+					'nus' : subscription.nu,
+					'bn'  : subscription.bn,
+					'cr'  : subscription.cr,
+					'ma'  : subscription.ma, # EXPERIMENTAL ma = maxAge
+				  }
+			self.writeConnection.execute('INSERT INTO subscriptions (ri, pi, doc) VALUES (?, ?, ?) ON CONFLICT (ri) DO UPDATE SET pi = excluded.pi, doc = excluded.doc', 
+									   (ri, subscription.pi, json.dumps(doc)))
+			return True
+
+
+	def removeSubscription(self, subscription:Resource) -> bool:
+		with self.lockWrite:
+			return self.writeConnection.execute('DELETE FROM subscriptions WHERE ri = ?', (subscription.ri, )).rowcount > 0
+
+
+	#
+	#	BatchNotifications
+	#
+
+	def addBatchNotification(self, ri:str, nu:str, notificationRequest:JSON) -> bool:
+		with self.lockWrite:
+			self.writeConnection.execute('INSERT INTO batchNotifications (ri, nu, tstamp, request) VALUES (?, ?, ?, ?)', 
+									   (ri, nu, DateUtils.utcTime(), json.dumps(notificationRequest)))
+			return True
+
+
+	def countBatchNotifications(self, ri:str, nu:str) -> int:
+		return self._query('SELECT COUNT(*) FROM batchNotifications WHERE ri = ? AND nu = ?', (ri, nu))[0][0]
+
+
+	def getBatchNotifications(self, ri:str = None, nu:str = None) -> list[JSON]:
+		if ri is None:
+			rows = self._query('SELECT ri, nu, tstamp, request FROM batchNotifications ORDER BY id')
+		else:
+			rows = self._query('SELECT ri, nu, tstamp, request FROM batchNotifications WHERE ri = ? AND nu = ? ORDER BY id', (ri, nu))
+		return [ { 'ri': row[0], 'nu': row[1], 'tstamp': row[2], 'request': json.loads(row[3]) } for row in rows ]
+
+
+	def replaceBatchNotifications(self, notifications:list[JSON]) -> bool:
+		with self.lockWrite:
+			connection = self.writeConnection
+			connection.execute('BEGIN')
+			with connection:	# commit, or rollback on an exception
+				connection.execute('DELETE FROM batchNotifications')
+				connection.executemany('INSERT INTO batchNotifications (ri, nu, tstamp, request) VALUES (?, ?, ?, ?)', 
+									   [ (each['ri'], each['nu'], each['tstamp'], json.dumps(each['request'])) for each in notifications ])
+			return True
+
+
+	def removeBatchNotifications(self, ri:str, nu:str) -> bool:
+		with self.lockWrite:
+			return self.writeConnection.execute('DELETE FROM batchNotifications WHERE ri = ? AND nu = ?', (ri, nu)).rowcount > 0
+
+
+	#
+	#	Statistics
+	#
+
+	def searchStatistics(self) -> JSON:
+		if (rows := self._query('SELECT doc FROM statistics WHERE id = 1')):
+			return json.loads(rows[0][0]) or None
+		return None
+
+
+	def upsertStatistics(self, stats:JSON) -> bool:
+		with self.lockWrite:
+			if (rows := self.writeConnection.execute('SELECT doc FROM statistics WHERE id = 1').fetchall()):
+				doc = json.loads(rows[0][0])
+				doc.update(stats)
+				self.writeConnection.execute('UPDATE statistics SET doc = ? WHERE id = 1', (json.dumps(doc), ))
+			else:
+				self.writeConnection.execute('INSERT INTO statistics (id, doc) VALUES (1, ?)', (json.dumps(stats), ))
+			return True
+
+
+	def purgeStatistics(self) -> None:
+		"""	Purge the statistics DB.
+		"""
+		with self.lockWrite:
+			self.writeConnection.execute('DELETE FROM statistics')
@@ -8,9 +8,9 @@
 #
 
 from __future__ import annotations
-from copy import deepcopy
+from dataclasses import dataclass
 import re
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, Tuple
 import isodate
 
 from ..etc.Types import AttributePolicy, ResourceAttributePolicyDict, AttributePolicyDict, BasicType as BT, Cardinality as CAR
@@ -45,10 +45,25 @@ flexContainerSpecializations:FlexContainerSpecializations = {}
 	{ tpe : cnd }
 """
 
+
+@dataclass
+class CompiledValidator:
+	"""	Pre-compiled validation information for the attribute policies of a resource type
+		and a validation type (CREATE, UPDATE, or announced resource).
+	"""
+	attributes:AttributePolicyDict								# The attribute policies this validator was compiled from
+	policies:AttributePolicyDict								# The attribute policies, including flexContainer specialization attributes
+	checks:Dict[str, Tuple[AttributePolicy, Any, Callable[[Any], Result]]]	# attribute name : (policy, request optionality, type checker)
+	mandatory:Tuple[str, ...]									# The mandatory attributes, in policy order
+	notPresent:frozenset[str]									# The attributes that must not be present
+
+
 class Validator(object):
 
 
 	def __init__(self) -> None:
+		self.compiledValidators:Dict[Tuple[int, str, int], CompiledValidator] = {}
+		"""	Compiled validators. { (id(attribute policies), flexContainer tpe, optional index) : CompiledValidator } """
 		if L.isInfo: L.log('Validator initialized')
 
 
@@ -98,59 +113,48 @@ class Validator(object):
 		# if tpe is not None and not tpe.startswith("m2m:"):
 		# 	pureResDict = dct
 
-		attributePolicies = attributes
-		# If this is a flexContainer then add the additional attributePolicies.
-		# We don't want to change the original attributes, so copy it before (only if we add new attributePolicies)
-
-		if ty in [ T.FCNT, T.FCI ] and tpe:
-			if (fca := flexContainerAttributes.get(tpe)) is not None:
-				attributePolicies = deepcopy(attributePolicies)
-				attributePolicies.update(fca)
-			else:
-				L.logWarn(dbg := f'Unknown resource type: {tpe}')
-				return Result.errorResult(dbg = dbg)
+		# Get the compiled validator. For a flexContainer it includes the specialization's attributePolicies.
+		if not (validator := self._getCompiledValidator(attributes, tpe if ty in [ T.FCNT, T.FCI ] else None, optionalIndex)):
+			L.logWarn(dbg := f'Unknown resource type: {tpe}')
+			return Result.errorResult(dbg = dbg)
 
-		# L.logDebug(attributePolicies.items())
 		# L.logWarn(pureResDict)
 		
 		# Check that all attributes have been defined
 		for attributeName in pureResDict.keys():
-			if attributeName not in attributePolicies.keys():
+			if attributeName not in validator.policies:
 				L.logWarn(dbg := f'Unknown attribute: {attributeName} in resource: {tpe}')
 				return Result.errorResult(dbg = dbg)
 
-		for attributeName, policy in attributePolicies.items():
+		# Check the mandatory attributes. 
+		# MA are not checked for announced resources bc they are only present if they are present in the original resource
+		if not isAnnounced:
+			for attributeName in validator.mandatory:
+				if pureResDict.get(attributeName) is None:	# ! might be an int, bool, so we need to check for None
+					L.logWarn(dbg := f'Cannot find mandatory attribute: {attributeName}')
+					return Result.errorResult(dbg = dbg)
+
+		# Only the attributes in the request need to be checked further
+		for attributeName, attributeValue in pureResDict.items():
+			policy, policyOptional, checkType = validator.checks[attributeName]
 			if not policy:
 				L.isWarn and L.logWarn(f'No attribute policy found for attribute: {attributeName}')
 				continue
 
-			# Get the correct tuple for a resource when there are more definitions
-
-			# Used a couple of times below
-			policyOptional = policy.select(optionalIndex)
-
-			# Check whether the attribute is allowed or mandatory in the request
-			if (attributeValue := pureResDict.get(attributeName)) is None:	# ! might be an int, bool, so we need to check for None
+			# Check whether the attribute is allowed in the request
+			if attributeValue is None:	# The attribute is deleted
 
 				# check the the announced cases first
 				if isAnnounced:
-					# MA are not checked bc they are only present if they are present in the original resource
 					continue
-					
-				if policyOptional == RO.M:		# Not okay, this attribute is mandatory but absent
-					L.logWarn(dbg := f'Cannot find mandatory attribute: {attributeName}')
-					return Result.errorResult(dbg = dbg)
 
-				# TODO Is the following actually executed??? Should it be somewhere else? Write a test
-				if attributeName in pureResDict and policy.cardinality == CAR.CAR1: 	# but ignore CAR.car1N (which may be Null/None)
+				if policy.cardinality == CAR.CAR1: 	# but ignore CAR.car1N (which may be Null/None)
 					L.logWarn(dbg := f'Cannot delete a mandatory attribute: {attributeName}')
 					return Result.errorResult(dbg = dbg)
-
-				if policyOptional in [ RO.NP, RO.O ]:		# Okay that the attribute is not in the dict, since it is provided or optional
-					continue
+				continue	# None values are always valid
 			else:
 				if not createdInternally:
-					if policyOptional == RO.NP:
+					if attributeName in validator.notPresent:
 						L.logWarn(dbg := f'Found non-provision attribute: {attributeName}')
 						return Result.errorResult(dbg = dbg)
 
@@ -166,7 +170,7 @@ class Validator(object):
 					return Result.errorResult(dbg = res.dbg)
 
 			# Check whether the value is of the correct type
-			if (res := self._validateType(policy.type, attributeValue, policy = policy)).status:
+			if (res := checkType(attributeValue)).status:
 				# Still some further checks are necessary
 
 				# Check list. May be empty or needs to contain at least one member
@@ -364,6 +368,7 @@ class Validator(object):
 		except Exception as e:
 			L.logErr(str(e))
 			return False
+		self.compiledValidators.clear()
 		return True
 
 
@@ -402,6 +407,7 @@ class Validator(object):
 		"""	Clear the flexContainer attributes.
 		"""
 		flexContainerAttributes.clear()
+		self.compiledValidators.clear()
 
 
 	def addFlexContainerSpecialization(self, tpe:str, cnd:str) -> bool:
@@ -480,6 +486,91 @@ class Validator(object):
 		"""	Clear the attribute policies.
 		"""
 		attributePolicies.clear()
+		self.compiledValidators.clear()
+
+
+	#
+	#	Compiled validators.
+	#
+
+	def compileValidators(self) -> None:
+		"""	Compile the validators for all resource types and flexContainer specializations.
+			This must be called after the attribute policies have been (re)assigned to the resource classes,
+			because the resource classes' attribute policy dictionaries are changed in place.
+		"""
+		from ..resources import Factory	# Avoid circular import
+		self.compiledValidators.clear()
+		for ty in T:
+			if not (rc := Factory.resourceClassByType(ty)) or not (attributes := getattr(rc, '_attributes', None)):
+				continue
+			for tpe in (flexContainerAttributes.keys() if ty in [ T.FCNT, T.FCI ] else [ None ]):
+				for optionalIndex in [ 2, 3, 5 ]:	# create, update, announced
+					self._getCompiledValidator(attributes, tpe, optionalIndex)
+		L.isDebug and L.logDebug(f'Compiled {len(self.compiledValidators)} validators')
+
+
+	def _getCompiledValidator(self, attributes:AttributePolicyDict, fcTpe:str, optionalIndex:int) -> CompiledValidator:
+		"""	Return the compiled validator for attribute policies. Compile it if necessary.
+
+			Args:
+				attributes: The attribute policy dictionary for a resource type.
+				fcTpe: The flexContainer specialization type, or None if the resource is not a flexContainer.
+				optionalIndex: Index of the request optionality in the attribute policies.
+			Return:
+				The compiled validator, or None if `fcTpe` is not a known flexContainer specialization.
+		"""
+		key = (id(attributes), fcTpe, optionalIndex)
+		if (validator := self.compiledValidators.get(key)) and validator.attributes is attributes:
+			return validator
+		
+		policies = attributes
+		# If this is a flexContainer then add the additional attributePolicies. 
+		# We don't want to change the original attributes, so merge them into a new dictionary
+		if fcTpe:
+			if (fca := flexContainerAttributes.get(fcTpe)) is None:
+				return None
+			policies = { **attributes, **fca }
+
+		checks:Dict[str, Tuple[AttributePolicy, Any, Callable[[Any], Result]]] = {}
+		mandatory:list[str] = []
+		notPresent:set[str] = set()
+		for attributeName, policy in policies.items():
+			if not policy:
+				checks[attributeName] = (policy, None, None)
+				continue
+			policyOptional = policy.select(optionalIndex)	# Get the correct tuple for a resource when there are more definitions
+			if policyOptional == RO.M:
+				mandatory.append(attributeName)
+			elif policyOptional == RO.NP:
+				notPresent.add(attributeName)
+			checks[attributeName] = (policy, policyOptional, self._compileTypeCheck(policy))
+
+		validator = CompiledValidator(attributes = attributes, 
+									  policies = policies, 
+									  checks = checks, 
+									  mandatory = tuple(mandatory), 
+									  notPresent = frozenset(notPresent))
+		self.compiledValidators[key] = validator
+		return validator
+
+
+	def _compileTypeCheck(self, policy:AttributePolicy) -> Callable[[Any], Result]:
+		"""	Return a type checker function for an attribute policy.
+
+			Args:
+				policy: The attribute policy.
+			Return:
+				Function that validates a value and returns a Result, like `_validateType()`.
+		"""
+		dataType = policy.type
+		validateType = self._typeValidators.get(dataType, Validator._validateUnknownType)
+
+		def _checkType(value:Any) -> Result:
+			if value is None:
+				return Result(status = True, data = (dataType, value))
+			return validateType(self, dataType, value, False, policy)
+		
+		return _checkType
 
 
 	#
@@ -524,55 +615,74 @@ class Validator(object):
 					return Result.errorResult(dbg = str(e))
 
 		# Check types and values
+		return self._typeValidators.get(dataType, Validator._validateUnknownType)(self, dataType, value, convert, policy)
 
-		if dataType == BT.positiveInteger:
-			if isinstance(value, int):
-				if value > 0:
-					return Result(status = True, data = (dataType, value))
-				return Result.errorResult(dbg = 'value must be > 0')
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: positive integer')
-		
-		if dataType == BT.enum:
-			if isinstance(value, int):
-				if policy is not None and len(policy.evalues) and value not in policy.evalues:
-					return Result.errorResult(dbg = 'undefined enum value')
+
+	#
+	#	Type validators. They are called with a value that is not None. 
+	#	Each of them returns a Result like `_validateType()`.
+	#
+
+	def _validatePositiveInteger(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, int):
+			if value > 0:
 				return Result(status = True, data = (dataType, value))
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: positive integer')
+			return Result.errorResult(dbg = 'value must be > 0')
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: positive integer')
+		
 
-		if dataType == BT.nonNegInteger:
-			if isinstance(value, int):
-				if value >= 0:
-					return Result(status = True, data = (dataType, value))
-				return Result.errorResult(dbg = 'value must be >= 0')
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: non-negative integer')
+	def _validateEnum(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, int):
+			if policy is not None and len(policy.evalues) and value not in policy.evalues:
+				return Result.errorResult(dbg = 'undefined enum value')
+			return Result(status = True, data = (dataType, value))
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: positive integer')
 
-		if dataType in [ BT.unsignedInt, BT.unsignedLong ]:
-			if isinstance(value, int):
+
+	def _validateNonNegInteger(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, int):
+			if value >= 0:
 				return Result(status = True, data = (dataType, value))
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: unsigned integer')
+			return Result.errorResult(dbg = 'value must be >= 0')
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: non-negative integer')
+
 
-		if dataType == BT.timestamp and isinstance(value, str):
+	def _validateUnsignedInteger(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, int):
+			return Result(status = True, data = (dataType, value))
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: unsigned integer')
+
+
+	def _validateTimestamp(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, str):
 			if DateUtils.fromAbsRelTimestamp(value) == 0.0:
 				return Result.errorResult(dbg = f'format error in timestamp: {value}')
 			return Result(status = True, data = (dataType, value))
+		return self._validateUnknownType(dataType, value, convert, policy)
 
-		if dataType == BT.absRelTimestamp:
-			if isinstance(value, str):
-				try:
-					rel = int(value)
-					# fallthrough
-				except Exception as e:	# could happen if this is a string with an iso timestamp. Then try next test
-					if DateUtils.fromAbsRelTimestamp(value) == 0.0:
-						return Result.errorResult(dbg = f'format error in absRelTimestamp: {value}')
+
+	def _validateAbsRelTimestamp(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, str):
+			try:
+				rel = int(value)
 				# fallthrough
-			elif not isinstance(value, int):
-				return Result.errorResult(dbg = f'unsupported data type for absRelTimestamp')
-			return Result(status = True, data = (dataType, value))		# int/long is ok
+			except Exception as e:	# could happen if this is a string with an iso timestamp. Then try next test
+				if DateUtils.fromAbsRelTimestamp(value) == 0.0:
+					return Result.errorResult(dbg = f'format error in absRelTimestamp: {value}')
+			# fallthrough
+		elif not isinstance(value, int):
+			return Result.errorResult(dbg = f'unsupported data type for absRelTimestamp')
+		return Result(status = True, data = (dataType, value))		# int/long is ok
+
 
-		if dataType in [ BT.string, BT.anyURI ] and isinstance(value, str):
+	def _validateString(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, str):
 			return Result(status = True, data = (dataType, value))
+		return self._validateUnknownType(dataType, value, convert, policy)
+
 
-		if dataType in [ BT.list, BT.listNE ] and isinstance(value, list):
+	def _validateList(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, list):
 			if dataType == BT.listNE and len(value) == 0:
 				return Result.errorResult(dbg = 'empty list is not allowed')
 			if policy is not None and policy.ltype is not None:
@@ -580,52 +690,83 @@ class Validator(object):
 					if not (res := self._validateType(policy.ltype, each, convert = convert, policy = policy)).status:
 						return res
 			return Result(status = True, data = (dataType, value))
+		return self._validateUnknownType(dataType, value, convert, policy)
 
-		if dataType == BT.dict and isinstance(value, dict):
+
+	def _validateDict(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, dict):	# also for geoCoordinates
 			return Result(status = True, data = (dataType, value))
+		return self._validateUnknownType(dataType, value, convert, policy)
 		
-		if dataType == BT.boolean:
-			if isinstance(value, bool):
-				return Result(status = True, data = (dataType, value))
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: bool')
 
-		if dataType == BT.float:
-			if isinstance(value, (float, int)):
-				return Result(status = True, data = (dataType, value))
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: float')
+	def _validateBoolean(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, bool):
+			return Result(status = True, data = (dataType, value))
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: bool')
 
-		if dataType == BT.integer:
-			if isinstance(value, int):
-				return Result(status = True, data = (dataType, value))
-			return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: integer')
 
-		if dataType == BT.geoCoordinates and isinstance(value, dict):
+	def _validateFloat(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, (float, int)):
 			return Result(status = True, data = (dataType, value))
-		
-		if dataType == BT.duration:
-			try:
-				isodate.parse_duration(value)
-			except Exception as e:
-				return Result.errorResult(dbg = f'must be an ISO duration: {str(e)}')
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: float')
+
+
+	def _validateInteger(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if isinstance(value, int):
 			return Result(status = True, data = (dataType, value))
+		return Result.errorResult(dbg = f'invalid type: {type(value).__name__}. Expected: integer')
+
 		
-		if dataType == BT.any:
-			return Result(status = True, data = (dataType, value))
+	def _validateDuration(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		try:
+			isodate.parse_duration(value)
+		except Exception as e:
+			return Result.errorResult(dbg = f'must be an ISO duration: {str(e)}')
+		return Result(status = True, data = (dataType, value))
 		
-		if dataType == BT.complex:
-			if not policy:
-				L.logErr(f'policy is missing for validation of complex attribute')
-				return Result.errorResult(dbg = f'internal error: policy missing for validation')
-
-			if isinstance(value, dict):
-				typeName = policy.lTypeName if policy.type == BT.list else policy.typeName;
-				for k, v in value.items():
-					if not (p := self.getAttributePolicy(typeName, k)):
-						return Result.errorResult(dbg = f'unknown or undefined attribute:{k} in complex type: {typeName}')
-					if not (res := self._validateType(p.type, v, convert = convert, policy = p)).status:
-						return res
-			return Result(status = True, data = (dataType, value))
 
+	def _validateAny(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		return Result(status = True, data = (dataType, value))
+		
+
+	def _validateComplex(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
+		if not policy:
+			L.logErr(f'policy is missing for validation of complex attribute')
+			return Result.errorResult(dbg = f'internal error: policy missing for validation')
+
+		if isinstance(value, dict):
+			typeName = policy.lTypeName if policy.type == BT.list else policy.typeName;
+			for k, v in value.items():
+				if not (p := self.getAttributePolicy(typeName, k)):
+					return Result.errorResult(dbg = f'unknown or undefined attribute:{k} in complex type: {typeName}')
+				if not (res := self._validateType(p.type, v, convert = convert, policy = p)).status:
+					return res
+		return Result(status = True, data = (dataType, value))
+
+
+	def _validateUnknownType(self, dataType:BT, value:Any, convert:bool, policy:AttributePolicy) -> Result:
 		return Result.errorResult(dbg = f'type mismatch or unknown; expected type: {str(dataType)}, value type: {type(value).__name__}')
 
 
+	_typeValidators:Dict[BT, Callable[[Validator, BT, Any, bool, AttributePolicy], Result]] = {
+		BT.positiveInteger:	_validatePositiveInteger,
+		BT.enum:			_validateEnum,
+		BT.nonNegInteger:	_validateNonNegInteger,
+		BT.unsignedInt:		_validateUnsignedInteger,
+		BT.unsignedLong:	_validateUnsignedInteger,
+		BT.timestamp:		_validateTimestamp,
+		BT.absRelTimestamp:	_validateAbsRelTimestamp,
+		BT.string:			_validateString,
+		BT.anyURI:			_validateString,
+		BT.list:			_validateList,
+		BT.listNE:			_validateList,
+		BT.dict:			_validateDict,
+		BT.boolean:			_validateBoolean,
+		BT.float:			_validateFloat,
+		BT.integer:			_validateInteger,
+		BT.geoCoordinates:	_validateDict,
+		BT.duration:		_validateDuration,
+		BT.any:				_validateAny,
+		BT.complex:			_validateComplex,
+	}
+	"""	Type validators for the basic types. """
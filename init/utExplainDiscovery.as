@@ -0,0 +1,15 @@
+#
+#	utExplainDiscovery.as
+#
+#	This script returns the plan that the CSE's query planner chooses for a discovery request
+#
+@name explainDiscovery
+@description Return the query plan for a discovery request
+@usage explainDiscovery <target>?<filter criteria>
+@uppertester
+
+if [!= [argc] 1]
+	quitWithError \"explainDiscovery" command needs one argument: <target>?<filter criteria>
+endif
+
+quit [explainDiscovery [argv 1]]
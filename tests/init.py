@@ -496,7 +496,7 @@ def sendMqttRequest(operation:Operation, url:str, originator:str, ty:int=None, d
 
 			# Since the tests usually work with http binding headers, some response attributes are mapped
 			hds = dict()
-			for f, k in [ (C.hfRVI, 'rvi'), (C.hfVSI, 'vsi'), (C.hfOT, 'ot') ]:
+			for f, k in [ (C.hfRVI, 'rvi'), (C.hfVSI, 'vsi'), (C.hfOT, 'ot'), (C.hfCTS, 'cnst'), (C.hfCTO, 'cnot') ]:
 				if k in resp:
 					hds[f] = resp[k]
 			setLastHeaders(hds)
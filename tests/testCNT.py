@@ -112,6 +112,24 @@ class TestCNT(unittest.TestCase):
 		self.assertEqual(findXPath(cnt, 'm2m:cnt/st'), 1)
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_retrieveCNTRepeatedlyAndUpdate(self) -> None:
+		"""	Retrieve <CNT> repeatedly, update it, and retrieve the updated <CNT> """
+		r1, rsc = RETRIEVE(cntURL, TestCNT.originator)
+		self.assertEqual(rsc, RC.OK)
+		r2, rsc = RETRIEVE(cntURL, TestCNT.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertEqual(r1, r2)
+		dct = 	{ 'm2m:cnt' : {
+					'lbl' : [ 'anotherTag' ]
+ 				}}
+		_, rsc = UPDATE(cntURL, TestCNT.originator, dct)
+		self.assertEqual(rsc, RC.updated)
+		r, rsc = RETRIEVE(cntURL, TestCNT.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertEqual(findXPath(r, 'm2m:cnt/lbl'), [ 'anotherTag' ])
+
+
 	@unittest.skipIf(noCSE, 'No CSEBase')
 	def test_updateCNTTy(self) -> None:
 		"""	Update <CNT> TY -> Fail """
@@ -268,6 +286,7 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestCNT('test_retrieveCNTWithWrongOriginator'))
 	suite.addTest(TestCNT('test_attributesCNT'))
 	suite.addTest(TestCNT('test_updateCNT'))
+	suite.addTest(TestCNT('test_retrieveCNTRepeatedlyAndUpdate'))
 	suite.addTest(TestCNT('test_updateCNTTy'))
 	suite.addTest(TestCNT('test_updateCNTempty'))
 	suite.addTest(TestCNT('test_updateCNTPi'))
@@ -7,7 +7,7 @@
 #	Unit tests for CNT & CIN functionality
 #
 
-import unittest, sys
+import unittest, sys, threading
 if '..' not in sys.path:
 	sys.path.append('..')
 from typing import Tuple
@@ -456,6 +456,57 @@ class TestCNT_CIN(unittest.TestCase):
 		self.assertNotEqual(findXPath(r, 'm2m:cin/ri'), findXPath(ol, 'm2m:cin/ri'))
 
 
+	def _createCINsConcurrently(self, threads:int, count:int) -> None:
+		"""	Create `count` <CIN> in each of `threads` parallel threads. """
+		results:list[RC] = []
+		def _createCINs() -> None:
+			for _ in range(count):
+				_, rsc = CREATE(cntURL, TestCNT_CIN.originator, T.CIN, { 'm2m:cin' : { 'con' : 'aValue' }})	# cs = 6
+				results.append(rsc)
+		workers = [ threading.Thread(target = _createCINs) for _ in range(threads) ]
+		[ w.start() for w in workers ]	# type: ignore [func-returns-value]
+		[ w.join() for w in workers ]	# type: ignore [func-returns-value]
+		self.assertEqual(results, [ RC.created ] * (threads * count))
+
+
+	def _assertInstances(self, cni:int) -> None:
+		"""	Check *cni* and *cbs* of the <CNT>, and the actual number of <CIN>. """
+		r, rsc = RETRIEVE(cntURL, TestCNT_CIN.originator)
+		self.assertEqual(rsc, RC.OK, r)
+		self.assertEqual(findXPath(r, 'm2m:cnt/cni'), cni, r)
+		self.assertEqual(findXPath(r, 'm2m:cnt/cbs'), cni * 6, r)
+		r, rsc = RETRIEVE(f'{cntURL}?fu=1&rcn={int(ResultContentType.discoveryResultReferences)}&ty={int(T.CIN)}', TestCNT_CIN.originator)
+		self.assertEqual(rsc, RC.OK, r)
+		self.assertEqual(len(findXPath(r, 'm2m:uril', [])), cni, r)
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_createCINsConcurrently(self) -> None:
+		""" Create <CNT> and 10 * 10 <CIN> in parallel threads -> cni and cbs are correct """
+		dct = 	{ 'm2m:cnt' : { 
+					'rn'  : cntRN,
+					'mni' : 1000,
+					'mbs' : 100000
+				}}
+		TestCNT_CIN.cnt, rsc = CREATE(aeURL, TestCNT_CIN.originator, T.CNT, dct)
+		self.assertEqual(rsc, RC.created, TestCNT_CIN.cnt)
+		self._createCINsConcurrently(10, 10)
+		self._assertInstances(100)
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_createCINsConcurrentlyWithMni(self) -> None:
+		""" Create <CNT> with mni and 10 * 10 <CIN> in parallel threads -> only mni <CIN> remain """
+		dct = 	{ 'm2m:cnt' : { 
+					'rn'  : cntRN,
+					'mni' : 5
+				}}
+		TestCNT_CIN.cnt, rsc = CREATE(aeURL, TestCNT_CIN.originator, T.CNT, dct)
+		self.assertEqual(rsc, RC.created, TestCNT_CIN.cnt)
+		self._createCINsConcurrently(10, 10)
+		self._assertInstances(5)
+
+
 
 def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite = unittest.TestSuite()
@@ -490,6 +541,11 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestCNT_CIN('test_deleteCNTLA'))
 	suite.addTest(TestCNT_CIN('test_deleteCNT'))
 
+	suite.addTest(TestCNT_CIN('test_createCINsConcurrently'))
+	suite.addTest(TestCNT_CIN('test_deleteCNT'))
+	suite.addTest(TestCNT_CIN('test_createCINsConcurrentlyWithMni'))
+	suite.addTest(TestCNT_CIN('test_deleteCNT'))
+
 	result = unittest.TextTestRunner(verbosity=testVerbosity, failfast=testFailFast).run(suite)
 	printResult(result)
 	return result.testsRun, len(result.errors + result.failures), len(result.skipped)
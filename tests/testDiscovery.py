@@ -368,6 +368,17 @@ class TestDiscovery(unittest.TestCase):
 		self.assertEqual(findXPath(r, 'm2m:ae/m2m:cin/{1}/lbl/{0}'), 'tag:0')
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_discoverByLBLsUnderAEOrdered(self) -> None:
+		""" Discover resources under <AE> by multiple lbl. Result is in resource tree order """
+		r, rsc = RETRIEVE(f'{aeURL}?fu=1&lbl=tag:1&lbl=cntLbl', TestDiscovery.originator)
+		self.assertEqual(rsc, RC.OK, r)
+		self.assertEqual(len(uril := findXPath(r, 'm2m:uril')), 3, r)
+		self.assertTrue(uril[0].endswith(f'/{aeRN}/{cntRN}'), uril)
+		self.assertTrue(uril[1].startswith(f'{uril[0]}/'), uril)
+		self.assertIn(f'/{aeRN}/{cnt2RN}/', uril[2])
+
+
 	@unittest.skipIf(noCSE, 'No CSEBase')
 	def test_retrieveCNTbyCNIunderAE(self) -> None:
 		""" Retrieve <CNT> under <AE> by correct cni & rcn=8 """
@@ -618,6 +629,30 @@ class TestDiscovery(unittest.TestCase):
 		self.assertEqual(len(findXPath(r, 'm2m:ae/m2m:cnt/{1}/m2m:cin')), 5)
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_discoverCINunderAEWithLim(self) -> None:
+		""" Discover <CIN> under <AE> with lim. Result is partial """
+		r, rsc = RETRIEVE(f'{aeURL}?fu=1&ty={int(T.CIN)}&lim=3', TestDiscovery.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertIsNotNone(findXPath(r, 'm2m:uril'))
+		self.assertEqual(len(findXPath(r, 'm2m:uril')), 3, r)
+		self.assertEqual(lastHeaders().get(C.hfCTS), '1')	# PARTIAL_CONTENT
+		self.assertEqual(lastHeaders().get(C.hfCTO), '4')	# next offset
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_discoverCINunderAEWithOfstLim(self) -> None:
+		""" Discover <CIN> under <AE> with ofst and lim. Result is complete """
+		r, rsc = RETRIEVE(f'{aeURL}?fu=1&ty={int(T.CIN)}', TestDiscovery.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertEqual(len(uril := findXPath(r, 'm2m:uril')), 10, r)
+		r, rsc = RETRIEVE(f'{aeURL}?fu=1&ty={int(T.CIN)}&ofst=8&lim=3', TestDiscovery.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertEqual(findXPath(r, 'm2m:uril'), uril[7:], r)
+		self.assertIsNone(lastHeaders().get(C.hfCTS))
+		self.assertIsNone(lastHeaders().get(C.hfCTO))
+
+
 	# Test adding arp
 	@unittest.skipIf(noCSE, 'No CSEBase')
 	def test_appendArp(self) -> None:
@@ -776,6 +811,7 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestDiscovery('test_retrieveCNTunderCSE'))
 	suite.addTest(TestDiscovery('test_retrieveCINunderAE'))
 	suite.addTest(TestDiscovery('test_retrieveCINbyLBLunderAE'))
+	suite.addTest(TestDiscovery('test_discoverByLBLsUnderAEOrdered'))
 	suite.addTest(TestDiscovery('test_retrieveCNTbyCNIunderAE'))
 	suite.addTest(TestDiscovery('test_retrieveCNTbyCNIunderAEEmpty'))
 	suite.addTest(TestDiscovery('test_retrieveCNTbyCNIunderAEEmpty2'))
@@ -796,6 +832,8 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestDiscovery('test_retrieveCNTunderAEStructured'))
 	suite.addTest(TestDiscovery('test_retrieveCNTunderAEUnstructured'))
 	suite.addTest(TestDiscovery('test_rcn4WithDifferentFUs'))
+	suite.addTest(TestDiscovery('test_discoverCINunderAEWithLim'))
+	suite.addTest(TestDiscovery('test_discoverCINunderAEWithOfstLim'))
 	suite.addTest(TestDiscovery('test_appendArp'))
 	suite.addTest(TestDiscovery('test_createCNTwithRCN9'))
 	suite.addTest(TestDiscovery('test_updateCNTwithRCN9'))
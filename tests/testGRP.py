@@ -376,6 +376,45 @@ class TestGRP(unittest.TestCase):
 
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_deleteParentOfMembersCheckMID(self) -> None:
+		"""	Add two child <CNT> of a <CNT> to <GRP>, delete the parent <CNT>, check <GRP> MID"""
+		r, rsc = RETRIEVE(grpURL, TestGRP.originator)
+		self.assertEqual(rsc, RC.OK)
+		mid = findXPath(r, 'm2m:grp/mid')
+		cnm = findXPath(r, 'm2m:grp/cnm')
+
+		# Add parent and child containers
+		dct = 	{ 'm2m:cnt' : { 
+					'rn'  : f'{cntRN}5' 
+				}}
+		_, rsc = CREATE(aeURL, TestGRP.originator, T.CNT, dct)
+		self.assertEqual(rsc, RC.created)
+		childRIs = []
+		for rn in [ 'child1', 'child2' ]:
+			r, rsc = CREATE(f'{aeURL}/{cntRN}5', TestGRP.originator, T.CNT, { 'm2m:cnt' : { 'rn' : rn }})
+			self.assertEqual(rsc, RC.created)
+			childRIs.append(findXPath(r, 'm2m:cnt/ri'))
+	
+		# Add the child containers to the group
+		dct = 	{ 'm2m:grp' : { 
+					'mid'  : mid + childRIs
+				}}
+		r, rsc = UPDATE(grpURL, TestGRP.originator, dct)
+		self.assertEqual(rsc, RC.updated)
+		self.assertEqual(findXPath(r, 'm2m:grp/cnm'), cnm + 2)
+
+		# Delete the parent container
+		_, rsc = DELETE(f'{aeURL}/{cntRN}5', TestGRP.originator)
+		self.assertEqual(rsc, RC.deleted)
+
+		# Check group 
+		r, rsc = RETRIEVE(grpURL, TestGRP.originator)
+		self.assertEqual(rsc, RC.OK)
+		self.assertEqual(findXPath(r, 'm2m:grp/cnm'), cnm)
+		self.assertEqual(findXPath(r, 'm2m:grp/mid'), mid)
+
+
 	@unittest.skipIf(noCSE, 'No CSEBase')
 	def test_attributesGRP2(self) -> None:
 		""" Validate <GRP> attributes after failed MID update"""
@@ -461,6 +500,7 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 
 	suite.addTest(TestGRP('test_createGRP'))	# create <GRP> again
 	suite.addTest(TestGRP('test_addDeleteContainerCheckMID'))	
+	suite.addTest(TestGRP('test_deleteParentOfMembersCheckMID'))
 	
 
 
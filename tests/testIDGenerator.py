@@ -0,0 +1,111 @@
+#
+#	testIDGenerator.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit tests for the time-ordered identifier generator. They don't need a running CSE
+#
+
+import unittest, sys, threading, time
+if '..' not in sys.path:
+	sys.path.append('..')
+from typing import Tuple
+from unittest.mock import patch
+import acme.services.CSE	# Import the services first to resolve the circular imports of the resources
+from acme.etc.Utils import TimeOrderedIDGenerator
+from init import *
+
+
+def identifier(timestamp:int, node:int, sequence:int) -> str:
+	return f'{timestamp:013d}{node:03d}{sequence:03d}'
+
+
+class TestIDGenerator(unittest.TestCase):
+
+	def test_lengthAndNode(self) -> None:
+		"""	Identifiers have 19 digits and contain the node number """
+		generator = TimeOrderedIDGenerator('/id-in')
+		for _ in range(100):
+			ri = generator()
+			self.assertEqual(len(ri), 19)
+			self.assertTrue(ri.isdigit())
+			self.assertEqual(int(ri[13:16]), generator.node)
+		self.assertNotEqual(TimeOrderedIDGenerator('/id-mn').node, generator.node)
+
+
+	def test_ordering(self) -> None:
+		"""	Later identifiers are sorted after earlier ones, also across many identifiers per millisecond """
+		generator = TimeOrderedIDGenerator('/id-in')
+		ris = [ generator() for _ in range(5000) ]
+		self.assertEqual(ris, sorted(ris))
+		self.assertEqual(len(set(ris)), len(ris))
+
+
+	def test_clockGoesBack(self) -> None:
+		"""	Identifiers are still ordered when the clock goes back """
+		generator = TimeOrderedIDGenerator('/id-in')
+		now = time.time()
+		with patch('acme.etc.Utils.time.time', return_value = now):
+			first = generator()
+		with patch('acme.etc.Utils.time.time', return_value = now - 10.0):
+			second = generator()
+		self.assertLess(first, second)
+
+
+	def test_uniqueUnderThreads(self) -> None:
+		"""	Identifiers that are generated in parallel threads are unique, and ordered per thread """
+		generator = TimeOrderedIDGenerator('/id-in')
+		results:list[list[str]] = [ [] for _ in range(8) ]
+
+		def generate(ris:list[str]) -> None:
+			for _ in range(2000):
+				ris.append(generator())
+
+		threads = [ threading.Thread(target = generate, args = (each, )) for each in results ]
+		for each in threads:
+			each.start()
+		for each in threads:
+			each.join()
+
+		ris = [ ri for each in results for ri in each ]
+		self.assertEqual(len(set(ris)), 8 * 2000)
+		for each in results:
+			self.assertEqual(each, sorted(each))
+
+
+	def test_seed(self) -> None:
+		"""	Continue after the newest seeded identifier of the same node """
+		generator = TimeOrderedIDGenerator('/id-in')
+		node = generator.node
+		future = int(time.time() * 1000) + 60 * 1000	# a clock that was set back by a minute since the last run
+		generator.seed([ f'cnt{identifier(future, node, 5)}',
+						 identifier(future - 1000, node, 7),
+						 identifier(future + 1000, (node + 1) % 1000, 0),	# other node
+						 identifier(future + generator.maxClockDrift, node, 0),	# too far in the future, e.g. a random ID
+						 'cnt1234',
+						 'aRandomID' ])
+		self.assertEqual(generator(), identifier(future, node, 6))
+		self.assertEqual(generator(), identifier(future, node, 7))
+
+		# Seeding with older identifiers doesn't go back
+		generator.seed([ identifier(future - 1000, node, 0) ])
+		self.assertEqual(generator(), identifier(future, node, 8))
+
+
+def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
+	suite = unittest.TestSuite()
+
+	suite.addTest(TestIDGenerator('test_lengthAndNode'))
+	suite.addTest(TestIDGenerator('test_ordering'))
+	suite.addTest(TestIDGenerator('test_clockGoesBack'))
+	suite.addTest(TestIDGenerator('test_uniqueUnderThreads'))
+	suite.addTest(TestIDGenerator('test_seed'))
+
+	result = unittest.TextTestRunner(verbosity=testVerbosity, failfast=testFailFast).run(suite)
+	printResult(result)
+	return result.testsRun, len(result.errors + result.failures), len(result.skipped)
+
+if __name__ == '__main__':
+	_, errors, _ = run(2, True)
+	sys.exit(errors)
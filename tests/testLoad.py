@@ -176,6 +176,41 @@ class TestLoad(unittest.TestCase):
 		print(f'{TestLoad.stopTimer(self.count, self.parallel)} ... ', end='', flush=True)
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	@unittest.skipIf(BINDING=='mqtt', 'No parallel execution for MQTT binding yet')
+	def test_retrieveAEsParallel(self) -> None:
+		"""	Retrieve n AEs in m threads in parallel """
+		print(f'{self.count} * {self.parallel} Threads ... ', end='', flush=True)
+		threads = [threading.Thread(target=lambda: self._retrieveAEs(self.count)) for _ in range(self.parallel)]
+		TestLoad.startTimer()
+		[t.start() for t in threads] 	# type: ignore [func-returns-value]
+		[t.join() for t in threads]		# type: ignore [func-returns-value]
+		print(f'{TestLoad.stopTimer(self.count, self.parallel)} ... ', end='', flush=True)
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	@unittest.skipIf(BINDING=='mqtt', 'No parallel execution for MQTT binding yet')
+	def test_retrieveAEsWhileCreating(self) -> None:
+		"""	Retrieve n AEs in m threads in parallel, while another thread creates AEs """
+		print(f'{self.count} * {self.parallel} Threads ... ', end='', flush=True)
+		created:list[Tuple[str, str]] = []
+		done = threading.Event()
+		def _createAEsUntilDone() -> None:
+			while not done.is_set():
+				created.extend(self._createAEs(1))
+		writer = threading.Thread(target=_createAEsUntilDone)
+		readers = [threading.Thread(target=lambda: self._retrieveAEs(self.count)) for _ in range(self.parallel)]
+		writer.start()
+		TestLoad.startTimer()
+		[t.start() for t in readers] 	# type: ignore [func-returns-value]
+		[t.join() for t in readers]		# type: ignore [func-returns-value]
+		result = TestLoad.stopTimer(self.count, self.parallel)
+		done.set()
+		writer.join()
+		print(f'{result} {len(created)} created ... ', end='', flush=True)
+		self._deleteAEs(len(created), aes=created)
+
+
 	@unittest.skipIf(noCSE, 'No CSEBase')
 	@unittest.skipIf(BINDING=='mqtt', 'No parallel execution for MQTT binding yet')
 	def test_deleteAEsParallel(self) -> None:
@@ -273,6 +308,11 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestLoad('test_retrieveAEs', 1000))
 	suite.addTest(TestLoad('test_deleteAEs', 1000))
 
+	suite.addTest(TestLoad('test_createAEs', 100))
+	suite.addTest(TestLoad('test_retrieveAEsParallel', 100, 10))
+	suite.addTest(TestLoad('test_retrieveAEsWhileCreating', 100, 10))
+	suite.addTest(TestLoad('test_deleteAEs', 100))
+
 	suite.addTest(TestLoad('test_createAEsParallel', 10, 10))
 	suite.addTest(TestLoad('test_deleteAEsParallel', 10, 10))
 	suite.addTest(TestLoad('test_createAEsParallel', 100, 10))
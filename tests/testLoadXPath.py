@@ -0,0 +1,116 @@
+#
+#	testLoadXPath.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Micro benchmark for structured key lookups with compiled paths
+#
+
+from __future__ import annotations
+import unittest, sys, time
+if '..' not in sys.path:
+	sys.path.append('..')
+from typing import Tuple
+from acme.helpers.XPath import XPath, compileXPath
+from init import *
+
+
+# The hottest paths: request filling, notifications, and scripts
+hotPaths = [ 'm2m:cin/con',
+			 'm2m:sub/nu',
+			 'pc/m2m:sgn/nev/rep',
+			 'pc/m2m:sgn/nev/rep/m2m:cin/ri',
+			 'm2m:cnt/m2m:cin/{}/rn',
+			 'm2m:cin/lbl/{0}',
+			 'm2m:rsp/rsc',
+		   ]
+
+resource = { 'm2m:cin' : { 'con' : 'aValue',
+						   'lbl' : [ 'aLabel', 'anotherLabel' ] },
+			 'm2m:sub' : { 'nu' : [ 'anURL' ] },
+			 'pc' : { 'm2m:sgn' : { 'nev' : { 'rep' : { 'm2m:cin' : { 'ri' : 'anID' } },
+			 								  'net' : 3 } } },
+			 'm2m:cnt' : { 'm2m:cin' : [ { 'rn' : f'cin{i}' } for i in range(10) ] },
+			 'm2m:rsp' : { 'rsc' : 2000 },
+		   }
+
+
+class TestLoadXPath(unittest.TestCase):
+	timeStart:float				= 0
+
+	def __init__(self, methodName:str='runTest', count:int=None):
+		"""	Pass a count to the test cases.
+		"""
+		super(TestLoadXPath, self).__init__(methodName)
+		self.count = count
+
+
+	@classmethod
+	def startTimer(cls) -> None:
+		"""	Start a timer.
+		"""
+		cls.timeStart = time.perf_counter()
+
+
+	@classmethod
+	def stopTimer(cls, count:int) -> str:
+		"""	Stop a timer and return a meaningful result string.
+		"""
+		timeEnd = time.perf_counter()
+		total = (timeEnd - cls.timeStart)
+		return f'{total:.4f} ({total/(count*len(hotPaths))*1000000:.3f} µs)'
+
+
+	def test_findXPathParsed(self) -> None:
+		"""	Find n times each hot path, parsing the path for every lookup """
+		print(f'{self.count} ... ', end='', flush=True)
+		TestLoadXPath.startTimer()
+		for _ in range(self.count):
+			for path in hotPaths:
+				findXPath(resource, path)
+		print(f'{TestLoadXPath.stopTimer(self.count)} ... ', end='', flush=True)
+
+
+	def test_findXPathUncached(self) -> None:
+		"""	Find n times each hot path, compiling the path for every lookup """
+		print(f'{self.count} ... ', end='', flush=True)
+		TestLoadXPath.startTimer()
+		for _ in range(self.count):
+			for path in hotPaths:
+				XPath(path).find(resource)
+		print(f'{TestLoadXPath.stopTimer(self.count)} ... ', end='', flush=True)
+
+
+	def test_findXPathCompiled(self) -> None:
+		"""	Find n times each hot path, with compiled paths from the LRU cache """
+		print(f'{self.count} ... ', end='', flush=True)
+		TestLoadXPath.startTimer()
+		for _ in range(self.count):
+			for path in hotPaths:
+				compileXPath(path).find(resource)
+		print(f'{TestLoadXPath.stopTimer(self.count)} ... ', end='', flush=True)
+
+
+	def test_findXPathResults(self) -> None:
+		"""	Compare the results of compiled and parsed paths """
+		for path in hotPaths:
+			self.assertEqual(compileXPath(path).find(resource), findXPath(resource, path), path)
+
+
+def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
+	suite = unittest.TestSuite()
+
+	suite.addTest(TestLoadXPath('test_findXPathResults'))
+	for count in [ 1000, 10000, 100000 ]:
+		suite.addTest(TestLoadXPath('test_findXPathParsed', count))
+		suite.addTest(TestLoadXPath('test_findXPathUncached', count))
+		suite.addTest(TestLoadXPath('test_findXPathCompiled', count))
+
+	result = unittest.TextTestRunner(verbosity=testVerbosity, failfast=testFailFast).run(suite)
+	printResult(result)
+	return result.testsRun, len(result.errors + result.failures), len(result.skipped)
+
+if __name__ == '__main__':
+	_, errors, _ = run(2, True)
+	sys.exit(errors)
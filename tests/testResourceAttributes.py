@@ -0,0 +1,139 @@
+#
+#	testResourceAttributes.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit tests for the copy-on-write resource attributes. They don't need a running CSE
+#
+
+import unittest, sys
+if '..' not in sys.path:
+	sys.path.append('..')
+from typing import Callable, Tuple
+from copy import deepcopy
+import acme.services.CSE	# Import the services first to resolve the circular imports of the resources
+from acme.resources.Resource import ResourceAttributes
+from acme.etc.Utils import resourceDiff, setXPath
+from init import *
+
+
+def document() -> JSON:
+	return {	'ri'	: 'cnt1234',
+				'rn'	: 'aContainer',
+				'mni'	: 10,
+				'lbl'	: [ 'aLabel', 'anotherLabel' ],
+				'acpi'	: [ 'acp1' ],
+				'nested': { 'a' : { 'b' : [ 1, 2 ] }, 'c' : 'aValue' },
+				'__rtype__': 'm2m:cnt',
+			}
+
+
+class TestResourceAttributes(unittest.TestCase):
+
+	def _assertDiffLikeResourceDiff(self, change:Callable[[JSON], None], modifiers:JSON = None) -> None:
+		"""	Apply the same change to resource attributes and to a plain copy, and compare the diff with resourceDiff() """
+		attributes = ResourceAttributes(document())
+		old = deepcopy(dict(attributes))
+		expected = document()
+		change(attributes)
+		change(expected)
+		self.assertEqual(dict(attributes), expected)
+		self.assertEqual(attributes.diff(modifiers), resourceDiff(old, expected, modifiers))
+
+
+	def test_diffLikeResourceDiff(self) -> None:
+		"""	Compare diff() with resourceDiff() """
+		self._assertDiffLikeResourceDiff(lambda dct: None)
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('mni', 20))
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('mni', 10))				# same value
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('mni', 10), { 'mni': 10 })	# same value, but modified
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('mbs', 100))				# new attribute
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('mni', None))				# nulled attribute
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__delitem__('mni'))						# removed attribute
+		self._assertDiffLikeResourceDiff(lambda dct: dct.pop('acpi'))
+		self._assertDiffLikeResourceDiff(lambda dct: dct['lbl'].append('aNewLabel'))				# changed in place
+		self._assertDiffLikeResourceDiff(lambda dct: dct.get('lbl').sort())						# accessed, but not changed
+		self._assertDiffLikeResourceDiff(lambda dct: dct.update({ 'mni': 5, 'lbl': [] }))
+		self._assertDiffLikeResourceDiff(lambda dct: dct.setdefault('mbs', 100))
+		self._assertDiffLikeResourceDiff(lambda dct: dct.__setitem__('__rtype__', 'm2m:ae'))	# internal attribute
+
+
+	def test_diffAfterCheckpoint(self) -> None:
+		"""	Only the changes since the last checkpoint are in the diff """
+		attributes = ResourceAttributes(document())
+		attributes['mni'] = 20
+		attributes.checkpoint()
+		attributes['lbl'].append('aNewLabel')
+		self.assertEqual(attributes.diff(), { 'lbl': [ 'aLabel', 'anotherLabel', 'aNewLabel' ] })
+
+
+	def test_nestedChangesWithSetXPath(self) -> None:
+		"""	Change nested attributes with setXPath() """
+		source = document()
+		attributes = ResourceAttributes(source)
+		old = deepcopy(dict(attributes))
+		setXPath(attributes, 'nested/a/b', [ 3 ])
+		setXPath(attributes, 'nested/d/e', 'aNewValue')
+		self.assertEqual(attributes['nested'], { 'a' : { 'b' : [ 3 ] }, 'c' : 'aValue', 'd' : { 'e' : 'aNewValue' } })
+		self.assertEqual(attributes.diff(), resourceDiff(old, dict(attributes)))
+		self.assertEqual(list(attributes.diff().keys()), [ 'nested' ])
+		self.assertEqual(source, document())	# the source is not changed
+
+
+	def test_snapshotIsolation(self) -> None:
+		"""	Snapshots, copies and the source are not affected by later changes in place """
+		source = document()
+		attributes = ResourceAttributes(source)
+		snapshot = attributes.snapshot()
+		copy = attributes.copy()
+
+		attributes['lbl'].append('aNewLabel')
+		attributes['nested']['a']['b'].append(3)
+		attributes['mni'] = 20
+		copy['acpi'].append('acp2')
+
+		self.assertEqual(source, document())
+		self.assertEqual(snapshot, document())
+		self.assertEqual(attributes['lbl'], [ 'aLabel', 'anotherLabel', 'aNewLabel' ])
+		self.assertEqual(attributes['acpi'], [ 'acp1' ])
+		self.assertEqual(copy['lbl'], [ 'aLabel', 'anotherLabel' ])
+		self.assertEqual(copy['acpi'], [ 'acp1', 'acp2' ])
+		self.assertEqual(copy['mni'], 10)
+
+		# A snapshot after the changes isn't affected by further changes either
+		snapshot = attributes.snapshot()
+		attributes['lbl'].append('anotherNewLabel')
+		self.assertEqual(snapshot['lbl'], [ 'aLabel', 'anotherLabel', 'aNewLabel' ])
+
+
+	def test_popitem(self) -> None:
+		"""	Pop the last attribute """
+		source = document()
+		attributes = ResourceAttributes(source)
+		self.assertEqual(attributes.popitem(), ( '__rtype__', 'm2m:cnt' ))
+		key, value = attributes.popitem()
+		self.assertEqual(( key, value ), ( 'nested', { 'a' : { 'b' : [ 1, 2 ] }, 'c' : 'aValue' } ))
+		value['a']['b'].append(3)	# the popped value is a copy
+		self.assertEqual(source, document())
+		self.assertEqual(attributes.diff(), resourceDiff(document(), dict(attributes)))
+		self.assertEqual(attributes.diff(), { 'nested': None, '__rtype__': None })
+		self.assertRaises(KeyError, ResourceAttributes().popitem)
+
+
+def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
+	suite = unittest.TestSuite()
+
+	suite.addTest(TestResourceAttributes('test_diffLikeResourceDiff'))
+	suite.addTest(TestResourceAttributes('test_diffAfterCheckpoint'))
+	suite.addTest(TestResourceAttributes('test_nestedChangesWithSetXPath'))
+	suite.addTest(TestResourceAttributes('test_snapshotIsolation'))
+	suite.addTest(TestResourceAttributes('test_popitem'))
+
+	result = unittest.TextTestRunner(verbosity=testVerbosity, failfast=testFailFast).run(suite)
+	printResult(result)
+	return result.testsRun, len(result.errors + result.failures), len(result.skipped)
+
+if __name__ == '__main__':
+	_, errors, _ = run(2, True)
+	sys.exit(errors)
@@ -0,0 +1,182 @@
+#
+#	testStorageIndexes.py
+#
+#	(c) 2022 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit tests for the in-memory storage indexes. They don't need a running CSE
+#
+
+import unittest, sys
+if '..' not in sys.path:
+	sys.path.append('..')
+from typing import Tuple
+from acme.helpers.StorageIndexes import AnnouncementIndex, ChildIndex
+from init import *
+
+announcedTo = '__announcedTo__'
+
+
+def announcedFilter(resource:JSON, csi:str, isAnnounced:bool) -> bool:
+	"""	The filter that was used to search the announced and not announced resources before the index. """
+	mcsi = f'{csi}/'
+	if (at := resource.get('at')) and len(list(filter(lambda x: x.startswith(mcsi), at))) > 0:
+		if ato := resource.get(announcedTo):
+			for i in ato:
+				if csi == i[0]:
+					return isAnnounced
+			return not isAnnounced
+	return False
+
+
+def resource(ri:str, at:list[str] = None, announced:list[str] = None) -> JSON:
+	dct:JSON = { 'ri': ri }
+	if at is not None:
+		dct['at'] = at
+	if announced is not None:
+		dct[announcedTo] = [ [ csi, f'{csi}/{ri}Annc' ] for csi in announced ]
+	return dct
+
+
+class TestAnnouncementIndex(unittest.TestCase):
+
+	resources = [	resource('r1', at = [ '/id-mn/r1Annc' ], announced = [ '/id-mn' ]),
+					resource('r2', at = [ '/id-mn/r2Annc', '/id-asn/r2Annc' ], announced = [ '/id-asn' ]),
+					resource('r3', at = [ '/id-mn/cnt1234/r3Annc' ], announced = [ '/id-mn' ]),
+					resource('r4', at = [ '/id-mn/r4Annc' ]),							# not announced anywhere yet
+					resource('r5', at = [ '/id-mnx/r5Annc' ], announced = [ '/id-mnx' ]),	# other CSE with the same prefix
+					resource('r6', announced = [ '/id-mn' ]),								# no announcement target
+					resource('r7'),
+					resource('r8', at = [ '/id-in/id-mn/r8Annc' ], announced = [ '/id-in' ]),
+					resource('r9', at = [ '/id-mn' ], announced = [ '/id-mn' ]),		# only the CSE-ID, no target
+				]
+
+
+	def _assertSearchLikeFilter(self, index:AnnouncementIndex, resources:list[JSON]) -> None:
+		for csi in [ '/id-mn', '/id-asn', '/id-mnx', '/id-in', '/id-unknown' ]:
+			for isAnnounced in [ True, False ]:
+				self.assertEqual(index.search(csi, isAnnounced),
+								 [ each['ri'] for each in resources if announcedFilter(each, csi, isAnnounced) ],
+								 f'{csi} {isAnnounced}')
+
+
+	def test_searchLikeFilter(self) -> None:
+		"""	Search announced and not announced resources like the filter """
+		index = AnnouncementIndex(announcedTo)
+		for each in self.resources:
+			index.add(each)
+		self._assertSearchLikeFilter(index, self.resources)
+		self.assertEqual(index.search('/id-mn', True), [ 'r1', 'r3' ])
+		self.assertEqual(index.search('/id-mn', False), [ 'r2' ])
+		self.assertEqual(index.search('/id-asn', True), [ 'r2' ])
+
+
+	def test_rebuild(self) -> None:
+		"""	Rebuild the index from resource documents """
+		index = AnnouncementIndex(announcedTo)
+		index.add(resource('r0', at = [ '/id-mn/r0Annc' ], announced = [ '/id-asn' ]))
+		index.rebuild(self.resources)
+		self._assertSearchLikeFilter(index, self.resources)
+
+
+	def test_updateAnnouncement(self) -> None:
+		"""	Update the announcement targets and the announcements of a resource """
+		index = AnnouncementIndex(announcedTo)
+		for each in self.resources:
+			index.add(each)
+
+		# r4 is announced to /id-mn, and r2 to /id-mn as well
+		resources = [ each.copy() for each in self.resources ]
+		resources[3] = resource('r4', at = [ '/id-mn/r4Annc' ], announced = [ '/id-mn' ])
+		resources[1] = resource('r2', at = [ '/id-mn/r2Annc', '/id-asn/r2Annc' ], announced = [ '/id-asn', '/id-mn' ])
+		index.add(resources[3])
+		index.add(resources[1])
+		self._assertSearchLikeFilter(index, resources)
+		self.assertEqual(index.search('/id-mn', True), [ 'r1', 'r2', 'r3', 'r4' ])	# creation order is kept
+
+		# /id-mn is removed from the targets of r1
+		resources[0] = resource('r1', at = [ '/id-asn/r1Annc' ], announced = [ '/id-mn' ])
+		index.add(resources[0])
+		self._assertSearchLikeFilter(index, resources)
+		self.assertEqual(index.search('/id-mn', True), [ 'r2', 'r3', 'r4' ])
+
+
+	def test_removeAndClear(self) -> None:
+		"""	Remove resources and clear the index """
+		index = AnnouncementIndex(announcedTo)
+		for each in self.resources:
+			index.add(each)
+		index.remove('r1')
+		index.remove('r2')
+		index.remove('r7')	# not indexed
+		self._assertSearchLikeFilter(index, self.resources[2:])
+		index.clear()
+		self._assertSearchLikeFilter(index, [])
+
+
+def child(ri:str, ct:int, ty:int = 4, cs:int = 1) -> JSON:
+	return { 'ri': ri, 'pi': 'cnt', 'ty': ty, 'ct': f'20221017T{ct:06d}', 'cs': cs }
+
+
+class TestChildIndex(unittest.TestCase):
+
+	def test_removeOldest(self) -> None:
+		"""	Remove the oldest instances like for the mni of a container """
+		index = ChildIndex([])
+		for i in range(1000):
+			index.add(i, child(f'cin{i}', i))
+			if index.count('cnt', 4) > 10:
+				index.remove(i, child(f'cin{i-10}', i-10))
+			self.assertLessEqual(len(index.children['cnt'][4].entries), 21)	# removed entries are dropped
+		self.assertEqual(index.childRIs('cnt', 4), [ f'cin{i}' for i in range(990, 1000) ])
+		self.assertEqual(index.oldestLatestChildRI('cnt', 4, oldest = True), 'cin990')
+		self.assertEqual(index.oldestLatestChildRI('cnt', 4), 'cin999')
+		self.assertEqual(index.count('cnt', 4), 10)
+		self.assertEqual(index.contentSize('cnt', 4), 10)
+
+
+	def test_addAndRemove(self) -> None:
+		"""	Add children out of order, and remove children in the middle, at the end and all """
+		index = ChildIndex([])
+		for i in [ 3, 1, 4, 0, 2 ]:
+			index.add(i, child(f'cin{i}', i))
+		index.add(5, child('sub5', 5, ty = 23, cs = 0))
+		self.assertEqual(index.childRIs('cnt', 4), [ 'cin0', 'cin1', 'cin2', 'cin3', 'cin4' ])
+		self.assertEqual(index.childRIs('cnt'), [ 'cin0', 'cin1', 'cin2', 'cin3', 'cin4', 'sub5' ])
+
+		index.remove(0, child('cin0', 0))
+		index.remove(2, child('cin2', 2))
+		index.remove(4, child('cin4', 4))
+		index.remove(7, child('cin7', 7))	# not indexed
+		self.assertEqual(index.childRIs('cnt', 4), [ 'cin1', 'cin3' ])
+		self.assertEqual(index.countByType('cnt'), { 4: 2, 23: 1 })
+		self.assertEqual(index.contentSize('cnt', 4), 2)
+
+		index.add(0, child('cin0', 0))	# older than all others
+		self.assertEqual(index.oldestLatestChildRI('cnt', 4, oldest = True), 'cin0')
+
+		for i in [ 0, 1, 3 ]:
+			index.remove(i, child(f'cin{i}', i))
+		self.assertEqual(index.count('cnt', 4), 0)
+		self.assertIsNone(index.oldestLatestChildRI('cnt', 4))
+		self.assertEqual(index.contentSize('cnt', 4), 0)
+		self.assertEqual(index.childRIs('cnt'), [ 'sub5' ])
+
+
+def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
+	suite = unittest.TestSuite()
+
+	suite.addTest(TestAnnouncementIndex('test_searchLikeFilter'))
+	suite.addTest(TestAnnouncementIndex('test_rebuild'))
+	suite.addTest(TestAnnouncementIndex('test_updateAnnouncement'))
+	suite.addTest(TestAnnouncementIndex('test_removeAndClear'))
+	suite.addTest(TestChildIndex('test_removeOldest'))
+	suite.addTest(TestChildIndex('test_addAndRemove'))
+
+	result = unittest.TextTestRunner(verbosity=testVerbosity, failfast=testFailFast).run(suite)
+	printResult(result)
+	return result.testsRun, len(result.errors + result.failures), len(result.skipped)
+
+if __name__ == '__main__':
+	_, errors, _ = run(2, True)
+	sys.exit(errors)
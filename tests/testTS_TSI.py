@@ -7,11 +7,11 @@
 #	Unit tests for timeSeriean & timeSeries functionality
 #
 
-import unittest, sys, datetime
+import unittest, sys, datetime, threading
 if '..' not in sys.path:
 	sys.path.append('..')
 from typing import Tuple
-from acme.etc.Types import ResourceTypes as T, ResponseStatusCode as RC
+from acme.etc.Types import ResourceTypes as T, ResponseStatusCode as RC, ResultContentType as RCN
 from acme.etc.DateUtils import toISO8601Date, getResourceDate
 from init import *
 
@@ -683,6 +683,61 @@ class TestTS_TSI(unittest.TestCase):
 		self.assertGreater(len(findXPath(r, 'm2m:ts/mdlt')), 0, r)
 
 
+	def _createTSIsConcurrently(self, threads:int, count:int) -> None:
+		"""	Create `count` <TSI> in each of `threads` parallel threads. Each <TSI> gets its own *dgt*. """
+		results:list[RC] = []
+		def _createTSIs(n:int) -> None:
+			for i in range(count):
+				dct = 	{ 'm2m:tsi' : {
+							'dgt' : getResourceDate(-(n * count + i + 1)),
+							'con' : 'aValue'	# cs = 6
+						}}
+				_, rsc = CREATE(tsURL, TestTS_TSI.originator, T.TSI, dct)
+				results.append(rsc)
+		workers = [ threading.Thread(target = _createTSIs, args = (n, )) for n in range(threads) ]
+		[ w.start() for w in workers ]	# type: ignore [func-returns-value]
+		[ w.join() for w in workers ]	# type: ignore [func-returns-value]
+		self.assertEqual(results, [ RC.created ] * (threads * count))
+
+
+	def _assertInstances(self, cni:int) -> None:
+		"""	Check *cni* and *cbs* of the <TS>, and the actual number of <TSI>. """
+		r, rsc = RETRIEVE(tsURL, TestTS_TSI.originator)
+		self.assertEqual(rsc, RC.OK, r)
+		self.assertEqual(findXPath(r, 'm2m:ts/cni'), cni, r)
+		self.assertEqual(findXPath(r, 'm2m:ts/cbs'), cni * 6, r)
+		r, rsc = RETRIEVE(f'{tsURL}?fu=1&rcn={int(RCN.discoveryResultReferences)}&ty={int(T.TSI)}', TestTS_TSI.originator)
+		self.assertEqual(rsc, RC.OK, r)
+		self.assertEqual(len(findXPath(r, 'm2m:uril', [])), cni, r)
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_createTSIsConcurrently(self) -> None:
+		"""	Create <TS> and 10 * 10 <TSI> in parallel threads -> cni and cbs are correct """
+		dct = 	{ 'm2m:ts' : { 
+					'rn'  : tsRN,
+					'mni' : 1000,
+					'mbs' : 100000
+				}}
+		r, rsc = CREATE(aeURL, TestTS_TSI.originator, T.TS, dct)
+		self.assertEqual(rsc, RC.created, r)
+		self._createTSIsConcurrently(10, 10)
+		self._assertInstances(100)
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_createTSIsConcurrentlyWithMni(self) -> None:
+		"""	Create <TS> with mni and 10 * 10 <TSI> in parallel threads -> only mni <TSI> remain """
+		dct = 	{ 'm2m:ts' : { 
+					'rn'  : tsRN,
+					'mni' : 5
+				}}
+		r, rsc = CREATE(aeURL, TestTS_TSI.originator, T.TS, dct)
+		self.assertEqual(rsc, RC.created, r)
+		self._createTSIsConcurrently(10, 10)
+		self._assertInstances(5)
+
+
 
 # TODO: instead of mdt:9999 set the mdn to None etc.
 
@@ -705,6 +760,11 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestTS_TSI('test_createTSIwithSNR'))
 	suite.addTest(TestTS_TSI('test_deleteTS'))
 
+	suite.addTest(TestTS_TSI('test_createTSIsConcurrently'))
+	suite.addTest(TestTS_TSI('test_deleteTS'))
+	suite.addTest(TestTS_TSI('test_createTSIsConcurrentlyWithMni'))
+	suite.addTest(TestTS_TSI('test_deleteTS'))
+
 	suite.addTest(TestTS_TSI('test_setMddToFalseAfterAWhile'))
 	suite.addTest(TestTS_TSI('test_deleteTS'))
 
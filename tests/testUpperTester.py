@@ -7,12 +7,13 @@
 #	Unit tests for Upper Tester functionality
 #
 
-import unittest, sys
+import unittest, sys, json
 if '..' not in sys.path:
 	sys.path.append('..')
 from init import *
 from acme.etc.Types import CSEStatus
 from acme.etc.Types import ResponseStatusCode as RC
+from acme.etc.Types import ResourceTypes as T
 from acme.etc.Constants import Constants as C
 from typing import Tuple
 
@@ -105,6 +106,29 @@ class TestUpperTester(unittest.TestCase):
 		self.assertEqual(resp.headers[C.hfRSC], '2000')
 
 
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_explainDiscovery(self) -> None:
+		""" Explain a discovery request via UT interface """
+		resp = requests.post(UTURL, headers = { UTCMD: f'explainDiscovery {CSERN}?lbl=unknownLabel&ty={int(T.AE)}'})
+		self.assertEqual(resp.status_code, 200)
+		self.assertIn(C.hfRSC, resp.headers)
+		self.assertEqual(resp.headers[C.hfRSC], '2000')
+		self.assertIsNotNone(plan := json.loads(resp.headers[UTRSP]))
+		self.assertEqual(plan['plan'], 'index')
+		self.assertEqual(plan['criterion'], 'lbl')
+		self.assertEqual(plan['candidates'], 0)
+		self.assertIn('ty', plan['cardinalities'])
+
+
+	@unittest.skipIf(noCSE, 'No CSEBase')
+	def test_explainDiscoveryWrongTarget(self) -> None:
+		""" Explain a discovery request with a wrong target via UT interface -> Fail """
+		resp = requests.post(UTURL, headers = { UTCMD: f'explainDiscovery {CSERN}/wrong?ty={int(T.AE)}'})
+		self.assertEqual(resp.status_code, 400)
+		self.assertIn(C.hfRSC, resp.headers)
+		self.assertEqual(resp.headers[C.hfRSC], str(RC.badRequest.value))
+
+
 def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite = unittest.TestSuite()
 
@@ -114,6 +138,8 @@ def run(testVerbosity:int, testFailFast:bool) -> Tuple[int, int, int]:
 	suite.addTest(TestUpperTester('test_disableShortRequestExpiration'))
 	suite.addTest(TestUpperTester('test_enableShortResourceExpiration'))
 	suite.addTest(TestUpperTester('test_disableShortResourceExpiration'))
+	suite.addTest(TestUpperTester('test_explainDiscovery'))
+	suite.addTest(TestUpperTester('test_explainDiscoveryWrongTarget'))
 
 	result = unittest.TextTestRunner(verbosity = testVerbosity, failfast = testFailFast).run(suite)
 	printResult(result)